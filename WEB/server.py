@@ -0,0 +1,590 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sistema ERP - Servidor Web
+API HTTP/JSON sobre o mesmo banco SQLite da GUI e da CLI (pacote erp.storage),
+servindo também os arquivos estáticos desta pasta. Só biblioteca padrão.
+
+Rotas (JSON; todas exceto /api/login pedem ``Authorization: Bearer <token>``):
+    POST /api/login                       {"username", "password"} -> {"token", "user"}
+    POST /api/logout
+    GET  /api/dashboard                   contadores do dashboard
+    GET  /api/events?token=<token>        fluxo SSE: evento ``counters`` com os contadores alterados
+    GET  /api/employees?ativos=1          lista paginada (?after=<cursor>&limit=N)
+    GET  /api/employees/<código>
+    GET  /api/equipment                   lista paginada
+    GET  /api/equipment/<código>
+    GET  /api/service_orders?status=...   lista paginada, mais recentes primeiro
+    GET  /api/service_orders/<número>
+    POST /api/service_orders              {"client", "equipment", "problem", "technician", "priority"}
+    POST /api/service_orders/<número>/status   {"status"}
+    GET  /api/users                       (administradores)
+    GET  /api/users/<usuário>             (administradores ou o próprio usuário)
+    GET  /api/metrics                     latência por rota e métricas do banco (administradores)
+
+Listas devolvem ``{"items": [...], "next": cursor}``; ``next`` é null na última página.
+O fluxo de eventos recebe o token na URL, pois o EventSource do navegador
+não envia cabeçalhos; o primeiro evento traz todos os contadores.
+
+Uso:
+    python server.py                         # http://127.0.0.1:8080
+    python server.py --host 0.0.0.0 --porta 8000 --workers 32 --db ../gui/erp_database.db
+"""
+
+import argparse
+import json
+import os
+import queue
+import re
+import secrets
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from http.server import HTTPServer, SimpleHTTPRequestHandler
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+WEB_DIR = os.path.dirname(os.path.abspath(__file__))
+# O núcleo compartilhado com a GUI e a CLI (pacote erp) fica na raiz do repositório
+ROOT = os.path.dirname(WEB_DIR)
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from erp.auth import Authenticator
+from erp.live_stats import CounterFeed
+from erp.query_metrics import LatencyHistogram
+from erp.storage import Storage, ADMIN_ROLES, DEFAULT_DATABASE
+from erp.storage.service_orders import CLOSED_STATUS
+
+DEFAULT_PORT = 8080
+# Threads atendendo requisições; cada uma fica com uma conexão do pool do banco
+DEFAULT_WORKERS = 16
+# Conexões aceitas aguardando uma thread livre
+REQUEST_QUEUE_SIZE = 1024
+# Segundos sem receber dados antes de derrubar a conexão (clientes lentos não prendem threads)
+SOCKET_TIMEOUT = 10
+PAGE_LIMIT, MAX_PAGE_LIMIT = 50, 500
+MAX_BODY_BYTES = 64 * 1024
+SESSION_TTL_SECONDS = 8 * 3600
+PRIORITIES = ('Baixa', 'Média', 'Alta', 'Crítica')
+STATUSES = ('Em Aberto', 'Em Andamento', 'Aguardando Peças', CLOSED_STATUS)
+# Fluxos SSE abertos ao mesmo tempo; um comentário a cada HEARTBEAT detecta clientes que sumiram
+MAX_STREAMS = 2000
+HEARTBEAT_SECONDS = 15
+# Devolvido pelo handler que assumiu a conexão (nenhuma resposta JSON a enviar)
+STREAMING = object()
+
+
+class ApiError(Exception):
+    """Erro devolvido ao cliente como ``{"erro": mensagem}``"""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class RequestMetrics:
+    """Histograma de latência por rota (``GET /api/employees/{id}``), seguro entre threads"""
+
+    def __init__(self):
+        self.started = time.time()
+        self.routes: Dict[str, LatencyHistogram] = {}
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def begin(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def record(self, route: str, elapsed: float, items: int = 0, error: bool = False):
+        with self._lock:
+            self.in_flight -= 1
+            histogram = self.routes.get(route)
+            if histogram is None:
+                histogram = self.routes[route] = LatencyHistogram()
+            histogram.add(elapsed * 1000, items, error)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            routes = [dict(route=route, **h.summary()) for route, h in self.routes.items()]
+            in_flight = self.in_flight
+        routes.sort(key=lambda r: r['total_ms'], reverse=True)
+        total = sum(r['count'] for r in routes)
+        uptime = time.time() - self.started
+        return {'uptime_s': round(uptime, 1), 'requests': total,
+                'requests_per_s': round(total / uptime, 2) if uptime else 0.0,
+                'in_flight': in_flight, 'routes': routes}
+
+
+class Sessions:
+    """Tokens de acesso emitidos no login, válidos por ``ttl`` segundos"""
+
+    def __init__(self, ttl: float = SESSION_TTL_SECONDS):
+        self.ttl = ttl
+        self._sessions: Dict[str, Tuple[Dict[str, Any], float]] = {}
+        self._lock = threading.Lock()
+
+    def create(self, user: Dict[str, Any]) -> str:
+        token = secrets.token_urlsafe(32)
+        now = time.monotonic()
+        with self._lock:
+            # Descarta as expiradas de vez em quando, sem varrer a cada login
+            if len(self._sessions) % 256 == 0:
+                self._sessions = {t: s for t, s in self._sessions.items() if s[1] > now}
+            self._sessions[token] = (user, now + self.ttl)
+        return token
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            session = self._sessions.get(token)
+            if session is None or session[1] <= time.monotonic():
+                self._sessions.pop(token, None)
+                return None
+            return session[0]
+
+    def drop(self, token: str):
+        with self._lock:
+            self._sessions.pop(token, None)
+
+
+class EventStreams:
+    """Conexões SSE de /api/events, alimentadas por uma única thread
+
+    O handler envia os cabeçalhos e entrega o socket aqui; a thread de
+    atendimento volta ao pool na hora, então centenas de dashboards abertos
+    não ocupam nenhum worker nem conexão com o banco. Cada mudança dos
+    contadores vira um único evento, montado uma vez e escrito em todos os
+    sockets sem bloquear: um cliente que não consome o que recebe (buffer
+    do socket cheio) é desconectado em vez de atrasar os outros, assim
+    como os de sessões encerradas ou expiradas, a cada HEARTBEAT.
+    """
+
+    def __init__(self, feed: CounterFeed, sessions: 'Sessions', limit: int = MAX_STREAMS,
+                 heartbeat: float = HEARTBEAT_SECONDS):
+        self.feed = feed
+        self.sessions = sessions
+        self.limit = limit
+        self.heartbeat = heartbeat
+        self.sent = 0
+        self._clients: Dict[socket.socket, str] = {}             # socket -> token da sessão
+        self._lock = threading.Lock()
+        self._changes: 'queue.Queue' = queue.Queue()
+        feed.subscribe(self._changes.put)
+        self._thread = threading.Thread(target=self._run, name='sse', daemon=True)
+        self._thread.start()
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def full(self) -> bool:
+        return len(self._clients) >= self.limit
+
+    def owns(self, sock: socket.socket) -> bool:
+        return sock in self._clients
+
+    def add(self, sock: socket.socket, token: str):
+        """Assume a conexão (cabeçalhos já enviados) e manda os valores atuais"""
+        with self._lock:
+            sock.setblocking(False)
+            if self._send(sock, _event('counters', self.feed.snapshot())):
+                self._clients[sock] = token
+
+    def _run(self):
+        while True:
+            try:
+                changes = self._changes.get(timeout=self.heartbeat)
+            except queue.Empty:
+                self._broadcast(b': ping\n\n', check_sessions=True)
+                continue
+            if changes is None:
+                return
+            # Mudanças acumuladas enquanto o último evento era enviado saem juntas
+            while True:
+                try:
+                    more = self._changes.get_nowait()
+                except queue.Empty:
+                    break
+                if more is None:
+                    return
+                changes = {**changes, **more}
+            self._broadcast(_event('counters', changes))
+
+    def _broadcast(self, payload: bytes, check_sessions: bool = False):
+        with self._lock:
+            dropped = [sock for sock, token in self._clients.items()
+                       if (check_sessions and self.sessions.get(token) is None) or not self._send(sock, payload)]
+            for sock in dropped:
+                del self._clients[sock]
+                _close(sock)
+            self.sent += len(self._clients)
+
+    def _send(self, sock: socket.socket, payload: bytes) -> bool:
+        try:
+            return sock.send(payload) == len(payload)
+        except OSError:
+            return False
+
+    def close(self):
+        self.feed.unsubscribe(self._changes.put)
+        self._changes.put(None)
+        self._thread.join()
+        with self._lock:
+            for sock in self._clients:
+                _close(sock)
+            self._clients.clear()
+
+
+def _event(name: str, data: Any) -> bytes:
+    return f'event: {name}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n'.encode('utf-8')
+
+
+def _close(sock: socket.socket):
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+    sock.close()
+
+
+# ------------------------------------------------------------------ rotas
+
+# (método, expressão do caminho, nome da rota nas métricas, pública, método do handler)
+ROUTES: List[Tuple[str, 're.Pattern', str, bool, str]] = []
+
+
+def route(method: str, pattern: str, public: bool = False):
+    """Registra um método do handler para ``método caminho`` (``{nome}`` vira um parâmetro)"""
+    regex = re.compile('^' + re.sub(r'\{(\w+)\}', r'(?P<\1>[^/]+)', pattern) + '$')
+
+    def register(fn: Callable):
+        ROUTES.append((method, regex, f'{method} {pattern}', public, fn.__name__))
+        return fn
+    return register
+
+
+def find_route(method: str, path: str):
+    """(nome, pública, método do handler, parâmetros do caminho) da rota, ou None"""
+    for route_method, regex, name, public, handler in ROUTES:
+        match = regex.match(path)
+        if match and route_method == method:
+            return name, public, handler, match.groupdict()
+    return None
+
+
+def page_args(query: Dict[str, List[str]]) -> Tuple[Optional[str], int]:
+    """(cursor, limite) dos parâmetros ``after`` e ``limit``"""
+    after = query.get('after', [None])[0]
+    try:
+        limit = int(query.get('limit', [PAGE_LIMIT])[0])
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, "limit deve ser um número") from None
+    return after, max(1, min(limit, MAX_PAGE_LIMIT))
+
+
+def paged(items: List[Dict], limit: int, key: str) -> Dict[str, Any]:
+    return {'items': items, 'next': items[-1][key] if len(items) == limit else None}
+
+
+class ApiHandler(SimpleHTTPRequestHandler):
+    """Requisições da API em /api/; o resto são arquivos estáticos da pasta WEB"""
+
+    server: 'ApiServer'
+    timeout = SOCKET_TIMEOUT
+    server_version = 'ERPServer/1.0'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, directory=WEB_DIR, **kwargs)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def log_error(self, format, *args):
+        # Erros aparecem sempre, mesmo sem --log
+        super().log_message(format, *args)
+
+    def do_GET(self):
+        if self.path.startswith('/api/'):
+            self.handle_api()
+        else:
+            super().do_GET()
+
+    def do_POST(self):
+        self.handle_api()
+
+    # ------------------------------------------------------------ despacho
+
+    def handle_api(self):
+        started = time.perf_counter()
+        self.server.metrics.begin()
+        url = urlsplit(self.path)
+        found = find_route(self.command, url.path)
+        # Rotas desconhecidas somam em uma linha só das métricas
+        name = found[0] if found else f'{self.command} ?'
+        status, body, items = HTTPStatus.OK, None, 0
+        try:
+            if found is None:
+                raise ApiError(HTTPStatus.NOT_FOUND, f"Rota desconhecida: {self.command} {url.path}")
+            _, public, handler, params = found
+            self.user = None if public else self.authenticated_user()
+            body = getattr(self, handler)(parse_qs(url.query), **params)
+            if isinstance(body, dict) and isinstance(body.get('items'), list):
+                items = len(body['items'])
+        except ApiError as e:
+            status, body = e.status, {'erro': str(e)}
+        except Exception as e:
+            self.log_error("Erro em %s: %r", self.path, e)
+            status, body = HTTPStatus.INTERNAL_SERVER_ERROR, {'erro': "Erro interno do servidor"}
+        try:
+            if body is not STREAMING:
+                self.send_json(status, body)
+        finally:
+            self.server.metrics.record(name, time.perf_counter() - started, items, status >= 500)
+
+    def send_json(self, status: HTTPStatus, body: Any):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def authenticated_user(self) -> Dict[str, Any]:
+        header = self.headers.get('Authorization', '')
+        user = self.server.sessions.get(header[7:]) if header.startswith('Bearer ') else None
+        if user is None:
+            raise ApiError(HTTPStatus.UNAUTHORIZED, "Faça login para acessar a API")
+        return user
+
+    def require_admin(self):
+        if self.user['role'] not in ADMIN_ROLES:
+            raise ApiError(HTTPStatus.FORBIDDEN, "Acesso restrito a administradores")
+
+    def json_body(self) -> Dict[str, Any]:
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY_BYTES:
+            raise ApiError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Corpo da requisição muito grande")
+        try:
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Corpo da requisição não é JSON válido") from None
+        if not isinstance(body, dict):
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Corpo da requisição deve ser um objeto JSON")
+        return body
+
+    def found(self, record: Optional[Dict], message: str) -> Dict:
+        if record is None:
+            raise ApiError(HTTPStatus.NOT_FOUND, message)
+        return record
+
+    # -------------------------------------------------------------- sessão
+
+    @route('POST', '/api/login', public=True)
+    def api_post_login(self, query):
+        body = self.json_body()
+        username, password = str(body.get('username', '')), str(body.get('password', ''))
+        result = self.server.auth.login(username, password, source=self.client_address[0])
+        if result.retry_after:
+            raise ApiError(HTTPStatus.TOO_MANY_REQUESTS,
+                           f"Muitas tentativas de login; tente novamente em {int(result.retry_after) + 1}s")
+        if not result.ok:
+            raise ApiError(HTTPStatus.UNAUTHORIZED, "Usuário ou senha inválidos")
+        self.server.storage.users.touch_login(username)
+        user = {'username': result.user['username'], 'role': result.user['role']}
+        return {'token': self.server.sessions.create(user), 'user': user}
+
+    @route('POST', '/api/logout')
+    def api_post_logout(self, query):
+        self.server.sessions.drop(self.headers['Authorization'][7:])
+        return {'ok': True}
+
+    # ------------------------------------------------------------- leitura
+
+    @route('GET', '/api/dashboard')
+    def api_get_dashboard(self, query):
+        return self.server.live.snapshot()
+
+    @route('GET', '/api/events', public=True)
+    def api_get_events(self, query):
+        token = query.get('token', [''])[0]
+        if self.server.sessions.get(token) is None:
+            raise ApiError(HTTPStatus.UNAUTHORIZED, "Faça login para acessar a API")
+        if self.server.streams.full():
+            raise ApiError(HTTPStatus.SERVICE_UNAVAILABLE, "Muitos painéis conectados; tente mais tarde")
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+        self.send_header('Cache-Control', 'no-store')
+        # Proxies (nginx) não devem segurar os eventos em buffer
+        self.send_header('X-Accel-Buffering', 'no')
+        self.end_headers()
+        self.wfile.flush()
+        self.server.streams.add(self.connection, token)
+        return STREAMING
+
+    @route('GET', '/api/employees')
+    def api_get_employees(self, query):
+        after, limit = page_args(query)
+        where = 'active = 1' if query.get('ativos', ['0'])[0] in ('1', 'true', 'sim') else ''
+        return paged(self.server.storage.employees.page(after, limit, where), limit, 'id')
+
+    @route('GET', '/api/employees/{code}')
+    def api_get_employees_code(self, query, code):
+        return self.found(self.server.storage.employees.get(code), "Funcionário não encontrado")
+
+    @route('GET', '/api/equipment')
+    def api_get_equipment(self, query):
+        after, limit = page_args(query)
+        return paged(self.server.storage.equipment.page(after, limit), limit, 'id')
+
+    @route('GET', '/api/equipment/{code}')
+    def api_get_equipment_code(self, query, code):
+        return self.found(self.server.storage.equipment.get(code), "Equipamento não encontrado")
+
+    @route('GET', '/api/service_orders')
+    def api_get_service_orders(self, query):
+        after, limit = page_args(query)
+        status = query.get('status', [None])[0]
+        where, params = ('status = ?', (status,)) if status else ('', ())
+        orders = self.server.storage.service_orders.page(
+            _order_number(after) if after is not None else None, limit, where, params, descending=True)
+        return paged(orders, limit, 'number')
+
+    @route('GET', '/api/service_orders/{number}')
+    def api_get_service_orders_number(self, query, number):
+        return self.found(self.server.storage.service_orders.get(_order_number(number)),
+                          "Ordem de serviço não encontrada")
+
+    @route('GET', '/api/users')
+    def api_get_users(self, query):
+        self.require_admin()
+        after, limit = page_args(query)
+        return paged(self.server.storage.users.page(after, limit), limit, 'username')
+
+    @route('GET', '/api/users/{username}')
+    def api_get_users_username(self, query, username):
+        if username != self.user['username']:
+            self.require_admin()
+        return self.found(self.server.storage.users.get(username), "Usuário não encontrado")
+
+    @route('GET', '/api/metrics')
+    def api_get_metrics(self, query):
+        self.require_admin()
+        return {'http': self.server.metrics.snapshot(), 'database': self.server.storage.db.metrics.snapshot(),
+                'events': {'streams': len(self.server.streams), 'sent': self.server.streams.sent}}
+
+    # ------------------------------------------------------------- escrita
+
+    @route('POST', '/api/service_orders')
+    def api_post_service_orders(self, query):
+        body = self.json_body()
+        fields = {name: str(body.get(name, '')).strip() for name in ('client', 'equipment', 'problem', 'technician')}
+        missing = [name for name, value in fields.items() if not value]
+        if missing:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"Campos obrigatórios: {', '.join(missing)}")
+        priority = body.get('priority') or 'Média'
+        if priority not in PRIORITIES:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"Prioridade deve ser uma de: {', '.join(PRIORITIES)}")
+        return self.server.storage.service_orders.create(priority=priority, **fields)
+
+    @route('POST', '/api/service_orders/{number}/status')
+    def api_post_service_orders_number_status(self, query, number):
+        status = self.json_body().get('status')
+        if status not in STATUSES:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"Situação deve ser uma de: {', '.join(STATUSES)}")
+        try:
+            return self.server.storage.service_orders.set_status(_order_number(number), status)
+        except KeyError:
+            raise ApiError(HTTPStatus.NOT_FOUND, "Ordem de serviço não encontrada") from None
+
+
+def _order_number(text: str) -> int:
+    try:
+        return int(text)
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, "Número de O.S. inválido") from None
+
+
+class ApiServer(HTTPServer):
+    """Servidor HTTP com um número fixo de threads de atendimento
+
+    Cada conexão aceita vai para a fila de um ThreadPoolExecutor em vez de
+    ganhar uma thread própria: centenas de clientes simultâneos esperam na
+    fila (e no backlog do socket) sem criar centenas de threads, e o pool
+    de conexões do banco tem uma conexão por thread, então nenhuma
+    requisição espera por conexão. Respostas fecham a conexão (HTTP/1.0),
+    para que clientes ociosos não prendam threads; os fluxos SSE ficam com
+    EventStreams, fora do pool.
+    """
+
+    request_queue_size = REQUEST_QUEUE_SIZE
+
+    def __init__(self, address: Tuple[str, int], db_path: str = DEFAULT_DATABASE,
+                 workers: int = DEFAULT_WORKERS, verbose: bool = False):
+        self.storage = Storage(db_path, pool_size=workers)
+        self.auth = Authenticator(self.storage.users.verify)
+        self.sessions = Sessions()
+        self.metrics = RequestMetrics()
+        self.verbose = verbose
+        self.live = CounterFeed(self.storage.db.db_path, self.storage.db)
+        self.streams = EventStreams(self.live, self.sessions)
+        self._workers = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='http')
+        try:
+            super().__init__(address, ApiHandler)
+        except OSError:
+            self.streams.close()
+            self.live.close()
+            self.storage.close()
+            raise
+
+    def process_request(self, request, client_address):
+        self._workers.submit(self._serve, request, client_address)
+
+    def _serve(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            if not self.streams.owns(request):
+                self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self._workers.shutdown(wait=True)
+        self.streams.close()
+        self.live.close()
+        self.auth.shutdown()
+        self.storage.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Servidor web e API JSON do Sistema ERP")
+    parser.add_argument('--host', default='127.0.0.1', help="endereço de escuta (padrão: só esta máquina)")
+    parser.add_argument('--porta', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--db', default=DEFAULT_DATABASE)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help="threads de atendimento (e conexões com o banco)")
+    parser.add_argument('--log', action='store_true', help="registra cada requisição no terminal")
+    args = parser.parse_args(argv)
+
+    try:
+        server = ApiServer((args.host, args.porta), args.db, args.workers, args.log)
+    except OSError as e:
+        print(f"❌ Não foi possível abrir {args.host}:{args.porta}: {e}")
+        return 1
+    print(f"✅ Servindo http://{args.host}:{args.porta}/ (API em /api/, {args.workers} workers)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nServidor encerrado.")
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
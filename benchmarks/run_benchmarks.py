@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+ERP System - Benchmark Suite
+Headless timings and peak memory of the CLI and GUI data paths and reports, as JSON
+
+Usage:
+    python run_benchmarks.py --saida resultados.json
+    python run_benchmarks.py --tamanhos 1000,100000 --apenas gui
+    python run_benchmarks.py --tamanhos 1000000 --apenas relatorios --processos 8
+    python run_benchmarks.py --saida novo.json --comparar resultados.json
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime
+from typing import Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The shared core (erp package) from the root; cli/ and gui/ for the front-end modules measured
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'cli'), os.path.join(ROOT, 'gui')]
+# Credential lookups measure the storage path, not the password KDF, whose
+# cost is deliberate and tuned separately (python -m erp.auth --alvo-ms 250)
+os.environ.setdefault('ERP_KDF_ITERATIONS', '1000')
+
+SIZES = (1000, 100000, 1000000)
+REPEAT = 5
+SEED = 42
+# A benchmark this much slower than the baseline counts as a regression,
+# unless the difference is below the timer/scheduler noise floor
+TOLERANCE = 1.25
+NOISE_FLOOR = 0.0005
+# Report runs take seconds at the larger sizes, so they are repeated less
+REPORT_REPEAT = 3
+
+# Queries behind the dashboard cards: the aggregate table read today and
+# the COUNT(*) queries it replaced, kept to show the difference
+DASHBOARD_QUERIES = {
+    'dashboard_stats': ('SELECT name, value FROM dashboard_stats', ()),
+    'count_employees_active': ('SELECT COUNT(*) FROM employees WHERE active = 1', ()),
+    'count_equipment': ('SELECT COUNT(*) FROM equipment', ()),
+    'count_service_orders_open': ("SELECT COUNT(*) FROM service_orders WHERE status != 'Concluída'", ()),
+}
+
+
+class Suite:
+    """Collects timed and memory-profiled runs of named operations"""
+
+    def __init__(self, repeat: int = REPEAT, verbose: bool = True):
+        self.repeat = repeat
+        self.verbose = verbose
+        self.results: List[Dict] = []
+
+    def run(self, name: str, size: int, fn: Callable[[], object],
+            setup: Optional[Callable[[], None]] = None, ops: int = 1, repeat: Optional[int] = None):
+        """Time ``fn`` ``repeat`` times, then measure its peak allocations once
+
+        ``setup`` runs before every call and is excluded from the numbers.
+        ``ops`` is the number of operations one call performs, reported as
+        time per operation. Peak memory comes from a separate traced run so
+        tracemalloc overhead never reaches the timings.
+        """
+        timings = []
+        for _ in range(repeat or self.repeat):
+            if setup is not None:
+                setup()
+            started = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - started)
+
+        if setup is not None:
+            setup()
+        tracemalloc.start()
+        try:
+            fn()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        result = {
+            'name': name,
+            'size': size,
+            'repeat': len(timings),
+            'ops': ops,
+            'min_s': min(timings),
+            'median_s': statistics.median(timings),
+            'mean_s': statistics.fmean(timings),
+            'per_op_us': statistics.median(timings) / ops * 1e6,
+            'peak_kb': peak // 1024,
+        }
+        self.results.append(result)
+        if self.verbose:
+            print(f"  {name:<44} {result['median_s'] * 1000:>10.3f} ms  {result['peak_kb']:>9,} KB"
+                  .replace(',', '.'), flush=True)
+        return result
+
+
+# ---------------------------------------------------------------------- CLI
+
+def write_users(path: str, count: int):
+    """users_data.json with ``count`` users, written record by record"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{')
+        for number in range(count):
+            user = {"password": f"senha{number:07d}", "role": "Operador",
+                    "created_date": "2025-01-01", "last_login": None, "active": True}
+            f.write(f'{"," if number else ""}\n  "usuario{number:07d}": {json.dumps(user, ensure_ascii=False)}')
+        f.write('\n}\n')
+
+
+def bench_cli(suite: Suite, size: int, workdir: str):
+    """ERPSystem user storage, credential lookups and main screen rendering"""
+    directory = os.path.join(workdir, f'cli_{size}')
+    os.makedirs(directory, exist_ok=True)
+    for name in os.listdir(directory):
+        os.remove(os.path.join(directory, name))
+    write_users(os.path.join(directory, 'users_data.json'), size)
+
+    previous = os.getcwd()
+    os.chdir(directory)
+    try:
+        from main import ERPSystem, FrameRenderer
+
+        system = ERPSystem(storage_mode='journal')
+        try:
+            suite.run('cli.load_users', size, system.load_users, setup=system.users_db.close)
+            suite.run('cli.save_users', size, system.save_users)
+
+            lookups = [(f"usuario{n:07d}", f"senha{n:07d}") for n in range(0, size, max(1, size // 1000))]
+
+            def check_credentials():
+                for username, password in lookups:
+                    system.get_user_by_credentials(username, password)
+            suite.run('cli.get_user_by_credentials', size, check_credentials, ops=len(lookups))
+
+            system.screen = FrameRenderer(io.StringIO())
+            suite.run('cli.display_main_screen', size, lambda: system.display_main_screen(1),
+                      setup=system.screen.invalidate)
+        finally:
+            system.close()
+    finally:
+        os.chdir(previous)
+
+
+# ---------------------------------------------------------------------- GUI
+
+def gui_database(size: int, workdir: str) -> str:
+    """SQLite database with ``size`` employees and orders, generated once and reused"""
+    from demo_generator import DataGenerator, write_sqlite
+
+    path = os.path.join(workdir, f'gui_{size}_seed{SEED}.db')
+    if not os.path.exists(path):
+        print(f"  gerando {path}...", flush=True)
+        generator = DataGenerator(seed=SEED, employees=size, equipment=max(1, size // 10), orders=size)
+        write_sqlite(generator, path + '.tmp')
+        os.replace(path + '.tmp', path)
+        for suffix in ('-wal', '-shm'):
+            if os.path.exists(path + '.tmp' + suffix):
+                os.remove(path + '.tmp' + suffix)
+    return path
+
+
+def bench_gui(suite: Suite, size: int, workdir: str):
+    """DatabaseManager dashboard queries and the virtual employee listing"""
+    from erp.database import DatabaseManager
+    from virtual_list import KeysetPager
+
+    db = DatabaseManager(gui_database(size, workdir))
+    try:
+        for name, (query, params) in DASHBOARD_QUERIES.items():
+            suite.run(f'gui.execute_query.{name}', size, lambda q=query, p=params: db.execute_query(q, p))
+
+        def pager():
+            return KeysetPager(
+                db, 'employees',
+                ('id', 'name', 'position', 'department', 'hire_date', 'salary'),
+                count=lambda: db.execute_query(
+                    "SELECT value FROM dashboard_stats WHERE name = 'employees_active'")[0][0],
+                where='active = 1',
+            )
+
+        def first_page():
+            pager().rows(0, 30)
+
+        def middle_page():
+            p = pager()
+            p.rows(len(p) // 2, len(p) // 2 + 30)
+
+        def scroll(sort_column=None):
+            def run():
+                p = pager()
+                if sort_column is not None:
+                    p.sort_by(sort_column)
+                for top in range(0, 3000, 30):
+                    p.rows(top, top + 30)
+            return run
+
+        suite.run('gui.employees.first_page', size, first_page)
+        suite.run('gui.employees.jump_to_middle', size, middle_page)
+        suite.run('gui.employees.scroll_3000_by_id', size, scroll(), ops=100)
+        suite.run('gui.employees.scroll_3000_by_name', size, scroll('name'), ops=100)
+    finally:
+        db.close()
+
+
+def bench_reports(suite: Suite, size: int, workdir: str, workers: int):
+    """SLA report in a single process and split across a process pool
+
+    The pool runs are forced even below the report's own size threshold, so
+    the small sizes show what starting the processes costs. Each pool result
+    records its ``workers`` and its ``speedup`` over the single process.
+    """
+    from erp import reports
+
+    path = gui_database(size, workdir)
+    params = {**reports.period(), 'today': date.today().isoformat()}
+    repeat = min(suite.repeat, REPORT_REPEAT)
+
+    def sla(processes: int, split: str = 'mes'):
+        return lambda: list(reports.sla_rows(path, params, processes, split, min_orders=0))
+
+    serial = suite.run('reports.sla.single_process', size, sla(1), repeat=repeat)
+    for name, split in (('reports.sla.pool_by_month', 'mes'), ('reports.sla.pool_by_id', 'id')):
+        result = suite.run(name, size, sla(workers, split), repeat=repeat)
+        result['workers'] = workers
+        result['speedup'] = serial['median_s'] / result['median_s']
+        if suite.verbose:
+            print(f"  {'':<44} {result['speedup']:>9.2f}x com {workers} processos", flush=True)
+
+
+# ---------------------------------------------------------------- reporting
+
+def compare(results: List[Dict], baseline_path: str, tolerance: float) -> List[str]:
+    """Benchmarks whose best time grew by more than ``tolerance`` over the baseline"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {(r['name'], r['size']): r for r in json.load(f)['results']}
+
+    regressions = []
+    print(f"\nComparação com {baseline_path}:", file=sys.stderr)
+    for result in results:
+        before = baseline.get((result['name'], result['size']))
+        if before is None or not before['min_s']:
+            continue
+        ratio = result['min_s'] / before['min_s']
+        regressed = ratio > tolerance and result['min_s'] - before['min_s'] > NOISE_FLOOR
+        flag = '❌' if regressed else '  '
+        print(f"{flag} {result['name']:<44} {result['size']:>9}  {ratio:6.2f}x", file=sys.stderr)
+        if regressed:
+            regressions.append(f"{result['name']} ({result['size']})")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks do Sistema ERP")
+    parser.add_argument('--tamanhos', default=','.join(map(str, SIZES)),
+                        help="quantidades de registros separadas por vírgula")
+    parser.add_argument('--repeticoes', type=int, default=REPEAT)
+    parser.add_argument('--apenas', choices=('cli', 'gui', 'relatorios'), help="executa só uma das partes")
+    parser.add_argument('--processos', type=int, default=os.cpu_count() or 1,
+                        help="processos do relatório paralelo (padrão: um por núcleo)")
+    parser.add_argument('--dados', default=os.path.join(tempfile.gettempdir(), 'erp_benchmarks'),
+                        help="diretório dos dados gerados (bancos são reaproveitados)")
+    parser.add_argument('--saida', help="arquivo JSON de resultados (padrão: saída padrão)")
+    parser.add_argument('--comparar', metavar='BASE', help="resultados anteriores para comparação")
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCE,
+                        help="razão máxima aceita em relação à base")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.tamanhos.split(',') if size.strip()]
+    os.makedirs(args.dados, exist_ok=True)
+    suite = Suite(args.repeticoes, verbose=args.saida is not None)
+    started = time.perf_counter()
+
+    for size in sizes:
+        if suite.verbose:
+            print(f"\n{size:,} registros".replace(',', '.'))
+        if args.apenas in (None, 'cli'):
+            bench_cli(suite, size, args.dados)
+        if args.apenas in (None, 'gui'):
+            bench_gui(suite, size, args.dados)
+        if args.apenas in (None, 'relatorios'):
+            bench_reports(suite, size, args.dados, max(2, args.processos))
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'sqlite': __import__('sqlite3').sqlite_version,
+        'sizes': sizes,
+        'repeat': args.repeticoes,
+        'elapsed_s': time.perf_counter() - started,
+        'results': suite.results,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+        print(f"\n✅ Resultados gravados em {args.saida}")
+    else:
+        print(text)
+
+    if args.comparar:
+        regressions = compare(suite.results, args.comparar, args.tolerancia)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regressão(ões): {', '.join(regressions)}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+ERP System - Concurrent Storage Stress Test
+Several processes write the same CLI JSON files at once; fails if any update is lost
+
+Usage:
+    python stress_storage.py
+    python stress_storage.py --processos 16 --operacoes 200 --compactar-a-cada 50
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'cli'))
+
+from erp.journal import JournaledStore
+from service_orders import ServiceOrderRepository
+
+WRITERS = 16
+OPERATIONS = 100
+# Small enough that compactions run while the other writers are appending
+COMPACT_EVERY = 100
+SHARED_USER = 'admin'
+
+
+def writer(directory: str, index: int, operations: int, compact_every: int, start, results):
+    """One CLI session: creates users, edits a shared user, counts and opens orders"""
+    users = JournaledStore(os.path.join(directory, 'users_data.json'), {SHARED_USER: {'role': 'Administrador'}},
+                           compact_every=compact_every)
+    data = JournaledStore(os.path.join(directory, 'erp_data.json'), {'pending_orders': 0},
+                          compact_every=compact_every)
+    orders = ServiceOrderRepository(JournaledStore(os.path.join(directory, 'service_orders.json'), {},
+                                                   compact_every=compact_every))
+    numbers = []
+    start.wait()
+    began = time.perf_counter()
+    for op in range(operations):
+        users.update(f'user{index:02d}_{op:04d}', {'password': 'x', 'role': 'Usuário', 'active': True})
+        # Every session touches its own field of the same record
+        users.update(SHARED_USER, {f'field_{index:02d}': op})
+        data.modify(lambda current: {'pending_orders': current.get('pending_orders', 0) + 1})
+        if op % 10 == 0:
+            numbers.append(orders.create(f'Cliente {index}', 'Bomba', 'Teste', 'Técnico')['number'])
+    elapsed = time.perf_counter() - began
+    waits = users._file_lock.waits + data._file_lock.waits + orders.store._file_lock.waits
+    users.close()
+    data.close()
+    orders.close()
+    results.put((index, numbers, elapsed, waits))
+
+
+def check(directory: str, writers: int, operations: int, numbers) -> list:
+    """Problems found reading the files back in a fresh store"""
+    problems = []
+    users = JournaledStore(os.path.join(directory, 'users_data.json'))
+    data = JournaledStore(os.path.join(directory, 'erp_data.json'))
+    orders = JournaledStore(os.path.join(directory, 'service_orders.json'))
+    try:
+        missing = [f'user{i:02d}_{op:04d}' for i in range(writers) for op in range(operations)
+                   if f'user{i:02d}_{op:04d}' not in users]
+        if missing:
+            problems.append(f"{len(missing)} usuários perdidos (ex.: {missing[0]})")
+        shared = users.get(SHARED_USER, {})
+        stale = [i for i in range(writers) if shared.get(f'field_{i:02d}') != operations - 1]
+        if stale:
+            problems.append(f"campos do usuário compartilhado perdidos ou antigos: sessões {stale}")
+        expected = writers * operations
+        if data.get('pending_orders') != expected:
+            problems.append(f"contador {data.get('pending_orders')} (esperado {expected})")
+        if len(numbers) != len(set(numbers)):
+            problems.append(f"{len(numbers) - len(set(numbers))} números de O.S. repetidos")
+        lost = [n for n in numbers if str(n) not in orders]
+        if lost:
+            problems.append(f"{len(lost)} ordens de serviço perdidas")
+    finally:
+        users.close()
+        data.close()
+        orders.close()
+    return problems
+
+
+def run(directory: str, writers: int, operations: int, compact_every: int) -> list:
+    context = multiprocessing.get_context('spawn')
+    start = context.Event()
+    results = context.Queue()
+    processes = [context.Process(target=writer, args=(directory, i, operations, compact_every, start, results))
+                 for i in range(writers)]
+    for process in processes:
+        process.start()
+    start.set()
+    reports = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    if any(process.exitcode for process in processes):
+        return ["alguma sessão terminou com erro"]
+
+    numbers = [n for _, session_numbers, _, _ in reports for n in session_numbers]
+    slowest = max(elapsed for _, _, elapsed, _ in reports)
+    waits = sum(w for _, _, _, w in reports)
+    writes = writers * operations * 3 + len(numbers)
+    print(f"⏳ {writers} processos, {writes} gravações em {slowest:.2f}s "
+          f"({writes / slowest:.0f}/s), {waits} esperas pelo bloqueio")
+    return check(directory, writers, operations, numbers)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Teste de estresse do armazenamento JSON da CLI com vários processos")
+    parser.add_argument('--processos', type=int, default=WRITERS, help="sessões gravando ao mesmo tempo")
+    parser.add_argument('--operacoes', type=int, default=OPERATIONS, help="rodadas de gravação por sessão")
+    parser.add_argument('--compactar-a-cada', type=int, default=COMPACT_EVERY,
+                        help="registros no journal antes de compactar")
+    parser.add_argument('--dados', help="diretório dos arquivos (padrão: diretório temporário)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(dir=args.dados) as directory:
+        problems = run(directory, args.processos, args.operacoes, args.compactar_a_cada)
+    if problems:
+        for problem in problems:
+            print(f"❌ {problem}")
+        return 1
+    print("✅ Nenhuma atualização perdida")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,11 +2,23 @@
 """
 CLI ERP System - Demo Data Generator
 Creates sample data for demonstration purposes
+
+Usage:
+    python demo_generator.py                       # small hand-written demo_data.json
+    python demo_generator.py --ordens 1000000 --formato jsonl --saida dados/
+    python demo_generator.py --ordens 100000 --formato sqlite --saida erp_database.db --semente 7
 """
 
+import argparse
+import csv
+import itertools
 import json
+import os
 import random
-from datetime import datetime, timedelta
+import sys
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
 
 def create_demo_data():
     """Create demonstration data for the ERP system"""
@@ -182,7 +194,379 @@ def save_demo_data():
     except Exception as e:
         print(f"❌ Erro ao criar dados de demonstração: {e}")
 
+# ------------------------------------------------------------------ synthetic data
+
+# Columns of each table, matching the SQLite schema of the GUI version
+TABLE_COLUMNS = {
+    "employees": ("id", "name", "position", "department", "hire_date", "salary", "active"),
+    "equipment": ("id", "name", "type", "brand", "model", "serial_number", "purchase_date", "status",
+                  "maintenance_interval", "last_maintenance", "next_maintenance"),
+    "service_orders": ("id", "employee_id", "equipment_id", "description", "priority", "status",
+                       "created_date", "due_date", "closed_date"),
+}
+
+FIRST_NAMES = [
+    "João", "Maria", "José", "Ana", "Carlos", "Francisca", "Paulo", "Antônia", "Pedro", "Adriana",
+    "Lucas", "Juliana", "Marcos", "Márcia", "Luiz", "Fernanda", "Gabriel", "Patrícia", "Rafael", "Aline",
+    "Daniel", "Sandra", "Marcelo", "Camila", "Bruno", "Amanda", "Eduardo", "Bruna", "Felipe", "Jéssica",
+    "Rodrigo", "Letícia", "Thiago", "Vanessa", "André", "Mariana", "Ricardo", "Cristina", "Gustavo", "Renata",
+]
+LAST_NAMES = [
+    "Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira", "Lima", "Gomes",
+    "Costa", "Ribeiro", "Martins", "Carvalho", "Almeida", "Lopes", "Soares", "Fernandes", "Vieira", "Barbosa",
+    "Rocha", "Dias", "Nascimento", "Andrade", "Moreira", "Nunes", "Marques", "Machado", "Mendes", "Freitas",
+]
+
+# department: (weight, [(position, weight, base monthly salary)])
+DEPARTMENTS = {
+    "Manutenção": (40, [("Técnico de Manutenção", 60, 4200), ("Eletricista Industrial", 25, 4800),
+                        ("Supervisor de Manutenção", 10, 7500), ("Engenheiro de Manutenção", 5, 11000)]),
+    "Produção": (30, [("Operador de Máquinas", 70, 3200), ("Supervisor de Produção", 20, 6800),
+                      ("Gerente de Produção", 10, 14000)]),
+    "TI": (8, [("Analista de Sistemas", 60, 5500), ("Desenvolvedor", 30, 7000), ("Coordenador de TI", 10, 12000)]),
+    "Administrativo": (15, [("Auxiliar Administrativo", 60, 2800), ("Analista Financeiro", 30, 5200),
+                            ("Gerente Administrativo", 10, 12500)]),
+    "Qualidade": (7, [("Inspetor de Qualidade", 70, 3900), ("Analista de Qualidade", 30, 5600)]),
+}
+
+# type: (weight, [names], [brands], model prefix)
+EQUIPMENT_TYPES = {
+    "Máquina Industrial": (35, ["Torno Mecânico CNC", "Fresadora Universal", "Centro de Usinagem", "Retificadora Plana",
+                                "Furadeira de Coluna", "Prensa Excêntrica"], ["Romi", "Ergomat", "Nardini", "Mazak", "Haas"], "MX"),
+    "Equipamento Auxiliar": (25, ["Compressor de Ar", "Bomba Centrífuga", "Secador de Ar", "Torre de Resfriamento"],
+                             ["Schulz", "Atlas Copco", "KSB", "Schneider"], "AX"),
+    "Sistema Elétrico": (15, ["Quadro de Distribuição", "Painel de Comando", "Transformador", "Inversor de Frequência"],
+                         ["WEG", "Siemens", "ABB", "Schneider Electric"], "EL"),
+    "Sistema Hidráulico": (15, ["Unidade Hidráulica", "Prensa Hidráulica", "Cilindro Hidráulico"],
+                           ["Bosch Rexroth", "Parker", "Eaton"], "HD"),
+    "Movimentação": (10, ["Empilhadeira", "Ponte Rolante", "Esteira Transportadora", "Talha Elétrica"],
+                     ["Toyota", "Hyster", "Demag", "Still"], "MV"),
+}
+EQUIPMENT_STATUSES = (("Ativo", 85), ("Manutenção", 10), ("Inativo", 5))
+# Days between preventive maintenances, by equipment type
+MAINTENANCE_DAYS = {
+    "Máquina Industrial": (30, 90),
+    "Equipamento Auxiliar": (60, 90, 180),
+    "Sistema Elétrico": (180, 365),
+    "Sistema Hidráulico": (90, 180),
+    "Movimentação": (30, 60),
+}
+
+SYMPTOMS = [
+    "Ruído excessivo", "Vibração anormal", "Superaquecimento", "Perda de pressão", "Vazamento de óleo",
+    "Falha intermitente", "Desgaste prematuro", "Travamento", "Folga", "Desalinhamento",
+    "Queda de rendimento", "Curto-circuito", "Alarme recorrente", "Calibração fora de tolerância",
+]
+COMPONENTS = [
+    "no fuso principal", "no rolamento", "na correia", "no motor", "no circuito hidráulico", "na bomba",
+    "no quadro principal", "no eixo X", "no eixo Z", "na placa de controle", "no sensor de posição",
+    "na válvula direcional", "no redutor", "no acoplamento", "na vedação",
+]
+CONTEXTS = [
+    "", "", "", " durante a usinagem", " após a partida", " em carga máxima", " no turno da noite",
+    " após troca de ferramenta", " desde a última preventiva", " com parada de linha",
+]
+
+PRIORITY_WEIGHTS = (("Baixa", 30), ("Média", 45), ("Alta", 20), ("Crítica", 5))
+PRIORITY_DUE_DAYS = {"Baixa": 15, "Média": 7, "Alta": 3, "Crítica": 1}
+OPEN_STATUSES = (("Em Aberto", 45), ("Em Andamento", 35), ("Aguardando Peças", 20))
+CLOSED_STATUS = "Concluída"
+
+# Orders older than this are almost always concluded
+OPEN_WINDOW_DAYS = 60
+HISTORY_YEARS = 5
+
+
+def _weighted(rng: random.Random, table: Sequence[Tuple]) -> Callable[[], Tuple]:
+    """Sampler for rows of (value, weight, ...)"""
+    cumulative = list(itertools.accumulate(row[1] for row in table))
+    return lambda: rng.choices(table, cum_weights=cumulative)[0]
+
+
+class DataGenerator:
+    """Reproducible, referentially consistent records at any volume
+
+    Every table is drawn from its own random stream derived from the
+    seed, so the same seed, counts and ``today`` give the same records. The
+    records are yielded one at a time and nothing is kept between them:
+    service orders reference employees and equipment by computing their
+    codes from an index in range, so memory use does not grow with the
+    counts.
+
+    Distributions: employees spread over departments and positions with
+    log-normal salaries around each position's base and hire dates
+    skewed towards recent years; equipment by type with a few under
+    maintenance and a preventive maintenance plan by type (a few items
+    already overdue); orders spread over the last ``HISTORY_YEARS`` years in
+    code order, with a few technicians and machines drawing most of the
+    work, priority-dependent due dates and, except for recent orders,
+    mostly concluded, with log-normal lead times around the due date
+    (so some miss it).
+    """
+
+    def __init__(self, seed: int = 42, employees: int = 100, equipment: int = 50, orders: int = 1000,
+                 today: Optional[date] = None):
+        if employees <= 0 or equipment <= 0:
+            raise ValueError("orders need at least one employee and one equipment")
+        self.seed = seed
+        self.counts = {"employees": employees, "equipment": equipment, "service_orders": orders}
+        self.today = today or date.today()
+
+    def _rng(self, table: str) -> random.Random:
+        return random.Random(f"{self.seed}:{table}")
+
+    @staticmethod
+    def code(prefix: str, number: int, count: int) -> str:
+        """Sequential code wide enough for ``count`` records, like EMP0001"""
+        return f"{prefix}{number:0{max(4, len(str(count)))}d}"
+
+    def employee_code(self, index: int) -> str:
+        return self.code("EMP", index + 1, self.counts["employees"])
+
+    def equipment_code(self, index: int) -> str:
+        return self.code("EQ", index + 1, self.counts["equipment"])
+
+    def employees(self) -> Iterator[Dict]:
+        rng = self._rng("employees")
+        department = _weighted(rng, [(name, weight, positions) for name, (weight, positions) in DEPARTMENTS.items()])
+        position_samplers = {name: _weighted(rng, positions) for name, (_, positions) in DEPARTMENTS.items()}
+        history = 15 * 365
+
+        for index in range(self.counts["employees"]):
+            dept = department()[0]
+            position, _, base = position_samplers[dept]()
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            if rng.random() < 0.4:
+                name += f" {rng.choice(LAST_NAMES)}"
+            hired = self.today - timedelta(days=int(history * rng.random() ** 2))
+            yield {
+                "id": self.employee_code(index),
+                "name": name,
+                "position": position,
+                "department": dept,
+                "hire_date": hired.isoformat(),
+                "salary": round(base * rng.lognormvariate(0, 0.15), 2),
+                "active": 1 if rng.random() < 0.92 else 0,
+            }
+
+    def equipment(self) -> Iterator[Dict]:
+        rng = self._rng("equipment")
+        kind = _weighted(rng, [(name, weight, names, brands, prefix)
+                               for name, (weight, names, brands, prefix) in EQUIPMENT_TYPES.items()])
+        status = _weighted(rng, EQUIPMENT_STATUSES)
+        # Separate stream: adding the maintenance plan left every other field as it was
+        plan_rng = self._rng("maintenance")
+        history = 20 * 365
+
+        for index in range(self.counts["equipment"]):
+            type_name, _, names, brands, prefix = kind()
+            purchased = self.today - timedelta(days=rng.randrange(history))
+            interval = plan_rng.choice(MAINTENANCE_DAYS[type_name])
+            # Up to 20% past the interval: those are overdue
+            last = max(purchased, self.today - timedelta(days=plan_rng.randrange(int(interval * 1.2))))
+            yield {
+                "id": self.equipment_code(index),
+                "name": f"{rng.choice(names)} {index + 1:03d}",
+                "type": type_name,
+                "brand": rng.choice(brands),
+                "model": f"{prefix}-{rng.randrange(100, 1000)}",
+                "serial_number": f"SN{purchased.year}{rng.randrange(10 ** 6):06d}",
+                "purchase_date": purchased.isoformat(),
+                "status": status()[0],
+                "maintenance_interval": interval,
+                "last_maintenance": last.isoformat(),
+                "next_maintenance": (last + timedelta(days=interval)).isoformat(),
+            }
+
+    def service_orders(self) -> Iterator[Dict]:
+        rng = self._rng("service_orders")
+        # Separate stream: adding closing dates left every other field as it was
+        lead_rng = self._rng("lead_times")
+        priority = _weighted(rng, PRIORITY_WEIGHTS)
+        open_status = _weighted(rng, OPEN_STATUSES)
+        count = self.counts["service_orders"]
+        employees = self.counts["employees"]
+        equipment = self.counts["equipment"]
+        span = HISTORY_YEARS * 365
+        first = self.today - timedelta(days=span)
+
+        for index in range(count):
+            # Codes follow creation order; a little jitter keeps dates realistic
+            offset = min(span, max(0, int(span * (index + rng.random()) / count)))
+            created = first + timedelta(days=offset)
+            age = (self.today - created).days
+            level = priority()[0]
+            if age > OPEN_WINDOW_DAYS:
+                closed = rng.random() < 0.995
+            else:
+                closed = rng.random() < age / (OPEN_WINDOW_DAYS * 1.5)
+            lead_days = min(age, int(PRIORITY_DUE_DAYS[level] * lead_rng.lognormvariate(-0.3, 0.7)))
+            yield {
+                "id": self.code("OS", index + 1, count),
+                # Squaring a uniform draw makes low indexes much more frequent
+                "employee_id": self.employee_code(int(employees * rng.random() ** 2)),
+                "equipment_id": self.equipment_code(int(equipment * rng.random() ** 2)),
+                "description": f"{rng.choice(SYMPTOMS)} {rng.choice(COMPONENTS)}{rng.choice(CONTEXTS)}",
+                "priority": level,
+                "status": CLOSED_STATUS if closed else open_status()[0],
+                "created_date": created.isoformat(),
+                "due_date": (created + timedelta(days=PRIORITY_DUE_DAYS[level])).isoformat(),
+                "closed_date": (created + timedelta(days=lead_days)).isoformat() if closed else None,
+            }
+
+    def tables(self) -> Iterator[Tuple[str, Iterator[Dict]]]:
+        """(table, records) in dependency order"""
+        yield "employees", self.employees()
+        yield "equipment", self.equipment()
+        yield "service_orders", self.service_orders()
+
+
+# ------------------------------------------------------------------ writers
+
+def write_jsonl(generator: DataGenerator, directory: str, progress=None) -> List[str]:
+    """One JSON Lines file per table (``employees.jsonl``, ...)"""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for table, records in generator.tables():
+        path = os.path.join(directory, f"{table}.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            for number, record in enumerate(records, 1):
+                f.write(json.dumps(record, ensure_ascii=False))
+                f.write("\n")
+                if progress is not None and number % 10000 == 0:
+                    progress(table, number)
+        paths.append(path)
+    return paths
+
+
+def write_csv(generator: DataGenerator, directory: str, progress=None) -> List[str]:
+    """One CSV file per table (``employees.csv``, ...), header included"""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for table, records in generator.tables():
+        path = os.path.join(directory, f"{table}.csv")
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=TABLE_COLUMNS[table])
+            writer.writeheader()
+            for number, record in enumerate(records, 1):
+                writer.writerow(record)
+                if progress is not None and number % 10000 == 0:
+                    progress(table, number)
+        paths.append(path)
+    return paths
+
+
+def write_json(generator: DataGenerator, path: str, progress=None) -> List[str]:
+    """A single file in the demo_data.json layout, written record by record"""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{")
+        for position, (table, records) in enumerate(generator.tables()):
+            f.write(f'{"," if position else ""}\n  "{table}": [')
+            for number, record in enumerate(records, 1):
+                f.write(f'{"," if number > 1 else ""}\n    {json.dumps(record, ensure_ascii=False)}')
+                if progress is not None and number % 10000 == 0:
+                    progress(table, number)
+            f.write("\n  ]")
+        f.write("\n}\n")
+    return [path]
+
+
+def add_shared_core():
+    """Make the erp package (the core shared by the GUI, CLI and web server) importable"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if root not in sys.path:
+        sys.path.insert(0, root)
+
+
+def write_sqlite(generator: DataGenerator, path: str, progress=None, chunk_size: int = 10000) -> List[str]:
+    """Insert straight into the GUI's SQLite database, creating the schema if needed
+
+    Rows go in with executemany, ``chunk_size`` per transaction; the
+    schema's triggers keep the dashboard counters and search indexes in
+    step. Existing codes are left untouched.
+    """
+    add_shared_core()
+    from erp.database import DatabaseManager
+
+    db = DatabaseManager(path)
+    try:
+        for table, records in generator.tables():
+            columns = TABLE_COLUMNS[table]
+            query = (f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) "
+                     f"VALUES ({', '.join('?' for _ in columns)})")
+            number = 0
+            while True:
+                rows = [tuple(r[c] for c in columns) for r in itertools.islice(records, chunk_size)]
+                if not rows:
+                    break
+                db.execute_many(query, rows)
+                number += len(rows)
+                if progress is not None:
+                    progress(table, number)
+    finally:
+        db.close()
+    return [path]
+
+
+WRITERS = {
+    "json": (write_json, "demo_data.json"),
+    "jsonl": (write_jsonl, "dados"),
+    "csv": (write_csv, "dados"),
+    "sqlite": (write_sqlite, "erp_database.db"),
+}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Gerador de dados sintéticos do Sistema ERP")
+    parser.add_argument("--ordens", type=int, help="quantidade de ordens de serviço")
+    parser.add_argument("--funcionarios", type=int, help="quantidade de funcionários (padrão: ordens / 50)")
+    parser.add_argument("--equipamentos", type=int, help="quantidade de equipamentos (padrão: ordens / 20)")
+    parser.add_argument("--semente", type=int, default=42, help="semente aleatória (mesma semente, mesmos dados)")
+    parser.add_argument("--data-referencia", type=date.fromisoformat,
+                        help="data AAAA-MM-DD tomada como hoje (padrão: hoje)")
+    parser.add_argument("--formato", choices=sorted(WRITERS), default="jsonl")
+    parser.add_argument("--saida", help="arquivo (json, sqlite) ou diretório (jsonl, csv) de destino "
+                                        "(sqlite: o banco padrão do sistema)")
+    args = parser.parse_args(argv)
+
+    if args.ordens is None and args.funcionarios is None and args.equipamentos is None:
+        print("🔧 Gerando dados de demonstração para o Sistema ERP...")
+        save_demo_data()
+        print("\n🚀 Execute 'python main.py' para usar o sistema!")
+        return 0
+
+    orders = args.ordens if args.ordens is not None else 1000
+    generator = DataGenerator(
+        seed=args.semente,
+        employees=args.funcionarios or max(1, orders // 50),
+        equipment=args.equipamentos or max(1, orders // 20),
+        orders=orders,
+        today=args.data_referencia,
+    )
+    writer, default_output = WRITERS[args.formato]
+    if args.formato == "sqlite" and not args.saida:
+        # The database the GUI, the CLI and the web server open by default
+        add_shared_core()
+        from erp import DEFAULT_DATABASE as default_output
+    started = time.perf_counter()
+
+    def show_progress(table, number):
+        total = generator.counts[table]
+        print(f"\r⏳ {table}: {number:,}/{total:,}".replace(",", "."), end="", flush=True)
+
+    try:
+        paths = writer(generator, args.saida or default_output, progress=show_progress)
+    except (OSError, ValueError) as e:
+        print(f"\n❌ Erro ao gerar dados: {e}")
+        return 1
+
+    elapsed = time.perf_counter() - started
+    total = sum(generator.counts.values())
+    print(f"\r✅ {total:,} registros gerados em {elapsed:.1f}s".replace(",", ".") + " " * 20)
+    for path in paths:
+        print(f"   {path}")
+    return 0
+
+
 if __name__ == "__main__":
-    print("🔧 Gerando dados de demonstração para o Sistema ERP...")
-    save_demo_data()
-    print("\n🚀 Execute 'python main.py' para usar o sistema!")
+    sys.exit(main())
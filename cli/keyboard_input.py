@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+CLI ERP System - Keyboard Input
+Event-driven key reader that keeps the terminal in cbreak mode per session
+"""
+
+import os
+import sys
+import codecs
+from collections import deque
+from typing import Iterator, List
+
+if os.name == 'nt':  # Windows
+    import msvcrt
+else:  # Unix/Linux
+    import selectors
+    import termios
+    import tty
+
+# Seconds to wait for the rest of an escape sequence before reporting a lone ESC
+ESC_TIMEOUT = 0.05
+
+# Final byte of "ESC [ ..." / "ESC O ..." sequences
+_SEQUENCE_KEYS = {
+    'A': 'UP', 'B': 'DOWN', 'C': 'RIGHT', 'D': 'LEFT',
+    'H': 'HOME', 'F': 'END',
+}
+
+# Numeric parameter of "ESC [ n ~" sequences
+_TILDE_KEYS = {
+    '1': 'HOME', '2': 'INSERT', '3': 'DELETE', '4': 'END',
+    '5': 'PGUP', '6': 'PGDN', '7': 'HOME', '8': 'END',
+}
+
+_CONTROL_KEYS = {
+    '\r': 'ENTER', '\n': 'ENTER', '\t': 'TAB',
+    '\x7f': 'BACKSPACE', '\x08': 'BACKSPACE',
+}
+
+# Second code after the 0x00/0xE0 prefix returned by msvcrt.getwch
+_WINDOWS_KEYS = {
+    'H': 'UP', 'P': 'DOWN', 'K': 'LEFT', 'M': 'RIGHT',
+    'G': 'HOME', 'O': 'END', 'I': 'PGUP', 'Q': 'PGDN',
+    'R': 'INSERT', 'S': 'DELETE',
+}
+
+
+class EscapeParser:
+    """Incremental state machine turning terminal bytes into key events
+
+    States:
+        GROUND  plain characters
+        ESCAPE  ESC received, waiting to see whether a sequence follows
+        CSI     inside "ESC [", collecting parameters until the final byte
+        SS3     inside "ESC O", waiting for the final byte
+
+    ``feed()`` returns the keys completed by a chunk of input. An
+    unfinished sequence stays buffered (``pending``) until more bytes
+    arrive or the reader calls ``timeout()``, which resolves it as ESC.
+    """
+
+    GROUND, ESCAPE, CSI, SS3 = range(4)
+
+    def __init__(self):
+        self.state = self.GROUND
+        self.params = ''
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+    @property
+    def pending(self) -> bool:
+        """True while an escape sequence is incomplete"""
+        return self.state != self.GROUND
+
+    def feed(self, data: bytes) -> List[str]:
+        """Consume raw input and return the keys it completes"""
+        keys = []
+        for ch in self._decoder.decode(data):
+            self._step(ch, keys)
+        return keys
+
+    def timeout(self) -> List[str]:
+        """No more input arrived: an unfinished sequence was a lone ESC"""
+        if self.state == self.GROUND:
+            return []
+        self.state = self.GROUND
+        return ['ESC']
+
+    def _step(self, ch: str, keys: List[str]):
+        """Advance the state machine by one character"""
+        if self.state == self.ESCAPE:
+            if ch == '[':
+                self.state, self.params = self.CSI, ''
+                return
+            if ch == 'O':
+                self.state = self.SS3
+                return
+            # ESC followed by anything else: report ESC, then handle the character
+            self.state = self.GROUND
+            keys.append('ESC')
+
+        elif self.state == self.CSI:
+            if '0' <= ch <= '?':
+                self.params += ch
+                return
+            self.state = self.GROUND
+            if ch == '~':
+                key = _TILDE_KEYS.get(self.params.split(';')[0])
+            else:
+                key = _SEQUENCE_KEYS.get(ch)
+            if key:
+                keys.append(key)
+            return
+
+        elif self.state == self.SS3:
+            self.state = self.GROUND
+            key = _SEQUENCE_KEYS.get(ch)
+            if key:
+                keys.append(key)
+            return
+
+        if ch == '\x1b':
+            self.state = self.ESCAPE
+        else:
+            keys.append(_CONTROL_KEYS.get(ch, ch))
+
+
+class KeyboardInput:
+    """Keyboard session that reads key events including arrow keys
+
+    Usage:
+        with KeyboardInput() as keyboard:
+            for key in keyboard.events():
+                ...
+
+    The terminal is switched to cbreak mode once when the session starts
+    and restored when it ends, so the menus can go back to ``input()``
+    afterwards. While waiting for a key the reader blocks in a selector
+    (Unix) or in ``msvcrt.getwch`` (Windows), so an idle menu uses no CPU.
+    Keys are reported as single characters or as the names 'UP', 'DOWN',
+    'LEFT', 'RIGHT', 'HOME', 'END', 'PGUP', 'PGDN', 'INSERT', 'DELETE',
+    'ENTER', 'TAB', 'BACKSPACE' and 'ESC'.
+    """
+
+    def __init__(self, stream=None, esc_timeout: float = ESC_TIMEOUT):
+        self.stream = stream or sys.stdin
+        self.esc_timeout = esc_timeout
+        self.parser = EscapeParser()
+        self._keys = deque()
+        self._saved_mode = None
+        self._selector = None
+        self.fd = None
+
+    @staticmethod
+    def available(stream=None) -> bool:
+        """Whether key-by-key input is possible (stdin is a terminal)"""
+        stream = stream or sys.stdin
+        try:
+            return stream.isatty()
+        except (AttributeError, ValueError):
+            return False
+
+    @staticmethod
+    def get_key() -> str:
+        """Get a single key press in a short-lived session"""
+        with KeyboardInput() as keyboard:
+            return keyboard.read_key()
+
+    def __enter__(self):
+        if os.name != 'nt':
+            self.fd = self.stream.fileno()
+            self._saved_mode = termios.tcgetattr(self.fd)
+            tty.setcbreak(self.fd)
+            self._selector = selectors.DefaultSelector()
+            self._selector.register(self.fd, selectors.EVENT_READ)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._selector is not None:
+            self._selector.close()
+            self._selector = None
+        if self._saved_mode is not None:
+            termios.tcsetattr(self.fd, termios.TCSADRAIN, self._saved_mode)
+            self._saved_mode = None
+        return False
+
+    def events(self) -> Iterator[str]:
+        """Endless iterator of key events"""
+        while True:
+            yield self.read_key()
+
+    def read_key(self) -> str:
+        """Block until the next key event"""
+        while not self._keys:
+            if os.name == 'nt':
+                self._keys.extend(self._read_windows())
+            else:
+                self._keys.extend(self._read_unix())
+        return self._keys.popleft()
+
+    def _read_unix(self) -> List[str]:
+        """Wait for input (bounded only while a sequence is pending) and parse it"""
+        timeout = self.esc_timeout if self.parser.pending else None
+        if not self._selector.select(timeout):
+            return self.parser.timeout()
+        data = os.read(self.fd, 1024)
+        if not data:
+            raise EOFError
+        return self.parser.feed(data)
+
+    def _read_windows(self) -> List[str]:
+        """Read one console key; getwch blocks without polling"""
+        ch = msvcrt.getwch()
+        if ch in ('\x00', '\xe0'):  # Special key prefix on Windows
+            key = _WINDOWS_KEYS.get(msvcrt.getwch())
+            return [key] if key else []
+        if ch == '\x03':
+            raise KeyboardInterrupt
+        if ch == '\x1b':
+            return ['ESC']
+        return [_CONTROL_KEYS.get(ch, ch)]
@@ -4,19 +4,36 @@ CLI ERP System - Main Application
 A command-line Enterprise Resource Planning system with menu-driven interface
 """
 
+import argparse
+import hmac
 import os
 import sys
 import datetime
 import getpass
+import itertools
+import shutil
+import sqlite3
+import tempfile
 import time
 import json
 from dataclasses import dataclass
-from typing import List, Dict, Optional
+from typing import List, Dict, Iterable, Iterator, Optional
 
-# Import for keyboard and mouse input detection
+# The core shared with the GUI and the web server (the erp package) lives at the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from erp import auth, live_stats, maintenance, profiler, reports, storage
+from erp.journal import JournaledStore
+from erp.storage import exchange
+from service_orders import ServiceOrderRepository, STATUSES, PRIORITIES, CLOSED_STATUS
+from search_index import EmployeeSearchIndex
+
+from keyboard_input import KeyboardInput
+
+# Mouse simulation is only offered in the Windows console
 if os.name == 'nt':  # Windows
-    import msvcrt
-    # Try to enable mouse support in Windows terminal
     try:
         import ctypes
         from ctypes import wintypes
@@ -24,8 +41,6 @@ if os.name == 'nt':  # Windows
     except ImportError:
         MOUSE_SUPPORT = False
 else:  # Unix/Linux
-    import termios
-    import tty
     MOUSE_SUPPORT = False
 
 # Color codes for Windows CMD
@@ -41,56 +56,59 @@ class Colors:
     RESET = '\033[0m'
     BOLD = '\033[1m'
 
-class KeyboardInput:
-    """Class to handle keyboard input including arrow keys"""
-    
-    @staticmethod
-    def get_key():
-        """Get a single key press including special keys like arrows"""
-        if os.name == 'nt':  # Windows
-            while True:
-                if msvcrt.kbhit():
-                    key = msvcrt.getch()
-                    if key == b'\xe0':  # Special key prefix on Windows
-                        key = msvcrt.getch()
-                        if key == b'H':  # Up arrow
-                            return 'UP'
-                        elif key == b'P':  # Down arrow
-                            return 'DOWN'
-                        elif key == b'K':  # Left arrow
-                            return 'LEFT'
-                        elif key == b'M':  # Right arrow
-                            return 'RIGHT'
-                    elif key == b'\r':  # Enter
-                        return 'ENTER'
-                    elif key == b'\x1b':  # Escape
-                        return 'ESC'
-                    else:
-                        return key.decode('utf-8', errors='ignore')
-        else:  # Unix/Linux
-            fd = sys.stdin.fileno()
-            old_settings = termios.tcgetattr(fd)
-            try:
-                tty.setraw(sys.stdin.fileno())
-                key = sys.stdin.read(1)
-                if key == '\x1b':  # Escape sequence
-                    key += sys.stdin.read(2)
-                    if key == '\x1b[A':  # Up arrow
-                        return 'UP'
-                    elif key == '\x1b[B':  # Down arrow
-                        return 'DOWN'
-                    elif key == '\x1b[C':  # Right arrow
-                        return 'RIGHT'
-                    elif key == '\x1b[D':  # Left arrow
-                        return 'LEFT'
-                elif key == '\r' or key == '\n':  # Enter
-                    return 'ENTER'
-                elif key == '\x1b':  # Escape
-                    return 'ESC'
-                else:
-                    return key
-            finally:
-                termios.tcsetattr(fd, termios.TCSADRAIN, old_settings)
+class FrameRenderer:
+    """Differential full-screen renderer
+
+    Keeps the last frame drawn and, on each render, emits only the lines
+    that changed (positioned with cursor escapes) in a single buffered
+    write, instead of clearing and reprinting the whole screen.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self.previous: List[str] = []
+        self.valid = False
+        # Called with the seconds spent on each frame (set by --profile)
+        self.on_render = None
+
+    def invalidate(self):
+        """Forget the current frame so the next render redraws everything"""
+        self.valid = False
+
+    def clear(self):
+        """Clear the screen and park the cursor at the top-left corner"""
+        self.stream.write('\033[H\033[2J')
+        self.stream.flush()
+        self.previous = []
+        self.valid = False
+
+    def render(self, lines: List[str]):
+        """Draw a frame, rewriting only the lines that differ from the last one"""
+        started = time.perf_counter()
+        try:
+            height = os.get_terminal_size(self.stream.fileno()).lines
+        except (AttributeError, ValueError, OSError):
+            height = 0
+
+        # A frame taller than the terminal scrolls, so row positions are lost
+        fits = not height or len(lines) < height
+
+        if self.valid and fits:
+            out = []
+            for row, line in enumerate(lines, 1):
+                if row > len(self.previous) or self.previous[row - 1] != line:
+                    out.append(f'\033[{row};1H{line}\033[K')
+            # Wipe whatever was left below the frame and leave the cursor there
+            out.append(f'\033[{len(lines) + 1};1H\033[J')
+        else:
+            out = ['\033[H\033[2J', '\n'.join(lines), '\n']
+
+        self.stream.write(''.join(out))
+        self.stream.flush()
+        self.previous = list(lines)
+        self.valid = fits
+        if self.on_render is not None:
+            self.on_render(time.perf_counter() - started)
 
 class MouseSimulator:
     """Simulate mouse interactions using keyboard input"""
@@ -113,40 +131,22 @@ class MouseSimulator:
         self.click_zones.clear()
         self.current_zones.clear()
     
-    def show_clickable_areas(self):
-        """Display instructions for clickable areas"""
+    def clickable_area_lines(self) -> List[str]:
+        """Build the instructions for clickable areas as frame lines"""
+        lines = ["", f"{Colors.CYAN}💡 Use setas ↑↓, ENTER, ou tecle a letra da opção:{Colors.RESET}"]
         if self.click_zones:
-            print(f"\n{Colors.CYAN}🖱️  Áreas Clicáveis Disponíveis:{Colors.RESET}")
+            lines.append("")
+            lines.append(f"{Colors.CYAN}🖱️  Áreas Clicáveis Disponíveis:{Colors.RESET}")
             for zone_id, zone in self.click_zones.items():
-                print(f"{Colors.WHITE}   Tecle {Colors.YELLOW}'{zone_id.upper()}'{Colors.WHITE} para: {zone['text']}{Colors.RESET}")
+                lines.append(f"{Colors.WHITE}   Tecle {Colors.YELLOW}'{zone_id.upper()}'{Colors.WHITE} para: {zone['text']}{Colors.RESET}")
+        lines.append(f"{Colors.YELLOW}Aguardando entrada... {Colors.RESET}")
+        return lines
     
-    def handle_click_input(self) -> str:
-        """Handle simulated mouse clicks via keyboard"""
-        print(f"\n{Colors.CYAN}💡 Use setas ↑↓, ENTER, ou tecle a letra da opção:{Colors.RESET}")
-        self.show_clickable_areas()
-        print(f"{Colors.YELLOW}Aguardando entrada... {Colors.RESET}", end='', flush=True)
-        
-        if os.name == 'nt':
-            while True:
-                if msvcrt.kbhit():
-                    key = msvcrt.getch()
-                    if key == b'\xe0':  # Arrow keys
-                        key = msvcrt.getch()
-                        if key == b'H':
-                            return 'UP'
-                        elif key == b'P':
-                            return 'DOWN'
-                    elif key == b'\r':
-                        return 'ENTER'
-                    elif key == b'\x1b':
-                        return 'ESC'
-                    else:
-                        char = key.decode('utf-8', errors='ignore').lower()
-                        if char in self.click_zones:
-                            return f"CLICK_{char.upper()}"
-                        elif char.isdigit():
-                            return char
-        return 'ESC'
+    def handle_click_input(self, key: str) -> str:
+        """Translate a key event into a simulated click on a zone"""
+        if len(key) == 1 and key.lower() in self.click_zones:
+            return f"CLICK_{key.upper()}"
+        return key
 
 class MenuNavigator:
     """Class to handle menu navigation with arrow keys"""
@@ -177,6 +177,27 @@ class MenuNavigator:
     def get_selected_index(self):
         """Get currently selected index (1-based for menu options)"""
         return self.selected_index + 1 if self.selected_index < self.max_index else 0
+    
+    def handle_key(self, key: str) -> Optional[str]:
+        """Apply a navigation key; return the key if the caller must act on it"""
+        if key == 'UP':
+            self.move_up()
+        elif key == 'DOWN':
+            self.move_down()
+        elif key == 'HOME':
+            self.selected_index = 0
+        elif key == 'END':
+            self.selected_index = self.max_index
+        else:
+            return key
+        return None
+    
+    def actions(self, keys: Iterable[str]) -> Iterator[str]:
+        """Consume key events, yielding 'MOVE' after each selection change
+        and every other key for the caller to handle"""
+        for key in keys:
+            action = self.handle_key(key)
+            yield 'MOVE' if action is None else action
 
 class EnhancedMenuNavigator(MenuNavigator):
     """Enhanced menu navigator with mouse simulation support"""
@@ -204,27 +225,25 @@ class EnhancedMenuNavigator(MenuNavigator):
             # Add zone for exit
             self.mouse_sim.add_click_zone('x', len(self.items) + 5, len(self.items) + 5, "Sair/Voltar")
     
-    def handle_input_with_mouse(self):
-        """Handle input with mouse simulation support"""
-        if not self.enable_mouse or not self.mouse_sim:
-            return KeyboardInput.get_key()
-        
-        self.setup_click_zones()
-        action = self.mouse_sim.handle_click_input()
-        
-        if action.startswith('CLICK_'):
-            # Convert click to selection
-            zone_id = action.split('_')[1].lower()
-            if zone_id == 'x':
-                return 'EXIT_SELECTED'
-            else:
+    def handle_key(self, key: str) -> Optional[str]:
+        """Handle a key event, including simulated mouse clicks"""
+        if self.enable_mouse and self.mouse_sim:
+            if not self.mouse_sim.click_zones:
+                self.setup_click_zones()
+            action = self.mouse_sim.handle_click_input(key)
+            
+            if action.startswith('CLICK_'):
+                # Convert click to selection
+                zone_id = action.split('_')[1].lower()
+                if zone_id == 'x':
+                    return 'EXIT_SELECTED'
                 # Convert letter to number
                 index = ord(zone_id) - ord('a')
                 if 0 <= index < len(self.items):
                     self.selected_index = index
                     return 'ENTER'
         
-        return action
+        return super().handle_key(key)
 
 @dataclass
 class SystemStatus:
@@ -235,42 +254,108 @@ class SystemStatus:
     system_version: str = "1.1a"
 
 class ERPSystem:
-    def __init__(self):
+    def __init__(self, storage_mode: str = None):
         self.status = SystemStatus()
         self.current_menu = "main"
         self.running = True
         self.data_file = "erp_data.json"
         self.users_file = "users_data.json"
+        self.orders_file = "service_orders.json"
+        self.employees_file = "employees_data.json"
+        # "sqlite": users, employees and orders in the database shared with the GUI (default)
+        # "journal": JSON files; append mutations and compact in the background
+        # "json": also rewrite the full JSON file on every commit
+        self.storage_mode = storage_mode or os.environ.get("ERP_STORAGE_MODE", "sqlite")
         self.authenticated = False
         self.current_user = None
-        self.users_db = {}
+        self.storage = None
+        self.live = None
+        self.reports = None
+        self.reports_dir = None
+        self.reports_version = None
+        self.maintenance = None
+        self.data_db = None
+        self.users_db = None
+        self.orders = None
+        self.employees_db = None
+        self.employee_index = EmployeeSearchIndex()
+        self.screen = FrameRenderer()
+        # Password checks run the KDF on a login thread, throttled per user and per terminal
+        self.auth = auth.Authenticator(
+            lambda username, password: self.get_user_by_credentials(username, password)[1])
+        self.login_source = os.environ.get("SSH_CLIENT", "").split(" ")[0] or "local"
         self.load_data()
         self.load_users()
+        self.load_orders()
+        self.load_employees()
         
+    def open_store(self, path, default):
+        """Open a journaled JSON store, setting aside files that cannot be read"""
+        sync_snapshots = self.storage_mode == "json"
+        try:
+            return JournaledStore(path, default, sync_snapshots=sync_snapshots)
+        except ValueError as e:
+            print(f"{Colors.RED}Erro ao carregar {path}: {e}{Colors.RESET}")
+            print(f"{Colors.YELLOW}Arquivos ilegíveis renomeados para *.corrupt{Colors.RESET}")
+            JournaledStore.quarantine(path)
+            return JournaledStore(path, default, sync_snapshots=sync_snapshots)
+
     def load_data(self):
         """Load system data from JSON file"""
-        if os.path.exists(self.data_file):
-            try:
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.status.pending_orders = data.get('pending_orders', 6)
-                    self.status.open_orders = data.get('open_orders', 4)
-                    self.status.approved_budgets = data.get('approved_budgets', 1)
-            except:
-                pass
+        if self.storage_mode == "sqlite":
+            self.storage = storage.Storage()
+            # Counters are pushed on every commit, from this or any other session
+            self.live = live_stats.CounterFeed(self.storage.db.db_path, self.storage.db)
+            self.on_counters(self.live.subscribe(self.on_counters))
+            return
+
+        default_data = {
+            'pending_orders': self.status.pending_orders,
+            'open_orders': self.status.open_orders,
+            'approved_budgets': self.status.approved_budgets
+        }
+        self.data_db = self.open_store(self.data_file, default_data)
+        self.status.pending_orders = self.data_db.get('pending_orders', 6)
+        self.status.open_orders = self.data_db.get('open_orders', 4)
+        self.status.approved_budgets = self.data_db.get('approved_budgets', 1)
     
+    def on_counters(self, changes):
+        """Apply counter changes pushed by the database (called on the feed thread)"""
+        if "service_orders_open" in changes:
+            self.status.pending_orders = changes["service_orders_open"]
+        if "service_orders_new" in changes:
+            self.status.open_orders = changes["service_orders_new"]
+        if "budgets_approved" in changes:
+            self.status.approved_budgets = changes["budgets_approved"]
+
     def save_data(self):
         """Save system data to JSON file"""
+        if self.storage is not None:
+            return  # counters are maintained by the database itself
         data = {
             'pending_orders': self.status.pending_orders,
             'open_orders': self.status.open_orders,
             'approved_budgets': self.status.approved_budgets
         }
         try:
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2)
-        except:
-            pass
+            with self.data_db.batch():
+                for key, value in data.items():
+                    if self.data_db.get(key) != value:
+                        self.data_db.put(key, value)
+        except OSError as e:
+            print(f"{Colors.RED}Erro ao salvar dados do sistema: {e}{Colors.RESET}")
+
+    def adjust_pending_orders(self, delta):
+        """Add ``delta`` to the pending orders counter without losing other sessions' changes"""
+        if self.storage is not None:
+            return  # kept current by on_counters
+        try:
+            values = self.data_db.modify(
+                lambda data: {'pending_orders': max(0, data.get('pending_orders', 0) + delta)})
+        except OSError as e:
+            print(f"{Colors.RED}Erro ao salvar dados do sistema: {e}{Colors.RESET}")
+            return
+        self.status.pending_orders = values['pending_orders']
 
     def load_users(self):
         """Load users database from JSON file"""
@@ -285,31 +370,118 @@ class ERPSystem:
             }
         }
         
-        if os.path.exists(self.users_file):
-            try:
-                with open(self.users_file, 'r', encoding='utf-8') as f:
-                    self.users_db = json.load(f)
-            except:
-                self.users_db = default_users
-        else:
-            self.users_db = default_users
-            self.save_users()
+        if self.storage is not None:
+            self.users_db = self.storage.users
+            return
+        self.users_db = self.open_store(self.users_file, default_users)
     
+    def load_orders(self):
+        """Load the service order repository and build its indexes"""
+        if self.storage is not None:
+            self.orders = self.storage.service_orders
+            return
+        self.orders = ServiceOrderRepository(self.open_store(self.orders_file, {}))
+
+    def load_employees(self):
+        """Load employees and build the search index over them"""
+        if self.storage is not None:
+            self.employees_db = self.storage.employees
+        else:
+            self.employees_db = self.open_store(self.employees_file, {})
+        for code, employee in self.employees_db.items():
+            self.employee_index.add(code, employee)
+
+    def next_employee_code(self):
+        """Next sequential employee code, zero-padded like '001'"""
+        if self.storage is not None:
+            return self.storage.employees.next_code()
+        numbers = [int(code) for code in self.employees_db if code.isdigit()]
+        return f"{max(numbers, default=0) + 1:03d}"
+
     def save_users(self):
         """Save users database to JSON file"""
+        if self.storage is not None:
+            return
+        try:
+            self.users_db.compact()
+        except OSError as e:
+            print(f"Erro ao salvar usuários: {e}")
+
+    def refresh_users(self):
+        """Pick up user changes made by other CLI sessions"""
+        if self.storage is not None:
+            return
+        try:
+            self.users_db.refresh()
+        except OSError as e:
+            print(f"{Colors.RED}Erro ao ler usuários: {e}{Colors.RESET}")
+
+    def refresh_orders(self):
+        """Pick up service orders created or changed by other CLI sessions"""
+        if self.storage is not None:
+            return
+        try:
+            self.orders.refresh()
+        except OSError as e:
+            print(f"{Colors.RED}Erro ao ler ordens de serviço: {e}{Colors.RESET}")
+
+    def save_user(self, username, **fields):
+        """Journal changes to a single user, creating it if needed"""
         try:
-            with open(self.users_file, 'w', encoding='utf-8') as f:
-                json.dump(self.users_db, f, indent=2, ensure_ascii=False)
-        except Exception as e:
+            if self.storage is None:
+                if "password" in fields:
+                    # Only the salted hash is stored; clears plaintext left by older versions
+                    fields["password_hash"] = auth.hash_password(fields["password"])
+                    fields["password"] = None
+                self.users_db.update(username, fields)
+            elif username in self.users_db:
+                self.users_db.update(username, **fields)
+            else:
+                self.users_db.create(username, **fields)
+        except OSError as e:
             print(f"Erro ao salvar usuários: {e}")
 
+    def close(self):
+        """Flush pending writes and wait for background compaction"""
+        self.auth.shutdown()
+        self.close_reports()
+        if self.storage is not None:
+            self.live.close()
+            self.storage.close()
+            return
+        stores = [self.data_db, self.users_db, self.employees_db, self.orders.store if self.orders else None]
+        for store in stores:
+            if store is not None:
+                store.close()
+
     def get_user_by_credentials(self, username, password):
         """Check if user credentials are valid"""
-        if username in self.users_db:
+        if self.storage is not None:
+            user = self.storage.users.verify(username, password)
+            return (username, user) if user else (None, None)
+        # Users created or changed by other sessions since we loaded the file
+        self.refresh_users()
+        user = self.users_db.get(username)
+        if user is None or not user.get("active", True):
+            auth.reject_unknown(password)
+            return None, None
+        
+        stored = user.get("password_hash")
+        if stored is not None:
+            valid = auth.verify_password(password, stored)
+        else:
+            # Plaintext from older versions, replaced by a hash below
+            plain = user.get("password")
+            if not isinstance(plain, str):
+                auth.reject_unknown(password)
+                return None, None
+            valid = hmac.compare_digest(plain.encode(), password.encode())
+        if not valid:
+            return None, None
+        if auth.needs_rehash(stored):
+            self.save_user(username, password=password)
             user = self.users_db[username]
-            if user.get("active", True) and user.get("password") == password:
-                return username, user
-        return None, None
+        return username, user
 
     def show_login_screen(self):
         """Display login screen with password input"""
@@ -367,21 +539,26 @@ class ERPSystem:
                 print(f"\n{Colors.RED}Acesso cancelado pelo usuário.{Colors.RESET}")
                 return False
             
-            # Check credentials
-            user_id, user_data = self.get_user_by_credentials(username, password)
+            # Check credentials on a login thread (the KDF is deliberately slow)
+            print(f"{Colors.WHITE}⏳ Verificando...{Colors.RESET}")
+            result = self.auth.submit(username, password, self.login_source).result()
+            user_id, user_data = (username, result.user) if result.ok else (None, None)
             
-            if user_id:
+            if result.retry_after:
+                attempts += 1
+                print(f"\n{Colors.RED}✗ Muitas tentativas de login! Aguarde {int(result.retry_after) + 1}s "
+                      f"e tente novamente.{Colors.RESET}")
+                print(f"{Colors.YELLOW}Pressione Enter para continuar...{Colors.RESET}")
+                input()
+            elif user_id:
                 self.authenticated = True
                 self.current_user = user_id
                 self.status.current_user = user_data.get("role", "Usuário")
                 
                 # Update last login
-                self.users_db[user_id]["last_login"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                self.save_users()
+                self.save_user(user_id, last_login=datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
                 
                 print(f"\n{Colors.GREEN}✓ Acesso autorizado! Bem-vindo, {user_data.get('role', 'Usuário')}.{Colors.RESET}")
-                print(f"{Colors.WHITE}Carregando sistema...{Colors.RESET}")
-                time.sleep(1.5)
                 return True
             else:
                 attempts += 1
@@ -398,17 +575,11 @@ class ERPSystem:
 
     def change_password(self):
         """Allow user to change the system password"""
-        self.clear_screen()
-        print(f"{Colors.CYAN}╔{self.draw_border(50, '═')}╗{Colors.RESET}")
-        print(f"{Colors.CYAN}║{Colors.WHITE}{self.center_text('ALTERAÇÃO DE SENHA', 50)}{Colors.CYAN}║{Colors.RESET}")
-        print(f"{Colors.CYAN}╚{self.draw_border(50, '═')}╝{Colors.RESET}")
-        print()
-        
-        current_password = self.users_db[self.current_user]["password"]
+        self.screen.render(self.draw_title_box('ALTERAÇÃO DE SENHA'))
         
         # Verify current password
         input_password = getpass.getpass(f"{Colors.WHITE}Senha atual: {Colors.RESET}")
-        if input_password != current_password:
+        if self.get_user_by_credentials(self.current_user, input_password)[0] is None:
             print(f"{Colors.RED}✗ Senha atual incorreta!{Colors.RESET}")
             input(f"{Colors.YELLOW}Pressione Enter para continuar...{Colors.RESET}")
             return
@@ -428,38 +599,34 @@ class ERPSystem:
             return
         
         # Save new password
-        self.users_db[self.current_user]["password"] = new_password
-        self.save_users()
+        self.save_user(self.current_user, password=new_password)
         
         print(f"\n{Colors.GREEN}✓ Senha alterada com sucesso!{Colors.RESET}")
         input(f"{Colors.YELLOW}Pressione Enter para continuar...{Colors.RESET}")
 
     def view_registered_users(self):
         """Display all registered users and their information"""
-        self.clear_screen()
-        print(f"{Colors.CYAN}╔{self.draw_border(70, '═')}╗{Colors.RESET}")
-        print(f"{Colors.CYAN}║{Colors.WHITE}{self.center_text('USUÁRIOS CADASTRADOS', 70)}{Colors.CYAN}║{Colors.RESET}")
-        print(f"{Colors.CYAN}╚{self.draw_border(70, '═')}╝{Colors.RESET}")
-        print()
+        frame = self.draw_title_box('USUÁRIOS CADASTRADOS', 70)
         
         if not self.users_db:
-            print(f"{Colors.YELLOW}Nenhum usuário cadastrado no sistema.{Colors.RESET}")
+            frame.append(f"{Colors.YELLOW}Nenhum usuário cadastrado no sistema.{Colors.RESET}")
         else:
-            print(f"{Colors.WHITE}{'Usuário':<15} {'Função':<15} {'Status':<10} {'Último Acesso':<20}{Colors.RESET}")
-            print(f"{Colors.BLUE}{'-'*70}{Colors.RESET}")
+            frame.append(f"{Colors.WHITE}{'Usuário':<15} {'Função':<15} {'Status':<10} {'Último Acesso':<20}{Colors.RESET}")
+            frame.append(f"{Colors.BLUE}{'-'*70}{Colors.RESET}")
             
             for username, user_data in self.users_db.items():
                 status = "Ativo" if user_data.get("active", True) else "Inativo"
-                last_login = user_data.get("last_login", "Nunca")
+                last_login = user_data.get("last_login") or "Nunca"
                 role = user_data.get("role", "Usuário")
                 
                 # Highlight current user
                 if username == self.current_user:
-                    print(f"{Colors.GREEN}{username:<15} {role:<15} {status:<10} {last_login:<20} (ATUAL){Colors.RESET}")
+                    frame.append(f"{Colors.GREEN}{username:<15} {role:<15} {status:<10} {last_login:<20} (ATUAL){Colors.RESET}")
                 else:
-                    print(f"{Colors.WHITE}{username:<15} {role:<15} {status:<10} {last_login:<20}{Colors.RESET}")
+                    frame.append(f"{Colors.WHITE}{username:<15} {role:<15} {status:<10} {last_login:<20}{Colors.RESET}")
         
-        print()
+        frame.append("")
+        self.screen.render(frame)
         choice = input(f"{Colors.YELLOW}Deseja ver detalhes de um usuário específico? (s/N): {Colors.RESET}").lower()
         
         if choice in ['s', 'sim', 'y', 'yes']:
@@ -472,22 +639,20 @@ class ERPSystem:
 
     def show_user_details(self, username):
         """Show detailed information about a specific user"""
-        self.clear_screen()
-        print(f"{Colors.CYAN}╔{self.draw_border(60, '═')}╗{Colors.RESET}")
-        print(f"{Colors.CYAN}║{Colors.WHITE}{self.center_text(f'DETALHES DO USUÁRIO: {username.upper()}', 60)}{Colors.CYAN}║{Colors.RESET}")
-        print(f"{Colors.CYAN}╚{self.draw_border(60, '═')}╝{Colors.RESET}")
-        print()
-        
         user_data = self.users_db[username]
         
-        print(f"{Colors.WHITE}Nome de usuário: {Colors.CYAN}{username}{Colors.RESET}")
-        print(f"{Colors.WHITE}Função: {Colors.CYAN}{user_data.get('role', 'Usuário')}{Colors.RESET}")
-        print(f"{Colors.WHITE}Data de criação: {Colors.CYAN}{user_data.get('created_date', 'Não informado')}{Colors.RESET}")
-        print(f"{Colors.WHITE}Último acesso: {Colors.CYAN}{user_data.get('last_login', 'Nunca')}{Colors.RESET}")
-        print(f"{Colors.WHITE}Status: {Colors.GREEN if user_data.get('active', True) else Colors.RED}{'Ativo' if user_data.get('active', True) else 'Inativo'}{Colors.RESET}")
+        self.screen.render(self.draw_title_box(f'DETALHES DO USUÁRIO: {username.upper()}', 60) + [
+            f"{Colors.WHITE}Nome de usuário: {Colors.CYAN}{username}{Colors.RESET}",
+            f"{Colors.WHITE}Função: {Colors.CYAN}{user_data.get('role', 'Usuário')}{Colors.RESET}",
+            f"{Colors.WHITE}Data de criação: {Colors.CYAN}{user_data.get('created_date', 'Não informado')}{Colors.RESET}",
+            f"{Colors.WHITE}Último acesso: {Colors.CYAN}{user_data.get('last_login') or 'Nunca'}{Colors.RESET}",
+            f"{Colors.WHITE}Status: {Colors.GREEN if user_data.get('active', True) else Colors.RED}{'Ativo' if user_data.get('active', True) else 'Inativo'}{Colors.RESET}",
+        ])
         
         # Show password only for admin user viewing their own account
-        if username == self.current_user and self.users_db[self.current_user].get("role") == "Administrador":
+        # (only accounts not yet migrated to a password hash still have it)
+        if (username == self.current_user and user_data.get("role") == "Administrador"
+                and user_data.get("password")):
             show_password = input(f"\n{Colors.YELLOW}Mostrar senha? (s/N): {Colors.RESET}").lower()
             if show_password in ['s', 'sim', 'y', 'yes']:
                 print(f"{Colors.WHITE}Senha atual: {Colors.RED}{user_data.get('password', 'N/A')}{Colors.RESET}")
@@ -498,11 +663,7 @@ class ERPSystem:
 
     def create_new_user(self):
         """Create a new user account"""
-        self.clear_screen()
-        print(f"{Colors.CYAN}╔{self.draw_border(50, '═')}╗{Colors.RESET}")
-        print(f"{Colors.CYAN}║{Colors.WHITE}{self.center_text('CRIAR NOVO USUÁRIO', 50)}{Colors.CYAN}║{Colors.RESET}")
-        print(f"{Colors.CYAN}╚{self.draw_border(50, '═')}╝{Colors.RESET}")
-        print()
+        self.screen.render(self.draw_title_box('CRIAR NOVO USUÁRIO'))
         
         # Get username
         while True:
@@ -539,15 +700,14 @@ class ERPSystem:
             break
         
         # Create user
-        self.users_db[username] = {
-            "password": password,
-            "role": role,
-            "created_date": datetime.datetime.now().strftime("%Y-%m-%d"),
-            "last_login": None,
-            "active": True
-        }
-        
-        self.save_users()
+        self.save_user(
+            username,
+            password=password,
+            role=role,
+            created_date=datetime.datetime.now().strftime("%Y-%m-%d"),
+            last_login=None,
+            active=True
+        )
         
         print(f"\n{Colors.GREEN}✓ Usuário '{username}' criado com sucesso!{Colors.RESET}")
         print(f"{Colors.WHITE}Função: {role}{Colors.RESET}")
@@ -563,6 +723,7 @@ class ERPSystem:
         ]
         
         choice = self.show_submenu_with_navigation("GERENCIAMENTO DE USUÁRIOS", options)
+        self.refresh_users()
         
         if choice == "1":
             self.view_registered_users()
@@ -578,11 +739,7 @@ class ERPSystem:
 
     def toggle_user_status(self):
         """Toggle user active/inactive status"""
-        self.clear_screen()
-        print(f"{Colors.CYAN}╔{self.draw_border(50, '═')}╗{Colors.RESET}")
-        print(f"{Colors.CYAN}║{Colors.WHITE}{self.center_text('ALTERAR STATUS', 50)}{Colors.CYAN}║{Colors.RESET}")
-        print(f"{Colors.CYAN}╚{self.draw_border(50, '═')}╝{Colors.RESET}")
-        print()
+        self.screen.render(self.draw_title_box('ALTERAR STATUS'))
         
         username = input(f"{Colors.WHITE}Nome do usuário: {Colors.RESET}").strip().lower()
         
@@ -593,8 +750,7 @@ class ERPSystem:
         else:
             current_status = self.users_db[username].get("active", True)
             new_status = not current_status
-            self.users_db[username]["active"] = new_status
-            self.save_users()
+            self.save_user(username, active=new_status)
             
             status_text = "ativado" if new_status else "desativado"
             print(f"{Colors.GREEN}✓ Usuário '{username}' foi {status_text}!{Colors.RESET}")
@@ -603,11 +759,7 @@ class ERPSystem:
 
     def reset_user_password(self):
         """Reset password for a user"""
-        self.clear_screen()
-        print(f"{Colors.CYAN}╔{self.draw_border(50, '═')}╗{Colors.RESET}")
-        print(f"{Colors.CYAN}║{Colors.WHITE}{self.center_text('RESETAR SENHA', 50)}{Colors.CYAN}║{Colors.RESET}")
-        print(f"{Colors.CYAN}╚{self.draw_border(50, '═')}╝{Colors.RESET}")
-        print()
+        self.screen.render(self.draw_title_box('RESETAR SENHA'))
         
         username = input(f"{Colors.WHITE}Nome do usuário: {Colors.RESET}").strip().lower()
         
@@ -618,31 +770,27 @@ class ERPSystem:
             if len(new_password) < 6:
                 print(f"{Colors.RED}A senha deve ter pelo menos 6 caracteres!{Colors.RESET}")
             else:
-                self.users_db[username]["password"] = new_password
-                self.save_users()
+                self.save_user(username, password=new_password)
                 print(f"{Colors.GREEN}✓ Senha do usuário '{username}' foi resetada!{Colors.RESET}")
         
         input(f"{Colors.YELLOW}Pressione Enter para continuar...{Colors.RESET}")
 
     def show_system_info(self):
         """Display system information"""
-        self.clear_screen()
-        print(f"{Colors.CYAN}╔{self.draw_border(60, '═')}╗{Colors.RESET}")
-        print(f"{Colors.CYAN}║{Colors.WHITE}{self.center_text('INFORMAÇÕES DO SISTEMA', 60)}{Colors.CYAN}║{Colors.RESET}")
-        print(f"{Colors.CYAN}╚{self.draw_border(60, '═')}╝{Colors.RESET}")
-        print()
-        print(f"{Colors.WHITE}Sistema: ERP Empresarial")
-        print(f"Versão: {self.status.system_version}")
-        print(f"Usuário atual: {self.current_user}")
-        print(f"Função: {self.status.current_user}")
-        print(f"Data de acesso: {datetime.datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
-        print(f"Total de usuários: {len(self.users_db)}")
-        print()
-        print(f"{Colors.YELLOW}Estatísticas:")
-        print(f"{Colors.WHITE}• OS Pendentes: {self.status.pending_orders}")
-        print(f"• OM em Aberto: {self.status.open_orders}")
-        print(f"• Orçamentos Aprovados: {self.status.approved_budgets}{Colors.RESET}")
-        print()
+        self.screen.render(self.draw_title_box('INFORMAÇÕES DO SISTEMA', 60) + [
+            f"{Colors.WHITE}Sistema: ERP Empresarial",
+            f"Versão: {self.status.system_version}",
+            f"Usuário atual: {self.current_user}",
+            f"Função: {self.status.current_user}",
+            f"Data de acesso: {datetime.datetime.now().strftime('%d/%m/%Y %H:%M:%S')}",
+            f"Total de usuários: {len(self.users_db)}",
+            "",
+            f"{Colors.YELLOW}Estatísticas:",
+            f"{Colors.WHITE}• OS Pendentes: {self.status.pending_orders}",
+            f"• OM em Aberto: {self.status.open_orders}",
+            f"• Orçamentos Aprovados: {self.status.approved_budgets}{Colors.RESET}",
+            "",
+        ])
         input(f"{Colors.YELLOW}Pressione Enter para continuar...{Colors.RESET}")
 
     def admin_menu(self):
@@ -675,7 +823,7 @@ class ERPSystem:
 
     def clear_screen(self):
         """Clear the terminal screen"""
-        os.system('cls' if os.name == 'nt' else 'clear')
+        self.screen.clear()
 
     def draw_border(self, width=80, char='═'):
         """Draw a horizontal border"""
@@ -685,6 +833,15 @@ class ERPSystem:
         """Center text within given width"""
         return text.center(width)
 
+    def draw_title_box(self, title, width=50):
+        """Build the boxed screen title used by the secondary screens"""
+        return [
+            f"{Colors.CYAN}╔{self.draw_border(width, '═')}╗{Colors.RESET}",
+            f"{Colors.CYAN}║{Colors.WHITE}{self.center_text(title, width)}{Colors.CYAN}║{Colors.RESET}",
+            f"{Colors.CYAN}╚{self.draw_border(width, '═')}╝{Colors.RESET}",
+            "",
+        ]
+
     def draw_header(self):
         """Draw the main header with menu options"""
         header = f"""
@@ -694,7 +851,7 @@ class ERPSystem:
 {Colors.BLUE}║ {Colors.CYAN}Cadastro    {Colors.WHITE}Principal    {Colors.CYAN}Consulta    {Colors.WHITE}Processos    {Colors.CYAN}Utilitários{Colors.BLUE}     ║{Colors.RESET}
 {Colors.BLUE}╚{self.draw_border(78, '═')}╝{Colors.RESET}
 """
-        print(header)
+        return header
 
     def draw_status_panel(self):
         """Draw the status panel showing pending items"""
@@ -763,10 +920,9 @@ class ERPSystem:
 """
         return footer
 
-    def display_main_screen(self, selected_index=None):
+    def display_main_screen(self, selected_index=None, extra_lines=None):
         """Display the main ERP screen with optional menu highlighting"""
-        self.clear_screen()
-        self.draw_header()
+        frame = [""] + self.draw_header().strip('\n').split('\n') + [""]
         
         # Display side by side: status panel and menu panel
         status_lines = self.draw_status_panel().strip().split('\n')
@@ -779,17 +935,20 @@ class ERPSystem:
         while len(menu_lines) < max_lines:
             menu_lines.append(' ' * 40)
         
-        print()
+        frame.append("")
         for status_line, menu_line in zip(status_lines, menu_lines):
-            print(f"{status_line}  {menu_line}")
+            frame.append(f"{status_line}  {menu_line}")
         
-        print(self.draw_footer())
+        frame += [""] + self.draw_footer().strip('\n').split('\n') + [""]
         
         # Show navigation instructions
+        frame.append("")
         if selected_index is not None:
-            print(f"\n{Colors.CYAN}💡 Use ↑↓ para navegar, ENTER para selecionar, ESC para digitar número{Colors.RESET}")
+            frame.append(f"{Colors.CYAN}💡 Use ↑↓ para navegar, ENTER para selecionar, ESC para digitar número{Colors.RESET}")
         else:
-            print(f"\n{Colors.CYAN}💡 Digite o número da opção ou use ↑↓ + ENTER para navegar{Colors.RESET}")
+            frame.append(f"{Colors.CYAN}💡 Digite o número da opção ou use ↑↓ + ENTER para navegar{Colors.RESET}")
+        
+        self.screen.render(frame + (extra_lines or []))
 
     def get_menu_choice(self):
         """Get menu choice with arrow key navigation and mouse simulation support"""
@@ -803,158 +962,102 @@ class ERPSystem:
         all_items = menu_items + ["Sair do Sistema"]
         navigator = EnhancedMenuNavigator(all_items, enable_mouse=MOUSE_SUPPORT)
         
-        # Start with enhanced navigation mode
-        navigation_mode = True
-        
-        while True:
-            if navigation_mode:
-                self.display_main_screen(navigator.get_selected_index())
-                
-                if navigator.enable_mouse:
-                    print(f"\n{Colors.CYAN}🖱️  Navegação Avançada Ativada!{Colors.RESET}")
-                    print(f"{Colors.WHITE}• Use ↑↓ para navegar")
-                    print(f"• Pressione ENTER para selecionar")
-                    print(f"• Tecle A-M para acesso rápido às opções")
-                    print(f"• Tecle X para sair")
-                    print(f"• ESC para modo digitação{Colors.RESET}")
-                
-                # Get enhanced input
-                try:
-                    if navigator.enable_mouse:
-                        action = navigator.handle_input_with_mouse()
-                    else:
-                        # Fallback to regular keyboard navigation
-                        if os.name == 'nt':
-                            while True:
-                                if msvcrt.kbhit():
-                                    key = msvcrt.getch()
-                                    if key == b'\xe0':
-                                        key = msvcrt.getch()
-                                        if key == b'H':
-                                            action = 'UP'
-                                            break
-                                        elif key == b'P':
-                                            action = 'DOWN'
-                                            break
-                                    elif key == b'\r':
-                                        action = 'ENTER'
-                                        break
-                                    elif key == b'\x1b':
-                                        action = 'ESC'
-                                        break
-                                    elif key.isdigit():
-                                        navigation_mode = False
-                                        self.display_main_screen()
-                                        return key.decode('utf-8')
-                        else:
-                            action = KeyboardInput.get_key()
-                    
-                    if action == 'UP':
-                        navigator.move_up()
-                    elif action == 'DOWN':
-                        navigator.move_down()
-                    elif action == 'ENTER':
-                        return str(navigator.get_selected_index())
-                    elif action == 'EXIT_SELECTED':
-                        return "0"
-                    elif action == 'ESC':
-                        navigation_mode = False
-                    elif action.isdigit():
-                        navigation_mode = False
-                        self.display_main_screen()
-                        return action
-                        
-                except KeyboardInterrupt:
-                    return "0"
-            else:
-                # Traditional number input mode
-                self.display_main_screen()
-                try:
-                    choice = input(f"\n{Colors.YELLOW}Digite o número da opção desejada: {Colors.RESET}")
-                    return choice
-                except KeyboardInterrupt:
-                    return "0"
+        extra_lines = []
+        if navigator.enable_mouse:
+            navigator.setup_click_zones()
+            extra_lines = [
+                "",
+                f"{Colors.CYAN}🖱️  Navegação Avançada Ativada!{Colors.RESET}",
+                f"{Colors.WHITE}• Use ↑↓ para navegar",
+                "• Pressione ENTER para selecionar",
+                "• Tecle A-M para acesso rápido às opções",
+                "• Tecle X para sair",
+                f"• ESC para modo digitação{Colors.RESET}",
+            ] + navigator.mouse_sim.clickable_area_lines()
+        
+        # Enhanced navigation mode: one keyboard session until a choice is made
+        if KeyboardInput.available():
+            try:
+                with KeyboardInput() as keyboard:
+                    self.display_main_screen(navigator.get_selected_index(), extra_lines)
+                    for action in navigator.actions(keyboard.events()):
+                        if action == 'MOVE':
+                            self.display_main_screen(navigator.get_selected_index(), extra_lines)
+                        elif action == 'ENTER':
+                            return str(navigator.get_selected_index())
+                        elif action == 'EXIT_SELECTED':
+                            return "0"
+                        elif action == 'ESC':
+                            break
+                        elif action.isdigit():
+                            self.display_main_screen()
+                            return action
+            except (KeyboardInterrupt, EOFError):
+                return "0"
+        
+        # Traditional number input mode
+        self.display_main_screen()
+        try:
+            choice = input(f"\n{Colors.YELLOW}Digite o número da opção desejada: {Colors.RESET}")
+            return choice
+        except KeyboardInterrupt:
+            return "0"
 
     def show_submenu_with_navigation(self, title: str, options: List[str]) -> str:
         """Display a submenu with arrow key navigation and mouse simulation"""
         navigator = EnhancedMenuNavigator(options + ["Voltar ao Menu Principal"], enable_mouse=MOUSE_SUPPORT)
-        navigation_mode = True
+        navigation_mode = KeyboardInput.available()
         
-        while True:
-            self.clear_screen()
+        def build_frame():
             width = max(60, len(title) + 10)
-            
-            print(f"{Colors.CYAN}╔{self.draw_border(width, '═')}╗{Colors.RESET}")
-            print(f"{Colors.CYAN}║{Colors.WHITE}{self.center_text(title, width)}{Colors.CYAN}║{Colors.RESET}")
-            print(f"{Colors.CYAN}╚{self.draw_border(width, '═')}╝{Colors.RESET}")
-            print()
+            frame = self.draw_title_box(title, width)
             
             # Display options with highlighting
             for i, option in enumerate(options, 1):
                 letter = chr(ord('a') + i - 1) if i <= 26 else str(i)
                 if navigation_mode and i == navigator.get_selected_index():
-                    print(f"{Colors.BLACK}\033[47m{i}. {option} ({letter.upper()}){Colors.RESET}")
+                    frame.append(f"{Colors.BLACK}\033[47m{i}. {option} ({letter.upper()}){Colors.RESET}")
                 else:
-                    print(f"{Colors.WHITE}{i}. {option} {Colors.CYAN}({letter.upper()}){Colors.RESET}")
+                    frame.append(f"{Colors.WHITE}{i}. {option} {Colors.CYAN}({letter.upper()}){Colors.RESET}")
             
             # Show exit option
             if navigation_mode and navigator.get_selected_index() == 0:
-                print(f"{Colors.BLACK}\033[47m0. Voltar ao Menu Principal (X){Colors.RESET}")
+                frame.append(f"{Colors.BLACK}\033[47m0. Voltar ao Menu Principal (X){Colors.RESET}")
             else:
-                print(f"{Colors.WHITE}0. Voltar ao Menu Principal {Colors.CYAN}(X){Colors.RESET}")
+                frame.append(f"{Colors.WHITE}0. Voltar ao Menu Principal {Colors.CYAN}(X){Colors.RESET}")
             
             if navigation_mode:
+                frame.append("")
                 if navigator.enable_mouse:
-                    print(f"\n{Colors.CYAN}�️  Navegação: ↑↓ setas, ENTER, ou tecle a letra da opção{Colors.RESET}")
+                    navigator.setup_click_zones()
+                    frame.append(f"{Colors.CYAN}🖱️  Navegação: ↑↓ setas, ENTER, ou tecle a letra da opção{Colors.RESET}")
+                    frame += navigator.mouse_sim.clickable_area_lines()
                 else:
-                    print(f"\n{Colors.CYAN}�💡 Use ↑↓ para navegar, ENTER para selecionar, ESC para digitar{Colors.RESET}")
-                
-                try:
-                    if navigator.enable_mouse:
-                        action = navigator.handle_input_with_mouse()
-                    else:
-                        # Fallback to regular navigation
-                        if os.name == 'nt':
-                            while True:
-                                if msvcrt.kbhit():
-                                    key = msvcrt.getch()
-                                    if key == b'\xe0':
-                                        key = msvcrt.getch()
-                                        if key == b'H':
-                                            action = 'UP'
-                                            break
-                                        elif key == b'P':
-                                            action = 'DOWN'
-                                            break
-                                    elif key == b'\r':
-                                        action = 'ENTER'
-                                        break
-                                    elif key == b'\x1b':
-                                        action = 'ESC'
-                                        break
-                                    elif key.isdigit():
-                                        return key.decode('utf-8')
-                        else:
-                            action = 'ESC'  # Simplified for non-Windows
-                    
-                    if action == 'UP':
-                        navigator.move_up()
-                    elif action == 'DOWN':
-                        navigator.move_down()
-                    elif action == 'ENTER':
-                        return str(navigator.get_selected_index())
-                    elif action == 'EXIT_SELECTED':
-                        return "0"
-                    elif action == 'ESC':
-                        navigation_mode = False
-                    elif action.isdigit():
-                        return action
-                        
-                except KeyboardInterrupt:
-                    return "0"
-            else:
-                choice = input(f"\n{Colors.YELLOW}Escolha uma opção: {Colors.RESET}")
-                return choice
+                    frame.append(f"{Colors.CYAN}💡 Use ↑↓ para navegar, ENTER para selecionar, ESC para digitar{Colors.RESET}")
+            return frame
+        
+        if navigation_mode:
+            try:
+                with KeyboardInput() as keyboard:
+                    self.screen.render(build_frame())
+                    for action in navigator.actions(keyboard.events()):
+                        if action == 'MOVE':
+                            self.screen.render(build_frame())
+                        elif action == 'ENTER':
+                            return str(navigator.get_selected_index())
+                        elif action == 'EXIT_SELECTED':
+                            return "0"
+                        elif action == 'ESC':
+                            break
+                        elif action.isdigit():
+                            return action
+            except (KeyboardInterrupt, EOFError):
+                return "0"
+            navigation_mode = False
+        
+        self.screen.render(build_frame())
+        choice = input(f"\n{Colors.YELLOW}Escolha uma opção: {Colors.RESET}")
+        return choice
 
     def handle_funcionarios(self):
         """Handle employee management"""
@@ -975,24 +1078,38 @@ class ERPSystem:
             print(f"{Colors.GREEN}Função de alteração em desenvolvimento...{Colors.RESET}")
             input("Pressione Enter para continuar...")
         elif choice == "4":
-            print(f"{Colors.GREEN}Relatórios em desenvolvimento...{Colors.RESET}")
-            input("Pressione Enter para continuar...")
+            self.show_report("tecnicos")
 
     def cadastrar_funcionario(self):
         """Register new employee"""
-        self.clear_screen()
-        print(f"{Colors.CYAN}╔{self.draw_border(50, '═')}╗{Colors.RESET}")
-        print(f"{Colors.CYAN}║{Colors.WHITE}{self.center_text('CADASTRO DE FUNCIONÁRIO', 50)}{Colors.CYAN}║{Colors.RESET}")
-        print(f"{Colors.CYAN}╚{self.draw_border(50, '═')}╝{Colors.RESET}")
-        print()
+        self.screen.render(self.draw_title_box('CADASTRO DE FUNCIONÁRIO'))
         
         nome = input(f"{Colors.WHITE}Nome: {Colors.RESET}")
         cargo = input(f"{Colors.WHITE}Cargo: {Colors.RESET}")
         departamento = input(f"{Colors.WHITE}Departamento: {Colors.RESET}")
         salario = input(f"{Colors.WHITE}Salário: {Colors.RESET}")
         
+        codigo = self.next_employee_code()
+        funcionario = {
+            "id": codigo,
+            "name": nome,
+            "position": cargo,
+            "department": departamento,
+            "salary": salario,
+            "status": "Ativo",
+            "hire_date": datetime.date.today().isoformat()
+        }
+        try:
+            self.employees_db.put(codigo, funcionario)
+        except (OSError, ValueError) as e:
+            print(f"\n{Colors.RED}Erro ao gravar funcionário: {e}{Colors.RESET}")
+            input(f"{Colors.YELLOW}Pressione Enter para continuar...{Colors.RESET}")
+            return
+        self.employee_index.add(codigo, funcionario)
+        
         print(f"\n{Colors.GREEN}Funcionário cadastrado com sucesso!{Colors.RESET}")
-        print(f"{Colors.WHITE}Nome: {nome}")
+        print(f"{Colors.WHITE}Código: {codigo}")
+        print(f"Nome: {nome}")
         print(f"Cargo: {cargo}")
         print(f"Departamento: {departamento}")
         print(f"Salário: {salario}{Colors.RESET}")
@@ -1001,20 +1118,32 @@ class ERPSystem:
 
     def consultar_funcionario(self):
         """Query employee information"""
-        self.clear_screen()
-        print(f"{Colors.CYAN}╔{self.draw_border(50, '═')}╗{Colors.RESET}")
-        print(f"{Colors.CYAN}║{Colors.WHITE}{self.center_text('CONSULTA DE FUNCIONÁRIO', 50)}{Colors.CYAN}║{Colors.RESET}")
-        print(f"{Colors.CYAN}╚{self.draw_border(50, '═')}╝{Colors.RESET}")
-        print()
+        self.screen.render(self.draw_title_box('CONSULTA DE FUNCIONÁRIO'))
         
         criterio = input(f"{Colors.WHITE}Digite o nome ou código do funcionário: {Colors.RESET}")
         
+        inicio = time.perf_counter()
+        resultados = self.employee_index.search(criterio, limit=10)
+        decorrido = (time.perf_counter() - inicio) * 1000
+        
         print(f"\n{Colors.GREEN}Resultado da consulta para: {criterio}{Colors.RESET}")
-        print(f"{Colors.WHITE}Nome: João Silva")
-        print(f"Código: 001")
-        print(f"Cargo: Analista de Sistemas")
-        print(f"Departamento: TI")
-        print(f"Status: Ativo{Colors.RESET}")
+        if not resultados:
+            print(f"{Colors.YELLOW}Nenhum funcionário encontrado.{Colors.RESET}")
+        elif len(resultados) == 1:
+            _, codigo, funcionario = resultados[0]
+            print(f"{Colors.WHITE}Nome: {funcionario.get('name', '')}")
+            print(f"Código: {codigo}")
+            print(f"Cargo: {funcionario.get('position', '')}")
+            print(f"Departamento: {funcionario.get('department', '')}")
+            print(f"Status: {funcionario.get('status', 'Ativo')}{Colors.RESET}")
+        else:
+            print(f"{Colors.WHITE}{'Código':<8} {'Nome':<30} {'Cargo':<22} {'Departamento':<15}{Colors.RESET}")
+            print(f"{Colors.BLUE}{'-'*78}{Colors.RESET}")
+            for _, codigo, funcionario in resultados:
+                print(f"{Colors.WHITE}{codigo:<8} {funcionario.get('name', '')[:30]:<30} "
+                      f"{funcionario.get('position', '')[:22]:<22} {funcionario.get('department', '')[:15]:<15}{Colors.RESET}")
+        print(f"{Colors.CYAN}{len(resultados)} resultado(s) em {decorrido:.2f} ms "
+              f"({len(self.employee_index)} funcionários indexados){Colors.RESET}")
         
         input(f"\n{Colors.YELLOW}Pressione Enter para continuar...{Colors.RESET}")
 
@@ -1033,12 +1162,56 @@ class ERPSystem:
             print(f"{Colors.GREEN}Cadastro de equipamento em desenvolvimento...{Colors.RESET}")
         elif choice == "2":
             print(f"{Colors.GREEN}Consulta de equipamento em desenvolvimento...{Colors.RESET}")
+        elif choice == "3":
+            self.manutencao_preventiva()
+            return
         else:
             print(f"{Colors.GREEN}Opção em desenvolvimento...{Colors.RESET}")
         
         if choice != "0":
             input("Pressione Enter para continuar...")
 
+    def manutencao_preventiva(self, screen_rows=15):
+        """Open the preventive orders that came due and list the next scheduled ones"""
+        self.screen.render(self.draw_title_box('MANUTENÇÃO PREVENTIVA', 78))
+        if self.storage is None:
+            print(f"{Colors.YELLOW}O plano de manutenção fica no banco compartilhado com a GUI.{Colors.RESET}")
+            print(f"{Colors.YELLOW}Inicie a CLI com --armazenamento sqlite para usá-lo.{Colors.RESET}")
+            input(f"{Colors.YELLOW}Pressione Enter para continuar...{Colors.RESET}")
+            return
+        
+        if self.maintenance is None:
+            # Kept for the session: later visits only re-read the equipment that changed
+            self.maintenance = maintenance.MaintenanceScheduler(self.storage.db)
+        try:
+            started = time.perf_counter()
+            created = self.maintenance.generate()
+            elapsed = time.perf_counter() - started
+            upcoming = self.maintenance.upcoming(screen_rows)
+        except sqlite3.Error as e:
+            print(f"{Colors.RED}Erro ao gerar as preventivas: {e}{Colors.RESET}")
+            input(f"{Colors.YELLOW}Pressione Enter para continuar...{Colors.RESET}")
+            return
+        
+        if created:
+            numbers = ", ".join(str(number) for number in created[:10])
+            if len(created) > 10:
+                numbers += f" ... {created[-1]}"
+            print(f"{Colors.GREEN}✓ {len(created)} O.S. preventiva(s) aberta(s) em {elapsed:.2f}s: {numbers}{Colors.RESET}")
+        else:
+            print(f"{Colors.CYAN}Nenhuma preventiva vencendo nos próximos "
+                  f"{self.maintenance.lead_days} dias.{Colors.RESET}")
+        
+        print(f"\n{Colors.WHITE}{'Código':<10}  {'Equipamento':<32}  {'Próxima':<10}  {'Última':<10}  Intervalo{Colors.RESET}")
+        print(f"{Colors.BLUE}{'-' * 78}{Colors.RESET}")
+        for item in upcoming:
+            print(f"{Colors.WHITE}{item['id']:<10}  {item['name'][:32]:<32}  {item['next_maintenance']:<10}  "
+                  f"{item['last_maintenance'] or '-':<10}  {item['maintenance_interval']} dias{Colors.RESET}")
+        if not upcoming:
+            print(f"{Colors.YELLOW}Nenhum equipamento com preventiva programada.{Colors.RESET}")
+        print(f"\n{Colors.CYAN}Equipamentos com O.S. preventiva aberta voltam à lista quando ela é concluída.{Colors.RESET}")
+        input(f"{Colors.YELLOW}Pressione Enter para continuar...{Colors.RESET}")
+
     def handle_ordem_servico(self):
         """Handle service orders"""
         options = [
@@ -1052,37 +1225,269 @@ class ERPSystem:
         
         if choice == "1":
             self.criar_ordem_servico()
+        elif choice == "2":
+            self.consultar_ordem_servico()
+        elif choice == "3":
+            self.atualizar_status_os()
+        elif choice == "4":
+            self.relatorios_os()
         else:
             print(f"{Colors.GREEN}Opção em desenvolvimento...{Colors.RESET}")
             if choice != "0":
                 input("Pressione Enter para continuar...")
 
+    def relatorios_os(self):
+        """Service order reports menu"""
+        entries = list(reports.REPORTS.values())
+        choice = self.show_submenu_with_navigation("RELATÓRIOS DE OS", [report.title for report in entries])
+        if choice.isdigit() and 1 <= int(choice) <= len(entries):
+            self.show_report(entries[int(choice) - 1].name)
+
     def criar_ordem_servico(self):
         """Create new service order"""
-        self.clear_screen()
-        print(f"{Colors.CYAN}╔{self.draw_border(50, '═')}╗{Colors.RESET}")
-        print(f"{Colors.CYAN}║{Colors.WHITE}{self.center_text('NOVA ORDEM DE SERVIÇO', 50)}{Colors.CYAN}║{Colors.RESET}")
-        print(f"{Colors.CYAN}╚{self.draw_border(50, '═')}╝{Colors.RESET}")
-        print()
+        self.screen.render(self.draw_title_box('NOVA ORDEM DE SERVIÇO'))
         
         cliente = input(f"{Colors.WHITE}Cliente: {Colors.RESET}")
         equipamento = input(f"{Colors.WHITE}Equipamento: {Colors.RESET}")
         problema = input(f"{Colors.WHITE}Problema relatado: {Colors.RESET}")
         tecnico = input(f"{Colors.WHITE}Técnico responsável: {Colors.RESET}")
+        prioridade = input(f"{Colors.WHITE}Prioridade ({'/'.join(PRIORITIES)}) [Média]: {Colors.RESET}").strip()
+        prioridade = next((p for p in PRIORITIES if p.lower() == prioridade.lower()), "Média")
+        
+        try:
+            ordem = self.orders.create(cliente, equipamento, problema, tecnico, prioridade)
+        except OSError as e:
+            print(f"\n{Colors.RED}Erro ao gravar a ordem de serviço: {e}{Colors.RESET}")
+            input(f"{Colors.YELLOW}Pressione Enter para continuar...{Colors.RESET}")
+            return
         
         # Increment pending orders
-        self.status.pending_orders += 1
-        self.save_data()
+        self.adjust_pending_orders(1)
         
         print(f"\n{Colors.GREEN}Ordem de Serviço criada com sucesso!{Colors.RESET}")
-        print(f"{Colors.WHITE}Número da OS: {self.status.pending_orders + 1000}")
+        print(f"{Colors.WHITE}Número da OS: {ordem['number']}")
         print(f"Cliente: {cliente}")
         print(f"Equipamento: {equipamento}")
         print(f"Problema: {problema}")
-        print(f"Técnico: {tecnico}{Colors.RESET}")
+        print(f"Técnico: {tecnico}")
+        print(f"Prioridade: {prioridade}{Colors.RESET}")
+        
+        input(f"\n{Colors.YELLOW}Pressione Enter para continuar...{Colors.RESET}")
+
+    def format_order_lines(self, orders):
+        """Build table lines for a list of service orders"""
+        lines = [
+            f"{Colors.WHITE}{'OS':<7} {'Abertura':<11} {'Cliente':<22} {'Técnico':<18} {'Status':<16}{Colors.RESET}",
+            f"{Colors.BLUE}{'-'*78}{Colors.RESET}",
+        ]
+        for ordem in orders:
+            cor = Colors.GREEN if ordem["status"] == CLOSED_STATUS else Colors.WHITE
+            lines.append(
+                f"{cor}{ordem['number']:<7} {ordem['created_date']:<11} {ordem['client'][:22]:<22} "
+                f"{ordem['technician'][:18]:<18} {ordem['status']:<16}{Colors.RESET}"
+            )
+        return lines
+
+    def listar_ordens(self, concluidas, limit=20):
+        """List concluded or open service orders, most recent first"""
+        self.refresh_orders()
+        if concluidas:
+            title, total = 'O.S. CONCLUÍDAS', self.orders.count(CLOSED_STATUS)
+            orders = self.orders.closed_orders(limit)
+        else:
+            title, total = 'O.S. EM ABERTO', self.orders.count_open()
+            orders = self.orders.open_orders(limit)
+        
+        frame = self.draw_title_box(title, 78)
+        if not orders:
+            frame.append(f"{Colors.YELLOW}Nenhuma ordem de serviço encontrada.{Colors.RESET}")
+        else:
+            frame += self.format_order_lines(orders)
+            frame.append("")
+            frame.append(f"{Colors.CYAN}Mostrando {len(orders)} de {total} (mais recentes primeiro){Colors.RESET}")
+        frame.append("")
+        self.screen.render(frame)
+        input(f"{Colors.YELLOW}Pressione Enter para continuar...{Colors.RESET}")
+
+    def show_order_details(self, ordem):
+        """Print every field of a service order"""
+        print(f"{Colors.WHITE}Número da OS: {Colors.CYAN}{ordem['number']}{Colors.RESET}")
+        print(f"{Colors.WHITE}Cliente: {Colors.CYAN}{ordem['client']}{Colors.RESET}")
+        print(f"{Colors.WHITE}Equipamento: {Colors.CYAN}{ordem['equipment']}{Colors.RESET}")
+        print(f"{Colors.WHITE}Problema: {Colors.CYAN}{ordem['problem']}{Colors.RESET}")
+        print(f"{Colors.WHITE}Técnico: {Colors.CYAN}{ordem['technician']}{Colors.RESET}")
+        print(f"{Colors.WHITE}Prioridade: {Colors.CYAN}{ordem['priority']}{Colors.RESET}")
+        print(f"{Colors.WHITE}Status: {Colors.CYAN}{ordem['status']}{Colors.RESET}")
+        print(f"{Colors.WHITE}Abertura: {Colors.CYAN}{ordem['created_date']}{Colors.RESET}")
+        if ordem.get("closed_date"):
+            print(f"{Colors.WHITE}Conclusão: {Colors.CYAN}{ordem['closed_date']}{Colors.RESET}")
+
+    def consultar_ordem_servico(self):
+        """Look up service orders by number, client or technician"""
+        self.screen.render(self.draw_title_box('CONSULTAR ORDEM DE SERVIÇO'))
+        
+        criterio = input(f"{Colors.WHITE}Número da OS, cliente, técnico ou palavras do problema: {Colors.RESET}").strip()
+        print()
+        self.refresh_orders()
+        
+        if criterio.isdigit():
+            ordem = self.orders.get(int(criterio))
+            if ordem:
+                self.show_order_details(ordem)
+            else:
+                print(f"{Colors.RED}OS {criterio} não encontrada.{Colors.RESET}")
+        elif criterio:
+            encontradas = {o["number"]: o for o in self.orders.by_client_name(criterio, 20)}
+            encontradas.update((o["number"], o) for o in self.orders.by_technician_name(criterio, 20))
+            if encontradas:
+                ordens = sorted(encontradas.values(), key=lambda o: o["number"], reverse=True)[:20]
+                for line in self.format_order_lines(ordens):
+                    print(line)
+            else:
+                # Busca textual: problema, equipamento, cliente e técnico, mais relevantes primeiro
+                resultados = self.orders.search_text(criterio, 20, marks=(Colors.YELLOW, Colors.CYAN))
+                if resultados:
+                    lines = self.format_order_lines([ordem for ordem, _ in resultados])
+                    for line in lines[:2]:
+                        print(line)
+                    for line, (_, trecho) in zip(lines[2:], resultados):
+                        print(line)
+                        print(f"        {Colors.CYAN}{trecho}{Colors.RESET}")
+                else:
+                    print(f"{Colors.RED}Nenhuma OS encontrada para '{criterio}'.{Colors.RESET}")
         
         input(f"\n{Colors.YELLOW}Pressione Enter para continuar...{Colors.RESET}")
 
+    def atualizar_status_os(self):
+        """Change the status of a service order"""
+        self.screen.render(self.draw_title_box('ATUALIZAR STATUS DA OS'))
+        
+        numero = input(f"{Colors.WHITE}Número da OS: {Colors.RESET}").strip()
+        self.refresh_orders()
+        ordem = self.orders.get(int(numero)) if numero.isdigit() else None
+        if not ordem:
+            print(f"{Colors.RED}OS '{numero}' não encontrada.{Colors.RESET}")
+            input(f"{Colors.YELLOW}Pressione Enter para continuar...{Colors.RESET}")
+            return
+        
+        print(f"{Colors.WHITE}Status atual: {Colors.CYAN}{ordem['status']}{Colors.RESET}")
+        for i, status in enumerate(STATUSES, 1):
+            print(f"{Colors.WHITE}{i}. {status}{Colors.RESET}")
+        escolha = input(f"{Colors.YELLOW}Novo status (1-{len(STATUSES)}): {Colors.RESET}").strip()
+        if not escolha.isdigit() or not 1 <= int(escolha) <= len(STATUSES):
+            print(f"{Colors.RED}Opção inválida!{Colors.RESET}")
+            input(f"{Colors.YELLOW}Pressione Enter para continuar...{Colors.RESET}")
+            return
+        
+        novo_status = STATUSES[int(escolha) - 1]
+        anterior = ordem["status"]
+        try:
+            self.orders.set_status(ordem["number"], novo_status)
+        except OSError as e:
+            print(f"{Colors.RED}Erro ao gravar a ordem de serviço: {e}{Colors.RESET}")
+            input(f"{Colors.YELLOW}Pressione Enter para continuar...{Colors.RESET}")
+            return
+        
+        # Keep the pending counter in step with orders entering/leaving the closed state
+        if anterior != CLOSED_STATUS and novo_status == CLOSED_STATUS:
+            self.adjust_pending_orders(-1)
+        elif anterior == CLOSED_STATUS and novo_status != CLOSED_STATUS:
+            self.adjust_pending_orders(1)
+        
+        print(f"{Colors.GREEN}✓ OS {ordem['number']}: {anterior} → {novo_status}{Colors.RESET}")
+        input(f"{Colors.YELLOW}Pressione Enter para continuar...{Colors.RESET}")
+
+    def report_engine(self):
+        """Report engine over the shared database (JSON modes: over a scratch copy of the JSON data)"""
+        if self.storage is not None:
+            if self.reports is None:
+                self.reports = reports.ReportEngine(self.storage.db.db_path)
+            return self.reports
+
+        # The reports read SQLite, so the JSON data is copied into a scratch database kept for
+        # the session; it is re-synced only when a journal moved, so unchanged reports hit the cache
+        for store in (self.employees_db, self.orders.store):
+            store.refresh()
+        version = (self.employees_db.version, self.orders.store.version)
+        if self.reports_dir is None:
+            self.reports_dir = tempfile.mkdtemp(prefix="erp_relatorios_")
+        path = os.path.join(self.reports_dir, "relatorios.db")
+        if version != self.reports_version:
+            with storage.Storage(path) as snapshot:
+                with snapshot.batch() as cursor:
+                    cursor.execute("DELETE FROM service_orders")
+                    cursor.execute("DELETE FROM employees")
+                    exchange.import_cli_data(
+                        snapshot, employees=self.employees_db, orders=self.orders.store)
+            self.reports_version = version
+        if self.reports is None:
+            self.reports = reports.ReportEngine(path)
+        return self.reports
+
+    def close_reports(self):
+        if self.reports is not None:
+            self.reports.close()
+            self.reports = None
+        if self.reports_dir is not None:
+            shutil.rmtree(self.reports_dir, ignore_errors=True)
+            self.reports_dir = None
+        self.reports_version = None
+
+    def show_report(self, name, screen_rows=30):
+        """Run a report, show its first rows and optionally export all of it to CSV"""
+        report = reports.REPORTS[name]
+        self.screen.render(self.draw_title_box(report.title.upper(), 78))
+        
+        options = {}
+        if "start" in report.uses:
+            primeiro = input(f"{Colors.WHITE}Primeiro mês (AAAA-MM, Enter = todos): {Colors.RESET}").strip()
+            ultimo = input(f"{Colors.WHITE}Último mês (AAAA-MM, Enter = até hoje): {Colors.RESET}").strip()
+            try:
+                options = reports.period(primeiro or None, ultimo or None)
+            except ValueError:
+                print(f"{Colors.RED}Use meses no formato AAAA-MM.{Colors.RESET}")
+                input(f"{Colors.YELLOW}Pressione Enter para continuar...{Colors.RESET}")
+                return
+        
+        print(f"\n{Colors.CYAN}⏳ Calculando...{Colors.RESET}")
+        try:
+            engine = self.report_engine()
+            hits = engine.hits
+            started = time.perf_counter()
+            rows = engine.rows(name, **options)
+            first = list(itertools.islice(rows, screen_rows))
+            # The rest is only counted, never held: the screen shows the first rows
+            total = len(first) + sum(1 for _ in rows)
+            elapsed = time.perf_counter() - started
+        except (OSError, ValueError, sqlite3.Error) as e:
+            print(f"{Colors.RED}Erro ao calcular o relatório: {e}{Colors.RESET}")
+            input(f"{Colors.YELLOW}Pressione Enter para continuar...{Colors.RESET}")
+            return
+        
+        if not first:
+            print(f"{Colors.YELLOW}Nenhuma ordem de serviço no período.{Colors.RESET}")
+        else:
+            cells = [["" if value is None else str(value) for value in row] for row in first]
+            widths = [min(30, max(len(column), *(len(row[i]) for row in cells)))
+                      for i, column in enumerate(report.columns)]
+            print(f"{Colors.WHITE}{'  '.join(c[:w].ljust(w) for c, w in zip(report.columns, widths))}{Colors.RESET}")
+            print(f"{Colors.BLUE}{'-' * (sum(widths) + 2 * (len(widths) - 1))}{Colors.RESET}")
+            for row in cells:
+                print(f"{Colors.WHITE}{'  '.join(c[:w].ljust(w) for c, w in zip(row, widths))}{Colors.RESET}")
+        origem = "cache" if engine.hits > hits else "banco"
+        print(f"\n{Colors.CYAN}Mostrando {len(first)} de {total} linha(s) em {elapsed:.2f}s ({origem}){Colors.RESET}")
+        
+        if first:
+            destino = input(f"{Colors.YELLOW}Exportar para CSV? Nome do arquivo (Enter = não): {Colors.RESET}").strip()
+            if destino:
+                try:
+                    count = reports.write_csv(engine.rows(name, **options), report.columns, destino)
+                except OSError as e:
+                    print(f"{Colors.RED}Erro ao gravar {destino}: {e}{Colors.RESET}")
+                else:
+                    print(f"{Colors.GREEN}✓ {count} linha(s) gravadas em {destino}{Colors.RESET}")
+        input(f"{Colors.YELLOW}Pressione Enter para continuar...{Colors.RESET}")
+
     def run_menu_option(self, choice):
         """Execute the selected menu option"""
         if choice == "1":
@@ -1092,11 +1497,9 @@ class ERPSystem:
         elif choice == "3":
             self.handle_ordem_servico()
         elif choice == "4":
-            print(f"{Colors.GREEN}O.S. Concluídas - Em desenvolvimento...{Colors.RESET}")
-            input("Pressione Enter para continuar...")
+            self.listar_ordens(concluidas=True)
         elif choice == "5":
-            print(f"{Colors.GREEN}O.S. em Aberto - Em desenvolvimento...{Colors.RESET}")
-            input("Pressione Enter para continuar...")
+            self.listar_ordens(concluidas=False)
         elif choice == "6":
             print(f"{Colors.GREEN}Orçamentos Aprovados - Em desenvolvimento...{Colors.RESET}")
             input("Pressione Enter para continuar...")
@@ -1137,13 +1540,39 @@ class ERPSystem:
             choice = self.get_menu_choice()
             self.run_menu_option(choice)
 
-def main():
+# Menus and screens used to tag samples taken with --profile
+PROFILE_SCREENS = (
+    'authenticate', 'get_menu_choice',
+    'handle_funcionarios', 'cadastrar_funcionario', 'consultar_funcionario',
+    'handle_equipamentos', 'manutencao_preventiva',
+    'handle_ordem_servico', 'criar_ordem_servico', 'consultar_ordem_servico', 'atualizar_status_os',
+    'listar_ordens', 'show_order_details', 'relatorios_os', 'show_report',
+    'admin_menu', 'manage_users_menu', 'view_registered_users', 'show_user_details', 'create_new_user',
+    'toggle_user_status', 'reset_user_password', 'change_password', 'show_system_info',
+)
+
+def main(argv=None):
     """Main function"""
+    parser = argparse.ArgumentParser(description="Sistema ERP - CLI")
+    parser.add_argument('--profile', nargs='?', const='erp_profile.folded', metavar='ARQUIVO',
+                        help="amostra a sessão e grava pilhas colapsadas (flamegraph) ao sair")
+    parser.add_argument('--armazenamento', choices=('journal', 'json', 'sqlite'),
+                        help="onde gravar os dados (padrão: ERP_STORAGE_MODE ou sqlite, "
+                             "o mesmo banco da GUI e do servidor web)")
+    args = parser.parse_args(argv)
+
     # Enable color support on Windows
     if os.name == 'nt':
         os.system('color')
     
-    erp = ERPSystem()
+    erp = ERPSystem(storage_mode=args.armazenamento)
+    
+    session = None
+    if args.profile:
+        session = profiler.SamplingProfiler()
+        session.instrument(ERPSystem, PROFILE_SCREENS)
+        erp.screen.on_render = session.record_frame
+        session.start()
     
     try:
         erp.run()
@@ -1153,6 +1582,12 @@ def main():
         print(f"\n{Colors.RED}Erro no sistema: {e}{Colors.RESET}")
     finally:
         erp.save_data()
+        erp.close()
+        if session is not None:
+            session.stop()
+            session.write(args.profile)
+            print(session.summary())
+            print(f"\n{Colors.GREEN}✅ Perfil gravado em {args.profile}{Colors.RESET}")
 
 if __name__ == "__main__":
     main()
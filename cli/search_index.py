@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+CLI ERP System - Employee Search Index
+Accent-insensitive prefix trie plus trigram index for fuzzy lookups
+"""
+
+import re
+import heapq
+import itertools
+import unicodedata
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+_WORD = re.compile(r"\w+")
+
+# Weight of each kind of token match when ranking results
+EXACT_SCORE = 3.0
+PREFIX_SCORE = 2.0
+FUZZY_SCORE = 1.5
+FIRST_WORD_BONUS = 0.5
+FUZZY_THRESHOLD = 0.35
+
+# Above this many candidates, rank by set tiers instead of scoring each one
+SCORE_LIMIT = 256
+
+# Employees matching one typed word: their codes, and the same codes as one or
+# more sorted lists (several for a typo matching several known tokens)
+Match = Tuple[Set[str], List[List[str]]]
+
+
+def fold(text: str) -> str:
+    """Strip accents and case so 'João' and 'joao' compare equal"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+
+
+def tokenize(text: str) -> List[str]:
+    """Split folded text into word tokens"""
+    return _WORD.findall(fold(text))
+
+
+def trigrams(token: str) -> Set[str]:
+    """Padded character trigrams of a token"""
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class _TrieNode:
+    __slots__ = ("children", "ids", "first_ids", "order", "first_order")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.ids: Set[str] = set()          # any name token has this prefix
+        self.first_ids: Set[str] = set()    # the first name token has this prefix
+        # The same codes sorted, rebuilt on the first search after a change
+        self.order: Optional[List[str]] = None
+        self.first_order: Optional[List[str]] = None
+
+    def sorted_ids(self, first: bool = False) -> List[str]:
+        if first:
+            if self.first_order is None:
+                self.first_order = sorted(self.first_ids)
+            return self.first_order
+        if self.order is None:
+            self.order = sorted(self.ids)
+        return self.order
+
+
+class EmployeeSearchIndex:
+    """In-memory search over employee names and codes
+
+    Every name token is inserted in a prefix trie whose nodes keep the
+    set of employees having a token with that prefix, so "joao sil"
+    resolves with one walk per typed word and membership checks. Each set
+    also has a sorted copy (rebuilt lazily after changes): broad prefixes
+    walk the smallest one in code order and stop once ``limit`` results
+    are found, so the work per keystroke follows the limit, not the
+    number of matches. Typos
+    ("ferrera") fall back to a trigram index over the distinct name
+    tokens, which stays small even for very large employee lists.
+    Additions and removals are incremental.
+    """
+
+    def __init__(self):
+        self.root = _TrieNode()
+        self.records: Dict[str, dict] = {}
+        self.tokens: Dict[str, List[str]] = {}
+        self.token_ids: Dict[str, Set[str]] = defaultdict(set)
+        self.trigram_tokens: Dict[str, Set[str]] = defaultdict(set)
+        self.token_order: Dict[str, List[str]] = {}
+
+    def __len__(self):
+        return len(self.records)
+
+    def add(self, key: str, record: dict):
+        """Index (or re-index) one employee"""
+        if key in self.records:
+            self.remove(key)
+
+        tokens = tokenize(record.get("name", ""))
+        self.records[key] = record
+        self.tokens[key] = tokens
+
+        for position, token in enumerate(dict.fromkeys(tokens)):
+            node = self.root
+            for ch in token:
+                node = node.children.setdefault(ch, _TrieNode())
+                node.ids.add(key)
+                node.order = None
+                if position == 0:
+                    node.first_ids.add(key)
+                    node.first_order = None
+            if not self.token_ids[token]:
+                for gram in trigrams(token):
+                    self.trigram_tokens[gram].add(token)
+            self.token_ids[token].add(key)
+            self.token_order.pop(token, None)
+
+    def remove(self, key: str):
+        """Drop one employee from the index"""
+        if key not in self.records:
+            return
+        for token in set(self.tokens.pop(key)):
+            node = self.root
+            path = []
+            for ch in token:
+                path.append((node, ch))
+                node = node.children[ch]
+                node.ids.discard(key)
+                node.first_ids.discard(key)
+                node.order = node.first_order = None
+            # Prune branches that no longer lead to any employee
+            for parent, ch in reversed(path):
+                if parent.children[ch].ids:
+                    break
+                del parent.children[ch]
+
+            self.token_ids[token].discard(key)
+            self.token_order.pop(token, None)
+            if not self.token_ids[token]:
+                del self.token_ids[token]
+                for gram in trigrams(token):
+                    self.trigram_tokens[gram].discard(token)
+                    if not self.trigram_tokens[gram]:
+                        del self.trigram_tokens[gram]
+        del self.records[key]
+
+    def _node(self, prefix: str):
+        """Trie node reached by ``prefix``, if any"""
+        node = self.root
+        for ch in prefix:
+            node = node.children.get(ch)
+            if node is None:
+                return None
+        return node
+
+    def _token_order(self, token: str) -> List[str]:
+        """Employees having exactly this name token, in code order"""
+        order = self.token_order.get(token)
+        if order is None:
+            order = self.token_order[token] = sorted(self.token_ids.get(token, ()))
+        return order
+
+    def _tokens_match(self, tokens) -> Match:
+        """Employees having any of these name tokens"""
+        tokens = list(tokens)
+        ids = set().union(*(self.token_ids.get(t, ()) for t in tokens))
+        return ids, [self._token_order(t) for t in tokens]
+
+    @staticmethod
+    def _walk(sets: List[Match], limit: int, exclude: Sequence[Callable[[str], bool]] = ()) -> List[str]:
+        """First ``limit`` codes, in code order, present in every set and not excluded
+
+        Walks the sorted lists of the smallest set (merged lazily) through
+        membership filters and stops at ``limit`` hits.
+        """
+        if limit <= 0:
+            return []
+        driver = min(sets, key=lambda match: len(match[0]))
+        if len(driver[1]) == 1:
+            keys = iter(driver[1][0])
+        else:
+            # A code under two similar tokens comes out of the merge twice in a row
+            keys = (key for key, _ in itertools.groupby(heapq.merge(*driver[1])))
+        for ids, _ in sets:
+            if ids is not driver[0]:
+                keys = filter(ids.__contains__, keys)
+        for excluded in exclude:
+            keys = itertools.filterfalse(excluded, keys)
+        return list(itertools.islice(keys, limit))
+
+    def _similar_tokens(self, token: str) -> Dict[str, float]:
+        """Known name tokens similar to ``token``, with their trigram Jaccard similarity"""
+        grams = trigrams(token)
+        shared: Dict[str, int] = defaultdict(int)
+        for gram in grams:
+            for candidate in self.trigram_tokens.get(gram, ()):
+                shared[candidate] += 1
+
+        similar = {}
+        for candidate, common in shared.items():
+            similarity = common / (len(grams) + len(trigrams(candidate)) - common)
+            if similarity >= FUZZY_THRESHOLD:
+                similar[candidate] = similarity
+        return similar
+
+    def _score(self, key: str, tokens: List[str], fuzzy: List[Dict[str, float]]) -> float:
+        """Rank score of one candidate for the query tokens"""
+        total = 0.0
+        for token, similar in zip(tokens, fuzzy):
+            if similar is not None:
+                total += FUZZY_SCORE * max(similar.get(t, 0.0) for t in self.tokens[key])
+            elif key in self.token_ids.get(token, ()):
+                total += EXACT_SCORE
+            else:
+                total += PREFIX_SCORE
+        if self.tokens[key] and self.tokens[key][0].startswith(tokens[0]):
+            total += FIRST_WORD_BONUS
+        return total
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[float, str, dict]]:
+        """Ranked (score, code, record) matches for a name or code"""
+        query = query.strip()
+        if not query:
+            return []
+
+        # Exact code lookups ("7" also finds "007")
+        found: Dict[str, float] = {}
+        for code in {query, query.zfill(3)}:
+            if code in self.records:
+                found[code] = 100.0
+
+        tokens = tokenize(query)
+        matches: List[Match] = []
+        fuzzy: List = []
+        for token in tokens:
+            node = self._node(token)
+            if node is not None and node.ids:
+                matches.append((node.ids, [node.sorted_ids()]))
+                fuzzy.append(None)
+            elif len(token) >= 3:
+                similar = self._similar_tokens(token)
+                matches.append(self._tokens_match(similar))
+                fuzzy.append(similar)
+            else:
+                matches = []
+                break
+
+        if matches:
+            candidates = self._walk(matches, SCORE_LIMIT + 1)
+            if len(candidates) <= SCORE_LIMIT:
+                for key in candidates:
+                    found.setdefault(key, self._score(key, tokens, fuzzy))
+            else:
+                # Too many hits to score one by one: every exact match outranks
+                # every prefix match, so take each tier in code order until
+                # ``limit`` results are found.
+                exact = []
+                for token, similar in zip(tokens, fuzzy):
+                    if similar is None:
+                        exact.append(self._tokens_match([token]))
+                    else:
+                        closest = max(similar.values())
+                        exact.append(self._tokens_match(t for t, s in similar.items() if s == closest))
+                node = self._node(tokens[0])
+                first = (node.first_ids, [node.sorted_ids(first=True)]) if node else (set(), [[]])
+
+                if len(exact) == 1:
+                    is_exact = exact[0][0].__contains__
+                else:
+                    def is_exact(key):
+                        return all(key in ids for ids, _ in exact)
+
+                tiers = (
+                    (exact + [first], ()),
+                    (exact, (first[0].__contains__,)),
+                    ([first], (is_exact,)),
+                    ([], (first[0].__contains__, is_exact)),
+                )
+                for required, excluded in tiers:
+                    for key in self._walk(matches + required, limit - len(found), (found.__contains__, *excluded)):
+                        found[key] = self._score(key, tokens, fuzzy)
+
+        best = heapq.nsmallest(limit, found.items(), key=lambda item: (-item[1], item[0]))
+        return [(score, key, self.records[key]) for key, score in best]
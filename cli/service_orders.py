@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+CLI ERP System - Service Order Repository
+Persisted service orders with in-memory secondary indexes
+"""
+
+import bisect
+import datetime
+import heapq
+import itertools
+import re
+import sqlite3
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+from erp.journal import JournaledStore
+
+CLOSED_STATUS = "Concluída"
+STATUSES = ["Em Aberto", "Em Andamento", "Aguardando Peças", CLOSED_STATUS]
+PRIORITIES = ["Baixa", "Média", "Alta", "Crítica"]
+FIRST_NUMBER = 1001
+
+# Words skipped in free-text searches unless they are the only ones typed
+STOPWORDS = {"a", "o", "as", "os", "e", "de", "da", "do", "das", "dos", "em", "no", "na",
+             "nos", "nas", "um", "uma", "com", "por", "para", "que"}
+_WORD = re.compile(r"\w+")
+
+
+def _normalize(name: str) -> str:
+    """Normalize a person/company name for index lookups"""
+    return " ".join(name.split()).casefold()
+
+
+def _insert(numbers: List, number):
+    """Add a number to an ascending list (new orders usually go at the end)"""
+    if not numbers or numbers[-1] < number:
+        numbers.append(number)
+    else:
+        bisect.insort(numbers, number)
+
+
+def _remove(numbers: List, number):
+    """Remove a number from an ascending list, if present"""
+    index = bisect.bisect_left(numbers, number)
+    if index < len(numbers) and numbers[index] == number:
+        del numbers[index]
+
+
+def _match_expression(text: str) -> Optional[str]:
+    """FTS5 MATCH expression requiring every typed word, the last one as a prefix"""
+    words = _WORD.findall(text)
+    terms = [w for w in words if w.casefold() not in STOPWORDS] or words
+    if not terms:
+        return None
+    return " ".join(f'"{term}"' for term in terms) + "*"
+
+
+class ServiceOrderRepository:
+    """Service orders persisted in a journaled JSON store
+
+    Orders are keyed by their OS number, so lookups by number are O(1).
+    Secondary indexes are built once when the store loads and then follow
+    every key the store reports as changed, whether this session wrote it
+    or ``refresh()`` brought it in from another one. Changed orders are
+    re-indexed before the next read, and a full reload of the store
+    (another session compacted it) rebuilds the indexes:
+
+    * status, technician and client map to the ascending list of matching
+      numbers, so the most recent ``limit`` orders are read from the end of
+      the list (or merged from the ends of a few lists) without touching
+      the rest;
+    * created_date is a sorted list of (date, number) pairs, answering
+      date ranges with two binary searches;
+    * free text (problem, equipment, client, technician) goes to an
+      in-memory SQLite FTS5 index, built on the first text search.
+    """
+
+    def __init__(self, store: JournaledStore):
+        self.store = store
+        self.next_number = FIRST_NUMBER
+        self._text: Optional[sqlite3.Connection] = None
+        self._dirty = set()
+        self._reload = False
+        self._dirty_lock = threading.Lock()
+        self._build()
+        store.subscribe(self._changed)
+
+    def _build(self):
+        """Index every stored order from scratch"""
+        self.by_status: Dict[str, List[int]] = defaultdict(list)
+        self.by_technician: Dict[str, List[int]] = defaultdict(list)
+        self.by_client: Dict[str, List[int]] = defaultdict(list)
+        self.by_created_date: List[tuple] = []
+        self._indexed: Dict[int, tuple] = {}
+        for order in self.store.values():
+            self._index(order, list.append)
+        for index in (self.by_status, self.by_technician, self.by_client):
+            for numbers in index.values():
+                numbers.sort()
+        self.by_created_date.sort()
+        if self._text is not None:
+            self._text.close()
+            self._text = None
+
+    def _index(self, order: Dict, add=_insert):
+        """Add an order to the secondary indexes (``list.append`` leaves the lists unsorted)"""
+        number = order["number"]
+        entry = (order["status"], _normalize(order["technician"]), _normalize(order["client"]),
+                 order["created_date"])
+        self._indexed[number] = entry
+        add(self.by_status[entry[0]], number)
+        add(self.by_technician[entry[1]], number)
+        add(self.by_client[entry[2]], number)
+        add(self.by_created_date, (entry[3], number))
+        self.next_number = max(self.next_number, number + 1)
+
+    def _unindex(self, number: int):
+        """Remove an order from the secondary indexes, as it was last indexed"""
+        entry = self._indexed.pop(number, None)
+        if entry is None:
+            return
+        _remove(self.by_status[entry[0]], number)
+        _remove(self.by_technician[entry[1]], number)
+        _remove(self.by_client[entry[2]], number)
+        _remove(self.by_created_date, (entry[3], number))
+
+    def _changed(self, key: Optional[str]):
+        """Store callback: remember what to re-index (runs with the store's lock held)"""
+        with self._dirty_lock:
+            if key is None:
+                self._reload = True
+                self._dirty.clear()
+            elif not self._reload:
+                self._dirty.add(key)
+
+    def _sync(self):
+        """Re-index the orders changed since the last read"""
+        with self._dirty_lock:
+            reload, dirty = self._reload, self._dirty
+            self._reload, self._dirty = False, set()
+        if reload:
+            self._build()
+            return
+        for key in dirty:
+            number = int(key)
+            self._unindex(number)
+            order = self.store.get(key)
+            if order is not None:
+                self._index(order)
+            if self._text is not None:
+                self._text.execute("DELETE FROM orders_text WHERE rowid = ?", (number,))
+                if order is not None:
+                    self._index_text([order])
+
+    def refresh(self):
+        """Pick up orders created or changed by other sessions"""
+        self.store.refresh()
+        self._sync()
+
+    def __len__(self):
+        return len(self.store)
+
+    def create(self, client: str, equipment: str, problem: str, technician: str,
+               priority: str = "Média", status: str = "Em Aberto") -> Dict:
+        """Register a new order and return it with its OS number
+
+        The number is chosen under the store's file lock, so sessions
+        creating orders at the same time never reuse each other's numbers.
+        """
+        order = {
+            "number": None,
+            "client": client,
+            "equipment": equipment,
+            "problem": problem,
+            "technician": technician,
+            "priority": priority,
+            "status": status,
+            "created_date": datetime.date.today().isoformat(),
+            "closed_date": None,
+        }
+
+        def allocate(current):
+            number = self.next_number
+            while str(number) in current:
+                number += 1
+            order["number"] = number
+            return {str(number): order}
+
+        self.store.modify(allocate)
+        self._sync()
+        return order
+
+    def get(self, number: int) -> Optional[Dict]:
+        """Look up an order by its OS number"""
+        return self.store.get(str(number))
+
+    def set_status(self, number: int, status: str) -> Dict:
+        """Move an order to a new status, stamping the closing date"""
+        order = self.store[str(number)]
+        fields = {"status": status}
+        if status == CLOSED_STATUS:
+            fields["closed_date"] = datetime.date.today().isoformat()
+        elif order["status"] == CLOSED_STATUS:
+            fields["closed_date"] = None
+        self.store.update(str(number), fields)
+        self._sync()
+        return self.store[str(number)]
+
+    def _orders(self, numbers: Iterable[int], limit: Optional[int]) -> List[Dict]:
+        """Materialize unordered numbers, most recent first, optionally keeping only the top ``limit``"""
+        if limit is None:
+            selected = sorted(numbers, reverse=True)
+        else:
+            selected = heapq.nlargest(limit, numbers)
+        return [self.store[str(number)] for number in selected]
+
+    def _newest(self, lists: Iterable[List[int]], limit: Optional[int]) -> List[Dict]:
+        """Orders from ascending number lists, most recent first, reading only the top ``limit``"""
+        lists = [numbers for numbers in lists if numbers]
+        if len(lists) == 1:
+            numbers = reversed(lists[0])
+        else:
+            numbers = heapq.merge(*(reversed(numbers) for numbers in lists), reverse=True)
+        return [self.store[str(number)] for number in itertools.islice(numbers, limit)]
+
+    def with_status(self, *statuses: str, limit: Optional[int] = None) -> List[Dict]:
+        """Orders currently in any of the given statuses"""
+        self._sync()
+        # An order is in exactly one status, so the lists never overlap
+        return self._newest((self.by_status.get(status, ()) for status in set(statuses)), limit)
+
+    def open_orders(self, limit: Optional[int] = None) -> List[Dict]:
+        """Orders not yet concluded"""
+        self._sync()
+        return self.with_status(*[s for s in self.by_status if s != CLOSED_STATUS], limit=limit)
+
+    def closed_orders(self, limit: Optional[int] = None) -> List[Dict]:
+        """Concluded orders"""
+        return self.with_status(CLOSED_STATUS, limit=limit)
+
+    def count(self, *statuses: str) -> int:
+        """Number of orders in the given statuses"""
+        self._sync()
+        return sum(len(self.by_status.get(status, ())) for status in statuses)
+
+    def count_open(self) -> int:
+        """Number of orders not yet concluded"""
+        self._sync()
+        return len(self.store) - len(self.by_status.get(CLOSED_STATUS, ()))
+
+    def by_technician_name(self, name: str, limit: Optional[int] = None) -> List[Dict]:
+        """Orders assigned to a technician (exact name, case-insensitive)"""
+        self._sync()
+        return self._newest([self.by_technician.get(_normalize(name), [])], limit)
+
+    def by_client_name(self, name: str, limit: Optional[int] = None) -> List[Dict]:
+        """Orders opened for a client (exact name, case-insensitive)"""
+        self._sync()
+        return self._newest([self.by_client.get(_normalize(name), [])], limit)
+
+    def created_between(self, start: str, end: str, limit: Optional[int] = None) -> List[Dict]:
+        """Orders created between two ISO dates, inclusive"""
+        self._sync()
+        lo = bisect.bisect_left(self.by_created_date, (start,))
+        hi = bisect.bisect_left(self.by_created_date, (end + "\uffff",))
+        numbers = [number for _, number in self.by_created_date[lo:hi]]
+        return self._orders(numbers, limit)
+
+    def _index_text(self, orders: Iterable[Dict]):
+        """Add orders to the full-text index"""
+        self._text.executemany(
+            "INSERT INTO orders_text (rowid, problem, equipment, client, technician) VALUES (?, ?, ?, ?, ?)",
+            ((o["number"], o["problem"], o["equipment"], o["client"], o["technician"]) for o in orders)
+        )
+
+    def _text_index(self) -> sqlite3.Connection:
+        """The full-text index, built from every stored order on first use"""
+        if self._text is None:
+            self._text = sqlite3.connect(":memory:", check_same_thread=False)
+            self._text.execute(
+                "CREATE VIRTUAL TABLE orders_text USING fts5(problem, equipment, client, technician, "
+                "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+            )
+            # Matches in the problem description weigh the most
+            self._text.execute("INSERT INTO orders_text (orders_text, rank) VALUES ('rank', 'bm25(4.0, 2.0, 1.0, 1.0)')")
+            self._index_text(self.store.values())
+        return self._text
+
+    def search_text(self, text: str, limit: int = 20, marks=("[", "]")) -> List[tuple]:
+        """Orders containing every word of ``text``, best first, as (order, highlighted snippet)
+
+        Accents and case are ignored and the last word also matches as a
+        prefix, so "perda de press" finds "Perda de pressão na bomba".
+        """
+        expression = _match_expression(text)
+        self._sync()
+        if expression is None:
+            return []
+        rows = self._text_index().execute(
+            "SELECT rowid, snippet(orders_text, -1, ?, ?, '…', 10) FROM orders_text "
+            "WHERE orders_text MATCH ? ORDER BY rank LIMIT ?",
+            (marks[0], marks[1], expression, limit)
+        ).fetchall()
+        return [(self.store[str(number)], snippet) for number, snippet in rows]
+
+    def close(self):
+        """Flush the underlying store"""
+        if self._text is not None:
+            self._text.close()
+        self.store.close()
@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sistema ERP - Núcleo Compartilhado
+Banco SQLite, esquema, autenticação, armazenamento, busca, relatórios e
+ferramentas de linha de comando usados pela GUI, pela CLI e pelo servidor web
+
+Os módulos são importados pelo nome completo (``from erp.storage import
+Storage``) a partir da raiz do repositório; as ferramentas rodam com
+``python -m erp.<módulo>`` na raiz.
+"""
+
+import os
+
+# Banco usado pela GUI, pela CLI, pelo servidor web e pelas ferramentas (continua
+# na pasta gui, onde sempre esteve); ERP_DATABASE aponta para outro arquivo
+DEFAULT_DATABASE = os.environ.get('ERP_DATABASE') or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'gui', 'erp_database.db')
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sistema ERP - Autenticação
+Senhas com PBKDF2-SHA256 salgado e custo ajustável, verificadas fora da
+thread da interface, e limite de tentativas por usuário e por origem
+
+Hashes gravados no formato ``pbkdf2_sha256$<iterações>$<sal>$<hash>``.
+Hashes SHA-256 antigos (GUI) e senhas em texto (CLI) continuam aceitos e
+são regravados no formato novo no próximo login bem-sucedido, assim como
+hashes com menos iterações que o custo atual.
+
+Uso:
+    python -m erp.auth --alvo-ms 250        # mede a máquina e sugere ERP_KDF_ITERATIONS
+"""
+
+import argparse
+import hashlib
+import hmac
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+ALGORITHM = 'pbkdf2_sha256'
+# Custo do KDF; ERP_KDF_ITERATIONS altera o padrão (veja --alvo-ms)
+ITERATIONS = int(os.environ.get('ERP_KDF_ITERATIONS', 310000))
+MIN_ITERATIONS = 10000
+SALT_BYTES = 16
+TARGET_MS = 250
+LOCAL_SOURCE = 'local'
+
+# Tentativas: cada usuário tem 5, repostas a cada 30 s; cada origem tem 20, repostas a cada 3 s
+USER_ATTEMPTS, USER_REFILL_SECONDS = 5, 30.0
+SOURCE_ATTEMPTS, SOURCE_REFILL_SECONDS = 20, 3.0
+# Acima disto, baldes cheios (sem tentativas recentes) são descartados
+MAX_BUCKETS = 10000
+
+_LEGACY_SHA256 = re.compile(r'[0-9a-f]{64}')
+
+
+# ------------------------------------------------------------------ hashes
+
+def hash_password(password: str, iterations: Optional[int] = None) -> str:
+    """Hash salgado no formato gravado em ``password_hash``"""
+    iterations = iterations or ITERATIONS
+    salt = os.urandom(SALT_BYTES)
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, iterations)
+    return f'{ALGORITHM}${iterations}${salt.hex()}${digest.hex()}'
+
+
+def legacy_hash(password: str) -> str:
+    """SHA-256 sem sal, como as versões anteriores gravavam (só para migração)"""
+    return hashlib.sha256(password.encode()).hexdigest()
+
+
+def verify_password(password: str, stored: str) -> bool:
+    """Confere a senha com um hash novo ou com um SHA-256 antigo"""
+    if stored.startswith(ALGORITHM + '$'):
+        try:
+            _, iterations, salt, digest = stored.split('$')
+            expected = bytes.fromhex(digest)
+            actual = hashlib.pbkdf2_hmac('sha256', password.encode(), bytes.fromhex(salt), int(iterations))
+        except ValueError:
+            return False
+        return hmac.compare_digest(actual, expected)
+    if _LEGACY_SHA256.fullmatch(stored):
+        return hmac.compare_digest(stored, legacy_hash(password))
+    return False
+
+
+def needs_rehash(stored: Optional[str]) -> bool:
+    """True se o hash é de formato antigo ou mais barato que o custo atual"""
+    if not stored or not stored.startswith(ALGORITHM + '$'):
+        return True
+    try:
+        return int(stored.split('$')[1]) < ITERATIONS
+    except (IndexError, ValueError):
+        return True
+
+
+_dummy_hash = None
+
+
+def reject_unknown(password: str) -> None:
+    """Gasta o mesmo tempo de uma verificação para usuários que não existem
+
+    Assim o tempo de resposta não revela quais nomes de usuário existem.
+    """
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = hash_password('')
+    verify_password(password, _dummy_hash)
+
+
+def calibrate(target_ms: float = TARGET_MS, rounds: int = 3) -> Tuple[int, float]:
+    """Iterações que levam ``target_ms`` nesta máquina, e o tempo medido com elas
+
+    Parte de uma medição curta e reajusta proporcionalmente ao tempo medido
+    com a estimativa anterior, o que absorve o custo fixo de cada chamada.
+    """
+    salt = os.urandom(SALT_BYTES)
+
+    def measure(iterations: int) -> float:
+        return min(_time(lambda: hashlib.pbkdf2_hmac('sha256', b'calibrar', salt, iterations))
+                   for _ in range(3)) * 1000
+
+    iterations = MIN_ITERATIONS
+    measured = measure(iterations)
+    for _ in range(rounds):
+        iterations = max(MIN_ITERATIONS, round(iterations * target_ms / measured / 1000) * 1000)
+        measured = measure(iterations)
+    return iterations, measured
+
+
+def _time(fn: Callable[[], Any]) -> float:
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+# ------------------------------------------------------ limite de tentativas
+
+class TokenBucket:
+    """Até ``capacity`` fichas, repostas continuamente a ``rate`` por segundo"""
+
+    __slots__ = ('capacity', 'rate', 'tokens', 'updated')
+
+    def __init__(self, capacity: float, rate: float, now: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated = now
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait(self, now: float) -> float:
+        """Segundos até haver uma ficha (0 se já há)"""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+    def give(self, now: float):
+        self._refill(now)
+        self.tokens = min(self.capacity, self.tokens + 1)
+
+    def full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class LoginThrottle:
+    """Limite de tentativas de login por usuário e por origem (endereço, terminal)
+
+    Cada tentativa consome uma ficha do balde do usuário e uma do balde da
+    origem; sem ficha em algum deles a tentativa é recusada na hora, sem
+    verificar a senha e sem esperar. Um login bem-sucedido devolve a ficha
+    da origem e zera o balde do usuário.
+    """
+
+    def __init__(self, user_attempts: int = USER_ATTEMPTS, user_refill: float = USER_REFILL_SECONDS,
+                 source_attempts: int = SOURCE_ATTEMPTS, source_refill: float = SOURCE_REFILL_SECONDS,
+                 clock: Callable[[], float] = time.monotonic):
+        self.limits = {
+            'user': (user_attempts, 1 / user_refill),
+            'source': (source_attempts, 1 / source_refill),
+        }
+        self.clock = clock
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, kind: str, name: str, now: float) -> TokenBucket:
+        bucket = self._buckets.get((kind, name))
+        if bucket is None:
+            if len(self._buckets) >= MAX_BUCKETS:
+                self._buckets = {key: b for key, b in self._buckets.items() if not b.full(now)}
+            bucket = self._buckets[(kind, name)] = TokenBucket(*self.limits[kind], now)
+        return bucket
+
+    def attempt(self, username: str, source: str = LOCAL_SOURCE) -> float:
+        """Registra uma tentativa; devolve 0 se ela pode seguir, ou os segundos a esperar"""
+        with self._lock:
+            now = self.clock()
+            buckets = (self._bucket('user', username.lower(), now), self._bucket('source', source, now))
+            wait = max(bucket.wait(now) for bucket in buckets)
+            if wait:
+                return wait
+            for bucket in buckets:
+                bucket.take(now)
+            return 0.0
+
+    def succeeded(self, username: str, source: str = LOCAL_SOURCE):
+        with self._lock:
+            self._buckets.pop(('user', username.lower()), None)
+            bucket = self._buckets.get(('source', source))
+            if bucket is not None:
+                bucket.give(self.clock())
+
+
+# ------------------------------------------------------------------- login
+
+@dataclass
+class LoginResult:
+    """Resultado de uma tentativa: ``user`` se deu certo, ``retry_after`` se foi recusada pelo limite"""
+    user: Optional[Dict[str, Any]] = None
+    retry_after: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.user is not None
+
+
+class Authenticator:
+    """Login com limite de tentativas, verificado em threads próprias
+
+    ``check(usuário, senha)`` confere a senha no armazenamento (migrando
+    hashes antigos) e devolve o registro do usuário ou None. ``submit``
+    devolve um Future, para que a interface continue respondendo durante
+    o KDF (``hashlib.pbkdf2_hmac`` libera o GIL).
+    """
+
+    def __init__(self, check: Callable[[str, str], Optional[Dict[str, Any]]],
+                 throttle: Optional[LoginThrottle] = None, workers: int = 2):
+        self.check = check
+        self.throttle = throttle or LoginThrottle()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='login')
+
+    def login(self, username: str, password: str, source: str = LOCAL_SOURCE) -> LoginResult:
+        """Verifica na thread atual"""
+        wait = self.throttle.attempt(username, source)
+        if wait:
+            return LoginResult(retry_after=wait)
+        user = self.check(username, password)
+        if user is None:
+            return LoginResult()
+        self.throttle.succeeded(username, source)
+        return LoginResult(user)
+
+    def submit(self, username: str, password: str, source: str = LOCAL_SOURCE) -> 'Future[LoginResult]':
+        """Verifica em uma thread de login"""
+        return self._pool.submit(self.login, username, password, source)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Calibra o custo do hash de senhas do Sistema ERP")
+    parser.add_argument('--alvo-ms', type=float, default=TARGET_MS,
+                        help=f"tempo desejado por verificação de senha (padrão: {TARGET_MS} ms)")
+    args = parser.parse_args(argv)
+
+    print("⏳ Medindo PBKDF2-SHA256 nesta máquina...")
+    current = min(_time(lambda: verify_password('calibrar', hash_password('calibrar'))) for _ in range(3)) / 2
+    print(f"Custo atual: {ITERATIONS} iterações ≈ {current * 1000:.0f} ms por login")
+    iterations, measured = calibrate(args.alvo_ms)
+    print(f"✅ Para ~{args.alvo_ms:g} ms: ERP_KDF_ITERATIONS={iterations} (medido: {measured:.0f} ms)")
+    if iterations == MIN_ITERATIONS:
+        print(f"⚠️  Limitado ao mínimo de {MIN_ITERATIONS} iterações")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
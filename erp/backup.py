@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sistema ERP - Backup Online
+Cópia consistente do banco em uso, compactada, verificada e com rotação
+
+Uso:
+    python -m erp.backup                       # cria um backup em ./backups
+    python -m erp.backup --compressao lzma --manter 14
+    python -m erp.backup --listar
+    python -m erp.backup --verificar backups/erp_20250720_171055.db.gz
+"""
+
+import argparse
+import gzip
+import lzma
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from functools import partial
+from typing import Callable, List, Optional
+
+from . import DEFAULT_DATABASE
+
+BACKUP_DIR = "backups"
+PAGES_PER_STEP = 1024       # páginas copiadas por etapa (4 MB com páginas de 4 KB)
+STEP_PAUSE = 0.005          # pausa entre etapas, liberando o banco para os escritores
+KEEP_BACKUPS = 7
+COPY_BUFFER = 1 << 20
+
+# Extensão e função de abertura de cada formato de compressão
+COMPRESSORS = {
+    'gzip': ('.gz', partial(gzip.open, compresslevel=6)),
+    'lzma': ('.xz', lzma.open),
+}
+
+_BACKUP_NAME = re.compile(r'^erp_\d{8}_\d{6}\.db\.(gz|xz)$')
+
+
+class BackupError(Exception):
+    """Falha ao criar ou verificar um backup"""
+
+
+@dataclass
+class BackupResult:
+    """Backup criado"""
+    path: str
+    size: int
+    pages: int
+    elapsed: float
+    removed: List[str]
+
+
+def _open_compressed(path: str, mode: str):
+    """Abre um backup .gz ou .xz"""
+    for extension, opener in COMPRESSORS.values():
+        if path.endswith(extension):
+            return opener(path, mode)
+    raise BackupError(f"Formato de backup desconhecido: {path}")
+
+
+def integrity_check(db_path: str):
+    """Executa PRAGMA integrity_check em uma cópia descompactada"""
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    try:
+        result = [row[0] for row in conn.execute('PRAGMA integrity_check')]
+    finally:
+        conn.close()
+    if result != ['ok']:
+        raise BackupError("Falha na verificação de integridade: " + '; '.join(result[:5]))
+
+
+def list_backups(directory: str = BACKUP_DIR) -> List[str]:
+    """Backups existentes, do mais antigo para o mais recente"""
+    if not os.path.isdir(directory):
+        return []
+    names = sorted(name for name in os.listdir(directory) if _BACKUP_NAME.match(name))
+    return [os.path.join(directory, name) for name in names]
+
+
+def rotate_backups(directory: str = BACKUP_DIR, keep: int = KEEP_BACKUPS) -> List[str]:
+    """Remove os backups mais antigos, mantendo os ``keep`` mais recentes"""
+    backups = list_backups(directory)
+    removed = backups[:-keep] if keep > 0 else []
+    for path in removed:
+        os.remove(path)
+    return removed
+
+
+def create_backup(db_path: str, directory: str = BACKUP_DIR, compression: str = 'gzip',
+                  keep: int = KEEP_BACKUPS, pages: int = PAGES_PER_STEP, pause: float = STEP_PAUSE,
+                  progress: Optional[Callable[[int, int], None]] = None) -> BackupResult:
+    """Cria um backup online do banco
+
+    A cópia usa a API de backup do SQLite em etapas de ``pages`` páginas,
+    com ``pause`` segundos entre elas; o banco segue disponível para
+    leitura e escrita durante todo o processo. A cópia é verificada com
+    ``PRAGMA integrity_check`` antes de ser compactada, e só então o
+    arquivo final aparece no diretório (escrita em arquivo temporário e
+    renomeação atômica). ``progress(copiadas, total)`` recebe o andamento.
+    """
+    if compression not in COMPRESSORS:
+        raise BackupError(f"Compressão desconhecida: {compression}")
+    extension, opener = COMPRESSORS[compression]
+    os.makedirs(directory, exist_ok=True)
+    started = time.perf_counter()
+
+    name = f"erp_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db{extension}"
+    final_path = os.path.join(directory, name)
+    fd, copy_path = tempfile.mkstemp(prefix='.tmp_backup_', suffix='.db', dir=directory)
+    os.close(fd)
+    part_path = final_path + '.part'
+
+    try:
+        source = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+        target = sqlite3.connect(copy_path)
+        total_pages = 0
+        try:
+            def on_step(status, remaining, total):
+                nonlocal total_pages
+                total_pages = total
+                if progress is not None:
+                    progress(total - remaining, total)
+
+            # Uma transação de leitura fixa o instantâneo copiado: no modo WAL
+            # os escritores continuam trabalhando e a cópia não recomeça a
+            # cada alteração feita por outra conexão.
+            source.execute('BEGIN')
+            source.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()
+            source.backup(target, pages=pages, progress=on_step, sleep=pause)
+
+            # A cópia herda o modo WAL do original; um arquivo único basta
+            target.execute('PRAGMA journal_mode = DELETE')
+        finally:
+            target.close()
+            source.close()
+
+        integrity_check(copy_path)
+
+        with open(copy_path, 'rb') as src, opener(part_path, 'wb') as dst:
+            shutil.copyfileobj(src, dst, COPY_BUFFER)
+        os.replace(part_path, final_path)
+    except sqlite3.Error as e:
+        raise BackupError(f"Erro ao copiar o banco: {e}") from e
+    finally:
+        for path in (copy_path, part_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    removed = rotate_backups(directory, keep)
+    return BackupResult(final_path, os.path.getsize(final_path), total_pages,
+                        time.perf_counter() - started, removed)
+
+
+def verify_backup(path: str):
+    """Descompacta um backup em arquivo temporário e verifica sua integridade"""
+    fd, copy_path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    try:
+        with _open_compressed(path, 'rb') as src, open(copy_path, 'wb') as dst:
+            shutil.copyfileobj(src, dst, COPY_BUFFER)
+        integrity_check(copy_path)
+    except (OSError, EOFError, lzma.LZMAError, sqlite3.Error) as e:
+        raise BackupError(f"Backup ilegível: {e}") from e
+    finally:
+        os.remove(copy_path)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Backup online do banco do Sistema ERP")
+    parser.add_argument('--db', default=DEFAULT_DATABASE, help="banco de dados SQLite")
+    parser.add_argument('--destino', default=BACKUP_DIR, help="diretório dos backups")
+    parser.add_argument('--compressao', choices=sorted(COMPRESSORS), default='gzip')
+    parser.add_argument('--manter', type=int, default=KEEP_BACKUPS, help="quantidade de backups mantidos")
+    parser.add_argument('--listar', action='store_true', help="lista os backups existentes")
+    parser.add_argument('--verificar', metavar='ARQUIVO', help="verifica a integridade de um backup")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.listar:
+            for path in list_backups(args.destino):
+                print(f"{path}  ({os.path.getsize(path) / 1024:.0f} KB)")
+            return 0
+
+        if args.verificar:
+            verify_backup(args.verificar)
+            print(f"✅ {args.verificar}: integridade verificada")
+            return 0
+
+        if not os.path.exists(args.db):
+            print(f"❌ Banco de dados não encontrado: {args.db}")
+            return 1
+
+        def show_progress(done, total):
+            print(f"\r⏳ {done}/{total} páginas copiadas", end='', flush=True)
+
+        result = create_backup(args.db, args.destino, args.compressao, args.manter,
+                               progress=show_progress)
+    except BackupError as e:
+        print(f"\n❌ {e}")
+        return 1
+
+    print(f"\n✅ Backup criado: {result.path} ({result.size / 1024:.0f} KB, {result.elapsed:.1f}s)")
+    for path in result.removed:
+        print(f"🗑️  Removido backup antigo: {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
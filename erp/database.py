@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sistema ERP - Camada de Banco de Dados
+Pool de conexões SQLite persistentes e gerenciador de banco de dados
+"""
+
+import sqlite3
+import threading
+import queue
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, List, Iterable, Iterator, Optional
+
+from . import DEFAULT_DATABASE
+from .auth import hash_password
+from .migrations import migrate
+from .query_metrics import QueryMetrics, TimedCursor, SLOW_QUERY_MS, explain, metrics_paths
+
+# Ajustes aplicados a cada conexão do pool
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -20000,        # ~20 MB de cache de páginas
+    'mmap_size': 268435456,      # 256 MB mapeados em memória
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,
+    'recursive_triggers': 'ON',  # INSERT OR REPLACE também dispara os gatilhos de DELETE
+}
+
+# Quantidade de instruções preparadas mantidas em cache por conexão
+STATEMENT_CACHE_SIZE = 256
+
+class ConnectionPool:
+    """Pool de conexões SQLite de longa duração, ciente de threads
+
+    Cada thread recebe uma conexão exclusiva enquanto a utiliza. Chamadas
+    aninhadas na mesma thread (por exemplo, dentro de uma transação)
+    reaproveitam a conexão já adquirida.
+    """
+
+    def __init__(self, db_path: str, size: int = 4):
+        self.db_path = db_path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._all = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._held = {}                    # thread -> conexão em uso
+        self._closed = False
+        self.on_wait: Optional[Callable[[float], None]] = None   # recebe a espera (s) por uma conexão
+
+    def _connect(self) -> sqlite3.Connection:
+        """Abre uma nova conexão já configurada"""
+        conn = sqlite3.connect(
+            self.db_path,
+            isolation_level=None,          # transações controladas explicitamente
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        for name, value in PRAGMAS.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _checkout(self) -> sqlite3.Connection:
+        """Retira uma conexão ociosa ou cria uma nova até o limite do pool"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Pool de conexões encerrado")
+            if len(self._all) < self.size:
+                conn = self._connect()
+                self._all.append(conn)
+                return conn
+
+        return self._idle.get()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Empresta uma conexão para a thread atual"""
+        held = getattr(self._local, 'conn', None)
+        if held is not None:
+            yield held
+            return
+
+        started = time.perf_counter()
+        conn = self._checkout()
+        if self.on_wait is not None:
+            self.on_wait(time.perf_counter() - started)
+        self._local.conn = conn
+        self._held[threading.get_ident()] = conn
+        try:
+            yield conn
+        finally:
+            self._held.pop(threading.get_ident(), None)
+            self._local.conn = None
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+
+    def interrupt(self, thread_id: int):
+        """Interrompe a instrução em andamento na conexão usada por outra thread"""
+        conn = self._held.get(thread_id)
+        if conn is not None:
+            conn.interrupt()
+
+    def close(self):
+        """Fecha todas as conexões do pool"""
+        with self._lock:
+            self._closed = True
+            connections, self._all = self._all, []
+        for conn in connections:
+            conn.close()
+
+
+class DatabaseManager:
+    """Gerenciador de banco de dados SQLite
+
+    Toda instrução executada passa pelas métricas de ``self.metrics``
+    (histogramas por instrução, espera por conexão e log das que passam
+    de ``slow_query_ms``); ao fechar, as métricas da sessão são somadas às
+    acumuladas em ``<banco>_metrics.json``, lidas por ``query_metrics.py``.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DATABASE, pool_size: int = 4,
+                 slow_query_ms: float = SLOW_QUERY_MS):
+        self.db_path = db_path
+        self.metrics_path, slow_log = metrics_paths(db_path)
+        self.metrics = QueryMetrics(slow_query_ms, slow_log)
+        self.pool = ConnectionPool(db_path, pool_size)
+        self.pool.on_wait = self.metrics.record_wait
+        self._write_listeners: List[Callable[[], None]] = []
+        self.init_database()
+
+    def init_database(self):
+        """Aplica as migrações pendentes e cria o usuário admin padrão"""
+        migrate(self)
+
+        with self.transaction() as cursor:
+            # Criar usuário admin padrão se não existir
+            cursor.execute('SELECT COUNT(*) FROM users WHERE username = ?', ('admin',))
+            if cursor.fetchone()[0] == 0:
+                password_hash = hash_password('mudar@123')
+                cursor.execute('''
+                    INSERT INTO users (username, password_hash, role, created_date)
+                    VALUES (?, ?, ?, ?)
+                ''', ('admin', password_hash, 'Admin', datetime.now().isoformat()))
+
+    def add_write_listener(self, callback: Callable[[], None]):
+        """Registra uma função chamada após cada escrita confirmada"""
+        self._write_listeners.append(callback)
+
+    def remove_write_listener(self, callback: Callable[[], None]):
+        """Cancela um registro feito com add_write_listener"""
+        if callback in self._write_listeners:
+            self._write_listeners.remove(callback)
+
+    def _notify_write(self):
+        """Avisa os interessados que o banco foi alterado"""
+        for callback in list(self._write_listeners):
+            callback()
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Cursor]:
+        """Executa várias instruções em uma única transação
+
+        Uso:
+            with db.transaction() as cursor:
+                cursor.execute(...)
+                cursor.execute(...)
+
+        Confirma (um único fsync) ao sair do bloco ou desfaz tudo em caso de erro.
+        Transações aninhadas na mesma thread são incorporadas à externa.
+        """
+        with self.pool.connection() as conn:
+            if conn.in_transaction:
+                yield TimedCursor(conn.cursor(), self.metrics)
+                return
+
+            # A espera pelo lock de escrita aparece como o tempo do BEGIN IMMEDIATE
+            started = time.perf_counter()
+            conn.execute('BEGIN IMMEDIATE')
+            self.metrics.record('BEGIN IMMEDIATE', time.perf_counter() - started)
+            try:
+                yield TimedCursor(conn.cursor(), self.metrics)
+            except BaseException:
+                conn.rollback()
+                raise
+            started = time.perf_counter()
+            conn.commit()
+            self.metrics.record('COMMIT', time.perf_counter() - started)
+        self._notify_write()
+
+    def execute_query(self, query: str, params: tuple = ()) -> List[tuple]:
+        """Executa uma query e retorna os resultados"""
+        with self.pool.connection() as conn:
+            changes = conn.total_changes
+            started = time.perf_counter()
+            try:
+                rows = conn.execute(query, params).fetchall()
+            except sqlite3.Error:
+                self.metrics.record(query, time.perf_counter() - started, error=True)
+                raise
+            elapsed = time.perf_counter() - started
+            if self.metrics.record(query, elapsed, len(rows)):
+                self.metrics.log_slow(query, elapsed, len(rows), explain(conn, query, params))
+            changed = conn.total_changes != changes and not conn.in_transaction
+        if changed:
+            self._notify_write()
+        return rows
+
+    def execute_insert(self, query: str, params: tuple = ()) -> bool:
+        """Executa uma query de inserção"""
+        try:
+            with self.transaction() as cursor:
+                cursor.execute(query, params)
+            return True
+        except Exception as e:
+            print(f"Erro ao executar inserção: {e}")
+            return False
+
+    def execute_many(self, query: str, rows: Iterable[tuple]) -> int:
+        """Executa a mesma instrução para várias linhas em uma transação"""
+        with self.transaction() as cursor:
+            cursor.executemany(query, rows)
+            return cursor.rowcount
+
+    def close(self):
+        """Fecha as conexões mantidas pelo pool e grava as métricas da sessão"""
+        self.pool.close()
+        try:
+            self.metrics.save(self.metrics_path)
+        except (OSError, ValueError) as e:
+            print(f"Erro ao gravar métricas de consultas: {e}")
+
+
+class DashboardStats:
+    """Indicadores do dashboard lidos dos contadores agregados
+
+    Os valores vivem na tabela ``dashboard_stats``, atualizada por gatilhos
+    na mesma transação de cada escrita, então nunca ficam defasados. A
+    leitura é uma consulta a poucas linhas, guardada em cache até a próxima
+    escrita confirmada pelo DatabaseManager. Com um ``feed`` (CounterFeed)
+    o cache também é descartado quando outro processo (CLI, servidor web,
+    manutenção) grava no banco.
+    """
+
+    def __init__(self, db: DatabaseManager, feed=None):
+        self.db = db
+        self._cache: Optional[Dict[str, int]] = None
+        self._generation = 0
+        db.add_write_listener(self.invalidate)
+        if feed is not None:
+            feed.subscribe(lambda changes: self.invalidate())
+
+    def invalidate(self):
+        """Descarta os valores em cache"""
+        self._generation += 1
+        self._cache = None
+
+    def snapshot(self) -> Dict[str, int]:
+        """Todos os contadores, por nome"""
+        cache = self._cache
+        if cache is None:
+            generation = self._generation
+            cache = dict(self.db.execute_query('SELECT name, value FROM dashboard_stats'))
+            # Uma escrita durante a leitura invalida o resultado para as próximas chamadas
+            if generation == self._generation:
+                self._cache = cache
+        return cache
+
+    def get(self, name: str) -> int:
+        """Valor de um contador"""
+        return self.snapshot().get(name, 0)
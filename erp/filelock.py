@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+ERP System - Inter-process File Locks
+Advisory locks on a side file, retried with exponential backoff
+"""
+
+import os
+import random
+import time
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+DEFAULT_TIMEOUT = 10.0
+FIRST_DELAY = 0.001
+MAX_DELAY = 0.05
+
+
+class LockTimeout(OSError):
+    """Another process held the lock for longer than the timeout"""
+
+
+class FileLock:
+    """Exclusive advisory lock shared by every process using the same path
+
+    The lock is taken with ``flock`` (POSIX) or ``msvcrt.locking``
+    (Windows) in non-blocking mode; while another process holds it the
+    attempt is retried after a randomized, doubling delay, so waiting
+    sessions neither spin nor wake up in lockstep. Locks only exclude
+    other holders of the same lock file, they do not stop plain readers.
+
+    Not reentrant: each ``FileLock`` must be held by one thread at a time.
+    Separate ``FileLock`` objects on the same path exclude each other even
+    inside one process.
+    """
+
+    def __init__(self, path: str, timeout: float = DEFAULT_TIMEOUT):
+        self.path = path
+        self.timeout = timeout
+        self.waits = 0              # attempts that found the lock taken
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o666)
+
+    def _try_lock(self) -> bool:
+        try:
+            if os.name == 'nt':
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except (BlockingIOError, PermissionError):
+            return False
+        except OSError as e:
+            # msvcrt reports a held lock as EDEADLOCK/EACCES
+            if os.name == 'nt' and e.errno in (13, 36):
+                return False
+            raise
+        return True
+
+    def acquire(self):
+        """Take the lock, raising LockTimeout after ``timeout`` seconds"""
+        deadline = time.monotonic() + self.timeout
+        delay = FIRST_DELAY
+        while not self._try_lock():
+            self.waits += 1
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise LockTimeout(f"{self.path}: bloqueado por outro processo há mais de {self.timeout:g}s")
+            time.sleep(min(remaining, delay * random.uniform(0.5, 1.5)))
+            delay = min(delay * 2, MAX_DELAY)
+
+    def release(self):
+        if os.name == 'nt':
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def close(self):
+        os.close(self._fd)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sistema ERP - Busca Textual
+Busca ranqueada, com trechos destacados, sobre os índices FTS5 do banco
+
+Uso:
+    python -m erp.fulltext "ruído no fuso"
+    python -m erp.fulltext "perda de press" --tipo service_orders --limite 50
+"""
+
+import argparse
+import re
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from . import DEFAULT_DATABASE
+from .database import DatabaseManager
+
+# Marcadores padrão dos termos encontrados nos trechos
+MARKS = ('[', ']')
+SNIPPET_TOKENS = 12
+
+# Consulta de cada tipo de registro. O MATCH, a ordenação por relevância e o
+# LIMIT ficam na subconsulta, sobre o índice FTS5 sozinho, para que o SQLite
+# pare nos primeiros resultados; só então as linhas de origem são lidas
+# pela coluna que liga o índice a elas (número da O.S. ou seq).
+SEARCH_QUERIES = {
+    'service_orders': '''
+        SELECT s.id, s.status, f.snippet, f.rank
+        FROM (SELECT rowid, rank,
+                     snippet(service_orders_fts, 0, ?, ?, '…', ?) AS snippet
+              FROM service_orders_fts WHERE service_orders_fts MATCH ?
+              ORDER BY rank LIMIT ?) AS f
+        JOIN service_orders AS s ON s.number = f.rowid
+        ORDER BY f.rank
+    ''',
+    'equipment': '''
+        SELECT e.id, e.status, f.snippet, f.rank
+        FROM (SELECT rowid, rank,
+                     highlight(equipment_fts, 0, ?1, ?2) || ' · ' ||
+                     highlight(equipment_fts, 1, ?1, ?2) || ' ' ||
+                     highlight(equipment_fts, 2, ?1, ?2) AS snippet
+              FROM equipment_fts WHERE equipment_fts MATCH ?4
+              ORDER BY rank LIMIT ?5) AS f
+        JOIN equipment AS e ON e.seq = f.rowid
+        ORDER BY f.rank
+    ''',
+    'employees': '''
+        SELECT e.id, e.position, f.snippet, f.rank
+        FROM (SELECT rowid, rank, highlight(employees_fts, 0, ?1, ?2) AS snippet
+              FROM employees_fts WHERE employees_fts MATCH ?4
+              ORDER BY rank LIMIT ?5) AS f
+        JOIN employees AS e ON e.seq = f.rowid
+        ORDER BY f.rank
+    ''',
+}
+
+# Índice FTS5 de cada tipo
+FTS_TABLES = {
+    'service_orders': 'service_orders_fts',
+    'equipment': 'equipment_fts',
+    'employees': 'employees_fts',
+}
+
+KIND_LABELS = {
+    'service_orders': 'Ordens de Serviço',
+    'equipment': 'Equipamentos',
+    'employees': 'Funcionários',
+}
+
+# Palavras ignoradas fora de frases ("ruído no fuso" acha "ruído forte do fuso")
+STOPWORDS = {'a', 'o', 'as', 'os', 'e', 'de', 'da', 'do', 'das', 'dos', 'em', 'no', 'na',
+             'nos', 'nas', 'um', 'uma', 'com', 'por', 'para', 'que'}
+
+_TERM = re.compile(r'"([^"]*)"|(\w+)')
+_WORD = re.compile(r'\w+')
+
+
+@dataclass
+class SearchHit:
+    """Um registro encontrado pela busca textual"""
+    kind: str
+    id: str
+    detail: str         # situação da O.S./equipamento ou cargo do funcionário
+    snippet: str
+    rank: float         # bm25: quanto menor, mais relevante
+
+
+def match_expression(text: str) -> Optional[str]:
+    """Converte o texto digitado em uma expressão MATCH do FTS5
+
+    Cada palavra vira um termo entre aspas (o texto do usuário nunca é
+    interpretado como sintaxe do FTS5) e todas precisam aparecer, exceto
+    as ``STOPWORDS``; trechos entre aspas viram frases. A última palavra também casa como prefixo,
+    a menos que o texto termine com espaço, para buscar enquanto se digita.
+    Retorna None se não houver nenhuma palavra.
+    """
+    found = _TERM.findall(text)
+    typing = bool(found) and bool(found[-1][1]) and not text[-1:].isspace()
+    terms = []
+    for position, (phrase, word) in enumerate(found):
+        if phrase:
+            words = _WORD.findall(phrase)
+        elif word.casefold() in STOPWORDS and not (typing and position == len(found) - 1):
+            continue
+        else:
+            words = [word]
+        if words:
+            terms.append('"' + ' '.join(words) + '"')
+    if not terms:
+        return None
+    if typing:
+        terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def search(db, text: str, kind: str = 'service_orders', limit: int = 20,
+           marks: Tuple[str, str] = MARKS) -> List[SearchHit]:
+    """Registros de um tipo que contêm todas as palavras, do mais relevante ao menos"""
+    if kind not in SEARCH_QUERIES:
+        raise ValueError(f"Tipo de busca desconhecido: {kind}")
+    expression = match_expression(text)
+    if expression is None:
+        return []
+    rows = db.execute_query(SEARCH_QUERIES[kind],
+                            (marks[0], marks[1], SNIPPET_TOKENS, expression, limit))
+    return [SearchHit(kind, id, detail or '', snippet, rank) for id, detail, snippet, rank in rows]
+
+
+def search_all(db, text: str, limit: int = 10, kinds: Iterable[str] = tuple(SEARCH_QUERIES),
+               marks: Tuple[str, str] = MARKS) -> Dict[str, List[SearchHit]]:
+    """Até ``limit`` resultados de cada tipo"""
+    return {kind: search(db, text, kind, limit, marks) for kind in kinds}
+
+
+def rebuild(db, kinds: Iterable[str] = tuple(FTS_TABLES)):
+    """Reconstrói os índices a partir das tabelas de origem
+
+    Os gatilhos mantêm os índices em dia; só é necessário se as tabelas
+    forem alteradas com os gatilhos desligados (ou restauradas sem eles).
+    """
+    with db.transaction() as cursor:
+        for kind in kinds:
+            table = FTS_TABLES[kind]
+            cursor.execute(f"INSERT INTO {table} ({table}) VALUES ('rebuild')")
+
+
+def optimize(db, kinds: Iterable[str] = tuple(FTS_TABLES)):
+    """Funde os segmentos dos índices (útil após importações grandes)"""
+    with db.transaction() as cursor:
+        for kind in kinds:
+            table = FTS_TABLES[kind]
+            cursor.execute(f"INSERT INTO {table} ({table}) VALUES ('optimize')")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Busca textual no banco do Sistema ERP")
+    parser.add_argument('texto', help="palavras procuradas (use aspas para frases)")
+    parser.add_argument('--db', default=DEFAULT_DATABASE, help="banco de dados SQLite")
+    parser.add_argument('--tipo', choices=sorted(SEARCH_QUERIES), help="busca apenas um tipo de registro")
+    parser.add_argument('--limite', type=int, default=10, help="resultados por tipo")
+    args = parser.parse_args(argv)
+
+    db = DatabaseManager(args.db)
+    try:
+        started = time.perf_counter()
+        kinds = [args.tipo] if args.tipo else list(SEARCH_QUERIES)
+        results = search_all(db, args.texto, args.limite, kinds, marks=('\033[1;33m', '\033[0m'))
+        elapsed = time.perf_counter() - started
+    finally:
+        db.close()
+
+    for kind, hits in results.items():
+        if not hits:
+            continue
+        print(f"\n{KIND_LABELS[kind]}")
+        for hit in hits:
+            print(f"  {hit.id:<10} {hit.detail:<16} {hit.snippet}")
+    total = sum(len(hits) for hits in results.values())
+    print(f"\n{total} resultado(s) em {elapsed * 1000:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
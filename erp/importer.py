@@ -0,0 +1,529 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sistema ERP - Importação em Massa
+Carrega funcionários, equipamentos, ordens de serviço e orçamentos de arquivos CSV ou JSON
+
+Uso:
+    python -m erp.importer dados.json
+    python -m erp.importer funcionarios.csv --tabela employees
+    python -m erp.importer ordens.csv --tabela service_orders --atualizar --rejeitados rejeitados.csv
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from . import DEFAULT_DATABASE
+from .database import DatabaseManager
+
+# Linhas por transação
+CHUNK_SIZE = 10000
+
+# Seções do formato demo_data.json e nomes aceitos para --tabela
+SECTION_TABLES = {
+    'employees': 'employees',
+    'funcionarios': 'employees',
+    'equipment': 'equipment',
+    'equipamentos': 'equipment',
+    'service_orders': 'service_orders',
+    'ordens': 'service_orders',
+    'budgets': 'budgets',
+    'orcamentos': 'budgets',
+}
+
+# Colunas de cada tabela, na ordem do INSERT
+TABLE_COLUMNS = {
+    'employees': ('id', 'name', 'position', 'department', 'hire_date', 'salary', 'active'),
+    'equipment': ('id', 'name', 'type', 'brand', 'model', 'serial_number', 'purchase_date', 'status',
+                  'maintenance_interval', 'last_maintenance', 'next_maintenance'),
+    'service_orders': ('id', 'employee_id', 'equipment_id', 'description', 'priority', 'status',
+                       'created_date', 'due_date', 'client', 'technician', 'equipment_name', 'closed_date',
+                       'number'),
+    'budgets': ('id', 'client', 'description', 'value', 'status', 'created_date', 'valid_until'),
+}
+
+ACTIVE_WORDS = {'1', 'true', 'sim', 's', 'ativo', 'ativa', 'yes', 'y'}
+INACTIVE_WORDS = {'0', 'false', 'nao', 'não', 'n', 'inativo', 'inativa', 'desligado', 'no'}
+
+_THOUSANDS = re.compile(r'^\d{1,3}(\.\d{3})+$')
+_ORDER_CODE = re.compile(r'^OS(\d{1,15})$', re.IGNORECASE)
+
+
+class RowError(ValueError):
+    """Registro rejeitado na validação"""
+
+
+@dataclass
+class ImportReport:
+    """Resultado de uma importação"""
+    imported: Dict[str, int] = field(default_factory=dict)
+    skipped: Dict[str, int] = field(default_factory=dict)      # já existiam (sem --atualizar)
+    rejected: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def total_imported(self) -> int:
+        return sum(self.imported.values())
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.total_imported / self.elapsed if self.elapsed else 0.0
+
+
+# --------------------------------------------------------------- conversões
+
+def parse_money(value: Any) -> float:
+    """Converte valores como "R$ 5.500,00", "5500.50" ou 5500 em float"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        amount = float(value)
+    else:
+        text = str(value or '').replace('R$', '').replace('\xa0', '').replace(' ', '')
+        if not text:
+            raise RowError("salário vazio")
+        if ',' in text:
+            text = text.replace('.', '').replace(',', '.')
+        elif text.count('.') > 1 or _THOUSANDS.match(text):
+            text = text.replace('.', '')
+        try:
+            amount = float(text)
+        except ValueError:
+            raise RowError(f"valor monetário inválido: {value!r}")
+    if amount < 0:
+        raise RowError(f"valor negativo: {value!r}")
+    return amount
+
+
+@lru_cache(maxsize=65536)
+def _normalize_date(text: str) -> Optional[str]:
+    """AAAA-MM-DD de uma data válida, ou None (datas se repetem muito: cache)"""
+    for fmt in ('%Y-%m-%d', '%d/%m/%Y'):
+        try:
+            return datetime.strptime(text[:10], fmt).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    return None
+
+
+def parse_date(value: Any, name: str) -> str:
+    """Aceita AAAA-MM-DD ou DD/MM/AAAA (com hora opcional) e devolve AAAA-MM-DD"""
+    text = str(value or '').strip()
+    if not text:
+        raise RowError(f"{name} vazia")
+    date = _normalize_date(text)
+    if date is None:
+        raise RowError(f"{name} inválida: {value!r}")
+    return date
+
+
+def parse_number(value: Any, code: Any = None) -> Optional[int]:
+    """Número da O.S.: o informado, o do código "OS1234" ou nenhum (o banco escolhe)"""
+    if value is None or str(value).strip() == '':
+        match = _ORDER_CODE.match(str(code or '').strip())
+        return (int(match.group(1)) or None) if match else None
+    try:
+        number = int(str(value).strip())
+    except ValueError:
+        raise RowError(f"número de O.S. inválido: {value!r}")
+    if number <= 0:
+        raise RowError(f"número de O.S. inválido: {value!r}")
+    return number
+
+
+def parse_maintenance(record: Dict[str, Any]) -> Tuple[Optional[int], Optional[str], Optional[str]]:
+    """(intervalo em dias, última, próxima) da manutenção preventiva de um equipamento
+
+    Sem intervalo informado, ele é a distância entre a última e a próxima;
+    sem a próxima, ela é a última mais o intervalo.
+    """
+    last = record.get('last_maintenance') or record.get('ultima_manutencao')
+    next_date = record.get('next_maintenance') or record.get('proxima_manutencao')
+    interval = record.get('maintenance_interval') or record.get('intervalo_manutencao')
+    last = parse_date(last, 'data da última manutenção') if last else None
+    next_date = parse_date(next_date, 'data da próxima manutenção') if next_date else None
+    if interval is not None and str(interval).strip() != '':
+        try:
+            interval = int(str(interval).strip())
+        except ValueError:
+            raise RowError(f"intervalo de manutenção inválido: {interval!r}")
+        if interval <= 0:
+            raise RowError(f"intervalo de manutenção inválido: {interval!r}")
+    elif last and next_date and next_date > last:
+        interval = (datetime.fromisoformat(next_date) - datetime.fromisoformat(last)).days
+    else:
+        interval = None
+    if next_date is None and last and interval:
+        next_date = (datetime.fromisoformat(last) + timedelta(days=interval)).strftime('%Y-%m-%d')
+    return interval, last, next_date
+
+
+def parse_active(record: Dict[str, Any]) -> int:
+    """Situação do funcionário a partir de 'active' ou 'status'"""
+    value = record.get('active', record.get('status', 1))
+    if isinstance(value, bool) or isinstance(value, int):
+        return 1 if value else 0
+    word = str(value).strip().lower()
+    if word in ACTIVE_WORDS:
+        return 1
+    if word in INACTIVE_WORDS:
+        return 0
+    raise RowError(f"situação desconhecida: {value!r}")
+
+
+def required(record: Dict[str, Any], *names: str) -> str:
+    """Primeiro campo preenchido entre ``names``"""
+    for name in names:
+        value = record.get(name)
+        if value is not None and str(value).strip():
+            return str(value).strip()
+    raise RowError(f"campo obrigatório ausente: {names[0]}")
+
+
+def optional(record: Dict[str, Any], name: str, default: str = '') -> str:
+    value = record.get(name)
+    return str(value).strip() if value is not None else default
+
+
+class Converter:
+    """Transforma registros de entrada em tuplas prontas para o INSERT
+
+    Ordens de serviço no formato demo_data.json referenciam técnico e
+    equipamento pelo nome; os nomes são resolvidos para os códigos já
+    gravados no banco (consulta feita uma vez, na primeira ordem). Nomes
+    sem cadastro, como os das ordens da CLI, ficam só como texto.
+    """
+
+    def __init__(self, db: DatabaseManager):
+        self.db = db
+        self._employee_ids: Optional[Dict[str, str]] = None
+        self._equipment_ids: Optional[Dict[str, str]] = None
+
+    def convert(self, table: str, record: Dict[str, Any]) -> tuple:
+        if not isinstance(record, dict):
+            raise RowError("registro não é um objeto")
+        return getattr(self, f'_{table}')(record)
+
+    def _employees(self, r: Dict[str, Any]) -> tuple:
+        return (
+            required(r, 'id'),
+            required(r, 'name', 'nome'),
+            required(r, 'position', 'cargo'),
+            required(r, 'department', 'departamento'),
+            parse_date(r.get('hire_date', r.get('data_admissao')), 'data de admissão'),
+            parse_money(r.get('salary', r.get('salario'))),
+            parse_active(r),
+        )
+
+    def _equipment(self, r: Dict[str, Any]) -> tuple:
+        purchase = r.get('purchase_date') or r.get('data_compra')
+        interval, last, next_date = parse_maintenance(r)
+        return (
+            required(r, 'id'),
+            required(r, 'name', 'nome'),
+            required(r, 'type', 'tipo'),
+            optional(r, 'brand'),
+            optional(r, 'model'),
+            optional(r, 'serial_number'),
+            parse_date(purchase, 'data de compra') if purchase else '',
+            optional(r, 'status', 'Ativo') or 'Ativo',
+            interval,
+            last,
+            next_date,
+        )
+
+    def _service_orders(self, r: Dict[str, Any]) -> tuple:
+        created = parse_date(r.get('created_date'), 'data de abertura')
+        due = r.get('due_date')
+        closed = r.get('closed_date')
+        employee_id, technician = self._reference(r, 'employee_id', 'technician', 'employees')
+        equipment_id, equipment_name = self._reference(r, 'equipment_id', 'equipment', 'equipment',
+                                                       'equipment_name')
+        return (
+            required(r, 'id'),
+            employee_id,
+            equipment_id,
+            required(r, 'description', 'problem'),
+            required(r, 'priority'),
+            required(r, 'status'),
+            created,
+            parse_date(due, 'data prevista') if due else created,
+            optional(r, 'client'),
+            optional(r, 'technician') or technician,
+            optional(r, 'equipment_name') or equipment_name,
+            parse_date(closed, 'data de conclusão') if closed else None,
+            parse_number(r.get('number'), r.get('id')),
+        )
+
+    def _budgets(self, r: Dict[str, Any]) -> tuple:
+        valid = r.get('valid_until')
+        return (
+            required(r, 'id'),
+            required(r, 'client', 'cliente'),
+            required(r, 'description', 'descricao'),
+            parse_money(r.get('value', r.get('valor'))),
+            required(r, 'status'),
+            parse_date(r.get('created_date'), 'data de criação'),
+            parse_date(valid, 'validade') if valid else None,
+        )
+
+    def _reference(self, r: Dict[str, Any], id_field: str, name_field: str, table: str,
+                   *other_names: str) -> Tuple[str, str]:
+        """(código, nome): código informado diretamente ou resolvido pelo nome"""
+        code = r.get(id_field)
+        if code:
+            return str(code).strip(), ''
+        name = required(r, name_field, *other_names)
+        codes = self._codes(table)
+        return codes.get(' '.join(name.split()).casefold(), ''), name
+
+    def _codes(self, table: str) -> Dict[str, str]:
+        attr = '_employee_ids' if table == 'employees' else '_equipment_ids'
+        codes = getattr(self, attr)
+        if codes is None:
+            codes = {' '.join(name.split()).casefold(): code
+                     for name, code in self.db.execute_query(f'SELECT name, id FROM {table}')}
+            setattr(self, attr, codes)
+        return codes
+
+
+# ------------------------------------------------------------------ leitura
+
+def iter_json_sections(stream: TextIO, chunk_size: int = 1 << 16) -> Iterator[Tuple[str, Any]]:
+    """Lê ``{"seção": [registro, ...], ...}`` registro a registro
+
+    Apenas o registro atual fica em memória, então arquivos no formato
+    demo_data.json com centenas de milhares de registros são lidos sem
+    carregar o documento inteiro. Valores que não são listas são ignorados.
+    """
+    decoder = json.JSONDecoder()
+    buf = ''
+    pos = 0
+    eof = False
+
+    def fill() -> bool:
+        nonlocal buf, pos, eof
+        if eof:
+            return False
+        data = stream.read(chunk_size)
+        if not data:
+            eof = True
+            return False
+        buf = buf[pos:] + data
+        pos = 0
+        return True
+
+    def skip_ws():
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in ' \t\r\n':
+                pos += 1
+            if pos < len(buf) or not fill():
+                return
+
+    def expect(chars: str) -> str:
+        skip_ws()
+        if pos >= len(buf) or buf[pos] not in chars:
+            found = buf[pos:pos + 20] if pos < len(buf) else 'fim do arquivo'
+            raise ValueError(f"JSON inválido: esperado {chars!r}, encontrado {found!r}")
+        return buf[pos]
+
+    def value():
+        nonlocal pos
+        skip_ws()
+        while True:
+            try:
+                result, end = decoder.raw_decode(buf, pos)
+            except ValueError:
+                if fill():
+                    continue
+                raise
+            # Um número no fim do buffer pode continuar no próximo bloco
+            if end == len(buf) and fill():
+                continue
+            pos = end
+            return result
+
+    if buf == '' and not fill():
+        return
+    expect('{')
+    pos += 1
+    if expect('}"') == '}':
+        return
+    while True:
+        section = value()
+        expect(':')
+        pos += 1
+        if expect('[{"-0123456789tfn') == '[':
+            pos += 1
+            if expect(']{["-0123456789tfn') == ']':
+                pos += 1
+            else:
+                while True:
+                    yield section, value()
+                    if expect(',]') == ']':
+                        pos += 1
+                        break
+                    pos += 1
+        else:
+            value()
+        if expect(',}') == '}':
+            return
+        pos += 1
+
+
+def iter_records(path: str, table: Optional[str] = None) -> Iterator[Tuple[str, Any]]:
+    """(tabela, registro) de um arquivo CSV, JSON Lines ou JSON"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        if table is None:
+            raise ValueError("Arquivos CSV exigem --tabela")
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            sample = f.read(4096)
+            f.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+            except csv.Error:
+                dialect = csv.excel
+            for record in csv.DictReader(f, dialect=dialect):
+                yield table, record
+    elif extension == '.jsonl':
+        if table is None:
+            raise ValueError("Arquivos JSON Lines exigem --tabela")
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield table, json.loads(line)
+    else:
+        with open(path, encoding='utf-8') as f:
+            for section, record in iter_json_sections(f):
+                target = SECTION_TABLES.get(section)
+                if target is not None and (table is None or target == table):
+                    yield target, record
+
+
+# -------------------------------------------------------------- importação
+
+def insert_statement(table: str, update: bool) -> str:
+    """INSERT em massa; sem ``update`` registros existentes são mantidos"""
+    columns = TABLE_COLUMNS[table]
+    placeholders = ', '.join('?' for _ in columns)
+    if not update:
+        return f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+    # O número de uma O.S. existente nunca muda
+    assignments = ', '.join(f'{c} = excluded.{c}' for c in columns[1:] if c != 'number')
+    return (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders}) "
+            f"ON CONFLICT(id) DO UPDATE SET {assignments}")
+
+
+def import_file(db: DatabaseManager, path: str, table: Optional[str] = None,
+                update: bool = False, chunk_size: int = CHUNK_SIZE,
+                rejects: Optional[TextIO] = None,
+                progress: Optional[Callable[[ImportReport], None]] = None) -> ImportReport:
+    """Importa um arquivo em transações de ``chunk_size`` linhas
+
+    Registros inválidos não interrompem a importação: são contados e,
+    se ``rejects`` for informado, gravados em CSV com o motivo.
+    """
+    report = ImportReport()
+    converter = Converter(db)
+    batches: Dict[str, List[tuple]] = {}
+    reject_writer = csv.writer(rejects) if rejects is not None else None
+    if reject_writer is not None:
+        reject_writer.writerow(['tabela', 'registro', 'motivo', 'dados'])
+    started = time.perf_counter()
+
+    def flush(target: str):
+        rows = batches.pop(target, [])
+        if not rows:
+            return
+        with db.transaction() as cursor:
+            cursor.executemany(insert_statement(target, update), rows)
+            written = cursor.rowcount
+        report.imported[target] = report.imported.get(target, 0) + written
+        if len(rows) > written:
+            report.skipped[target] = report.skipped.get(target, 0) + len(rows) - written
+        report.elapsed = time.perf_counter() - started
+        if progress is not None:
+            progress(report)
+
+    current = None
+    for number, (target, record) in enumerate(iter_records(path, table), 1):
+        if target != current:
+            # Seções seguintes (ex.: ordens) podem referenciar as anteriores
+            for pending in list(batches):
+                flush(pending)
+            current = target
+        try:
+            row = converter.convert(target, record)
+        except RowError as e:
+            report.rejected += 1
+            if reject_writer is not None:
+                reject_writer.writerow([target, number, str(e), json.dumps(record, ensure_ascii=False)])
+            continue
+
+        batch = batches.setdefault(target, [])
+        batch.append(row)
+        if len(batch) >= chunk_size:
+            flush(target)
+
+    for pending in list(batches):
+        flush(pending)
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
+def print_progress(report: ImportReport):
+    """Linha de progresso atualizada no lugar"""
+    parts = [f"{name}: {count:,}".replace(',', '.') for name, count in report.imported.items()]
+    print(f"\r⏳ {' | '.join(parts)} | rejeitados: {report.rejected} "
+          f"({report.rows_per_second:,.0f} linhas/s)".replace(',', '.'), end='', flush=True)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Importação em massa para o banco do Sistema ERP")
+    parser.add_argument('arquivo', help="arquivo .csv, .jsonl ou .json (formato demo_data.json)")
+    parser.add_argument('--tabela', choices=sorted(SECTION_TABLES),
+                        help="tabela de destino (obrigatória para CSV e JSON Lines)")
+    parser.add_argument('--db', default=DEFAULT_DATABASE, help="banco de dados SQLite")
+    parser.add_argument('--atualizar', action='store_true',
+                        help="atualiza registros com o mesmo código em vez de ignorá-los")
+    parser.add_argument('--lote', type=int, default=CHUNK_SIZE, help="linhas por transação")
+    parser.add_argument('--rejeitados', help="CSV onde gravar os registros rejeitados")
+    args = parser.parse_args(argv)
+
+    table = SECTION_TABLES[args.tabela] if args.tabela else None
+    db = DatabaseManager(args.db)
+    rejects = open(args.rejeitados, 'w', newline='', encoding='utf-8') if args.rejeitados else None
+    try:
+        report = import_file(db, args.arquivo, table, update=args.atualizar,
+                             chunk_size=args.lote, rejects=rejects, progress=print_progress)
+    except (OSError, ValueError) as e:
+        print(f"\n❌ Erro na importação: {e}")
+        return 1
+    finally:
+        if rejects is not None:
+            rejects.close()
+        db.close()
+
+    print()
+    for name, count in report.imported.items():
+        skipped = report.skipped.get(name, 0)
+        extra = f" ({skipped} já existiam)" if skipped else ""
+        print(f"✅ {name}: {count} importados{extra}")
+    if report.rejected:
+        destination = f" — detalhes em {args.rejeitados}" if args.rejeitados else ""
+        print(f"⚠️  {report.rejected} registros rejeitados{destination}")
+    print(f"⏱️  {report.elapsed:.2f}s ({report.rows_per_second:,.0f} linhas/s)".replace(',', '.'))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
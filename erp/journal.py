@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+"""
+ERP System - Journaled JSON Storage
+Crash-safe append-only journal with background snapshot compaction,
+shared safely by several CLI processes
+"""
+
+import os
+import json
+import threading
+from collections.abc import Mapping
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .filelock import FileLock, DEFAULT_TIMEOUT
+
+
+def _file_version(path: str) -> Optional[Tuple[int, int, int]]:
+    """Identity of a file's current contents (replaced files get a new inode)"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+
+def _fsync_directory(path: str):
+    """Make a rename durable by syncing its directory (no-op on Windows)"""
+    if os.name == 'nt':
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class JournaledStore(Mapping):
+    """Dictionary persisted as a JSON snapshot plus a JSON Lines journal
+
+    The snapshot keeps the original ``json.dump(..., indent=2)`` layout, so
+    files written by older versions load unchanged. Each mutation appends
+    one record to ``<path>.journal`` instead of rewriting the snapshot:
+
+        {"op": "set", "key": ..., "value": ...}
+        {"op": "update", "key": ..., "fields": {...}}
+        {"op": "delete", "key": ...}
+
+    Records are fsynced in group commits: concurrent writers waiting on
+    durability share a single fsync, and ``batch()`` makes several
+    mutations durable together. Once enough records accumulate the
+    journal is rotated and folded into a new snapshot by a background
+    thread, using write-to-temp plus atomic rename. All operations are
+    idempotent, so replaying a rotated journal over a snapshot that
+    already contains it is harmless after a crash.
+
+    Reads go straight to the in-memory dictionary. Values returned by
+    ``[]`` must not be mutated in place; use ``update()`` instead.
+
+    Several processes may open the same file. Every journal write and
+    every compaction happens under an advisory lock on ``<path>.lock``
+    (retried with backoff, ``LockTimeout`` after ``lock_timeout``
+    seconds). Holding the lock, the store first catches up: records other
+    processes appended since its last write are replayed from the journal
+    offset it remembers, and a snapshot or journal replaced by another
+    process's compaction triggers a full reload. Its own queued records
+    are then re-applied on top, so ``update()`` merges field by field with
+    whatever the other sessions wrote. Read-modify-write sequences such as
+    counters go through ``modify()``, which computes the new values while
+    holding the lock. ``refresh()`` catches up without writing, and
+    ``subscribe()`` tells derived indexes which keys changed.
+    """
+
+    def __init__(self, path: str, default: Optional[Dict[str, Any]] = None,
+                 compact_every: int = 1000, sync_snapshots: bool = False,
+                 lock_timeout: float = DEFAULT_TIMEOUT):
+        self.path = path
+        self.journal_path = path + '.journal'
+        self.rotated_path = path + '.journal.old'
+        self.compact_every = compact_every
+        self.sync_snapshots = sync_snapshots
+        self.data: Dict[str, Any] = {}
+        self._default = default
+
+        self._lock = threading.Lock()
+        self._flushed = threading.Condition(self._lock)
+        self._pending = []
+        self._appended = 0          # sequence number of the last record appended
+        self._durable = 0           # sequence number of the last record fsynced
+        self._flushing = False
+        self._since_snapshot = 0
+        self._local = threading.local()
+        self._compactor = None
+        self._compact_lock = threading.Lock()
+        self._subscribers = []
+
+        # What this process has read: snapshot version, journal file and offset
+        self._snapshot_version = None
+        self._journal_id = None
+        self._offset = 0
+        self._file_lock = FileLock(path + '.lock', lock_timeout)
+
+        try:
+            with self._file_lock:
+                if self._load() == 0 and not os.path.exists(self.path) and default is not None:
+                    self._write_snapshot(json.dumps(self.data, indent=2, ensure_ascii=False))
+                    self._snapshot_version = _file_version(self.path)
+        except BaseException:
+            self._file_lock.close()
+            raise
+
+    # ----------------------------------------------------------------- loading
+
+    def _load(self) -> int:
+        """Read the snapshot and replay any journal left behind; called with the file lock held"""
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.data = json.load(f)
+        else:
+            self.data = json.loads(json.dumps(self._default)) if self._default is not None else {}
+        self._snapshot_version = _file_version(self.path)
+        self._notify(None)
+
+        replayed = self._replay(self.rotated_path)[0]
+        count, self._offset = self._replay(self.journal_path)
+        self._since_snapshot = replayed + count
+        self._journal_id = self._journal_file()[0]
+        return replayed + count
+
+    def _journal_file(self) -> Tuple[Optional[Tuple[int, int]], int]:
+        """Identity and size of the active journal (None, 0 if there is none)"""
+        try:
+            st = os.stat(self.journal_path)
+        except FileNotFoundError:
+            return None, 0
+        return (st.st_dev, st.st_ino), st.st_size
+
+    def _replay(self, path: str, offset: int = 0) -> Tuple[int, int]:
+        """Apply every complete record of a journal file from ``offset``
+
+        Returns the number of records applied and the offset just past them.
+        """
+        if not os.path.exists(path):
+            return 0, 0
+
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            raw = f.read()
+        # A record is complete only with its newline: whatever follows the last
+        # one was cut short by a crash, even if it happens to parse. Keeping it
+        # would glue the next append onto the same line. Lines stay in bytes so
+        # the offsets count what is on disk, whatever an invalid byte decodes to.
+        *lines, tail = raw.split(b'\n')
+
+        count = 0
+        good_bytes = 0
+        for number, line in enumerate(lines, 1):
+            if line.strip():
+                try:
+                    record = json.loads(line.decode('utf-8', errors='replace'))
+                except ValueError:
+                    # Only the tail can be torn by a crash in the middle of a write
+                    if tail.strip() or any(rest.strip() for rest in lines[number:]):
+                        raise ValueError(f"{path}: registro corrompido na linha {number}")
+                    self._truncate(path, offset + good_bytes)
+                    return count, offset + good_bytes
+                self._apply(record)
+                count += 1
+            good_bytes += len(line) + 1
+        if tail:
+            self._truncate(path, offset + good_bytes)
+            return count, offset + good_bytes
+        return count, offset + len(raw)
+
+    @staticmethod
+    def _truncate(path: str, size: int):
+        """Drop a torn tail; called with the file lock held"""
+        with open(path, 'r+b') as f:
+            f.truncate(size)
+
+    def _catch_up_locked(self):
+        """Apply what other processes wrote since our last look
+
+        Called with both locks held. Queued records of this process were
+        applied before the foreign ones, so they are applied again on top
+        to match the order they will have in the journal.
+        """
+        journal_id, journal_size = self._journal_file()
+        if (_file_version(self.path) != self._snapshot_version or journal_id != self._journal_id
+                or journal_size < self._offset):
+            # Another process compacted the store: start over from its files
+            self._load()
+            changed = True
+        elif journal_size > self._offset:
+            count, self._offset = self._replay(self.journal_path, self._offset)
+            self._since_snapshot += count
+            changed = count > 0
+        else:
+            changed = False
+
+        if changed:
+            for line in self._pending:
+                self._apply(json.loads(line))
+
+    def _apply(self, record: Dict[str, Any]):
+        """Apply one journal record to the in-memory dictionary"""
+        op, key = record['op'], record['key']
+        if op == 'set':
+            self.data[key] = record['value']
+        elif op == 'update':
+            current = self.data.get(key)
+            merged = dict(current) if isinstance(current, dict) else {}
+            merged.update(record['fields'])
+            self.data[key] = merged
+        elif op == 'delete':
+            self.data.pop(key, None)
+        else:
+            raise ValueError(f"Operação de journal desconhecida: {op}")
+        self._notify(key)
+
+    def _notify(self, key: Optional[str]):
+        """Tell the subscribers that ``key`` changed (None: everything was reloaded)"""
+        for callback in self._subscribers:
+            callback(key)
+
+    @staticmethod
+    def quarantine(path: str):
+        """Move the unreadable files of a store aside so it can start fresh"""
+        for name in (path, path + '.journal.old', path + '.journal'):
+            if os.path.exists(name):
+                os.replace(name, name + '.corrupt')
+
+    # ----------------------------------------------------------------- mapping
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+    # --------------------------------------------------------------- mutations
+
+    def put(self, key: str, value: Any):
+        """Replace the value stored under ``key``"""
+        self._append({'op': 'set', 'key': key, 'value': value})
+
+    def update(self, key: str, fields: Dict[str, Any]):
+        """Merge ``fields`` into the record stored under ``key``"""
+        self._append({'op': 'update', 'key': key, 'fields': fields})
+
+    def delete(self, key: str):
+        """Remove ``key`` from the store"""
+        self._append({'op': 'delete', 'key': key})
+
+    @contextmanager
+    def batch(self):
+        """Group several mutations into a single durable commit"""
+        depth = getattr(self._local, 'batch_depth', 0)
+        self._local.batch_depth = depth + 1
+        try:
+            yield self
+        finally:
+            self._local.batch_depth = depth
+        if depth == 0:
+            self._commit(getattr(self._local, 'last_seq', 0))
+
+    def modify(self, fn: Callable[[Mapping], Dict[str, Any]]) -> Dict[str, Any]:
+        """Read-modify-write that no other process can interleave with
+
+        ``fn`` receives the store with every process's records applied and
+        returns ``{key: new value}``; the values are stored and made durable
+        before the lock is released. ``fn`` runs with the locks held, so it
+        must be quick and must not mutate the store itself. Returns what
+        ``fn`` returned.
+        """
+        def compute():
+            values = fn(self)
+            for key, value in values.items():
+                self._queue_locked({'op': 'set', 'key': key, 'value': value})
+            return values
+
+        with self._lock:
+            while self._flushing:
+                self._flushed.wait()
+            values = self._flush_pending_locked(compute)
+        self._after_commit()
+        return values
+
+    def refresh(self):
+        """Pick up records written by other processes (and flush our own)"""
+        with self._lock:
+            while self._flushing:
+                self._flushed.wait()
+            self._flush_pending_locked()
+
+    def subscribe(self, callback: Callable[[Optional[str]], None]):
+        """Call ``callback(key)`` whenever a key changes in memory, whichever process wrote it
+
+        ``callback(None)`` means the whole store was reloaded. Callbacks run
+        with the store's lock held, so they must only take note of the key.
+        """
+        self._subscribers.append(callback)
+
+    @property
+    def version(self) -> tuple:
+        """Snapshot version, journal file, offset and local sequence: changes whenever ``data`` may have"""
+        with self._lock:
+            return self._snapshot_version, self._journal_id, self._offset, self._appended
+
+    def _queue_locked(self, record: Dict[str, Any]) -> int:
+        """Apply a record in memory and queue its journal line; called with the lock held"""
+        self._apply(record)
+        self._pending.append(json.dumps(record, ensure_ascii=False) + '\n')
+        self._appended += 1
+        self._since_snapshot += 1
+        return self._appended
+
+    def _append(self, record: Dict[str, Any]):
+        """Apply a record in memory and queue it for the journal"""
+        with self._lock:
+            seq = self._queue_locked(record)
+        self._local.last_seq = seq
+
+        if not getattr(self._local, 'batch_depth', 0):
+            self._commit(seq)
+
+    def _commit(self, seq: int):
+        """Block until record ``seq`` is on disk, sharing fsyncs with other writers"""
+        with self._lock:
+            while self._durable < seq:
+                if self._flushing:
+                    self._flushed.wait()
+                    continue
+                self._flush_pending_locked()
+        self._after_commit()
+
+    def _after_commit(self):
+        if self.sync_snapshots:
+            self.compact()
+        elif self.compact_every and self._since_snapshot >= self.compact_every:
+            self.compact_in_background()
+
+    def _flush_pending_locked(self, compute: Optional[Callable[[], Any]] = None):
+        """Catch up and write and fsync queued records under the file lock
+
+        Called with the lock held and no flush running. ``compute`` runs
+        after catching up and may queue more records; its result is returned.
+        """
+        self._flushing = True
+        self._lock.release()
+        lines = []
+        try:
+            with self._file_lock:
+                with self._lock:
+                    self._catch_up_locked()
+                    result = compute() if compute is not None else None
+                    lines, self._pending = self._pending, []
+                    target = self._appended
+                if lines:
+                    self._write_journal(''.join(lines))
+        except BaseException:
+            self._lock.acquire()
+            self._pending[:0] = lines
+            self._flushing = False
+            self._flushed.notify_all()
+            raise
+        self._lock.acquire()
+        self._flushing = False
+        self._durable = max(self._durable, target)
+        self._flushed.notify_all()
+        return result
+
+    def _write_journal(self, text: str):
+        """Append and fsync journal lines; called with the file lock held
+
+        The journal is only open while the lock is held, so other processes
+        (on Windows too) can rename it during compaction.
+        """
+        data = text.encode('utf-8')
+        with open(self.journal_path, 'ab') as journal:
+            journal.write(data)
+            journal.flush()
+            os.fsync(journal.fileno())
+            st = os.fstat(journal.fileno())
+        self._journal_id = (st.st_dev, st.st_ino)
+        self._offset += len(data)
+
+    # -------------------------------------------------------------- compaction
+
+    def compact_in_background(self):
+        """Start a compaction thread unless one is already running"""
+        with self._compact_lock:
+            if self._compactor is not None and self._compactor.is_alive():
+                return
+            self._compactor = threading.Thread(target=self.compact, name='journal-compactor', daemon=True)
+            self._compactor.start()
+
+    def compact(self):
+        """Fold the journal into a fresh snapshot
+
+        The file lock is held throughout, so the snapshot includes every
+        process's records and no other process appends to a journal that
+        is about to be folded away. Writers of this process keep queueing
+        records in memory meanwhile.
+        """
+        with self._lock:
+            while self._flushing:
+                self._flushed.wait()
+            self._flushing = True
+        lines = []
+        try:
+            with self._file_lock:
+                with self._lock:
+                    self._catch_up_locked()
+                    lines, self._pending = self._pending, []
+                    target = self._appended
+                    snapshot = json.dumps(self.data, indent=2, ensure_ascii=False)
+                if lines:
+                    self._write_journal(''.join(lines))
+                with self._lock:
+                    self._durable = max(self._durable, target)
+                    lines = []
+                    self._since_snapshot = len(self._pending)
+
+                self._rotate_journal()
+                self._write_snapshot(snapshot)
+                if os.path.exists(self.rotated_path):
+                    os.remove(self.rotated_path)
+                self._snapshot_version = _file_version(self.path)
+        finally:
+            with self._lock:
+                self._pending[:0] = lines
+                self._flushing = False
+                self._flushed.notify_all()
+
+    def _rotate_journal(self):
+        """Move the active journal aside; called with the file lock held"""
+        if not os.path.exists(self.journal_path):
+            return
+        if os.path.exists(self.rotated_path):
+            # A previous compaction never finished: keep its records too
+            with open(self.journal_path, 'rb') as src, open(self.rotated_path, 'ab') as dst:
+                dst.write(src.read())
+                dst.flush()
+                os.fsync(dst.fileno())
+            os.remove(self.journal_path)
+        else:
+            os.replace(self.journal_path, self.rotated_path)
+        _fsync_directory(self.journal_path)
+        self._journal_id = None
+        self._offset = 0
+
+    def _write_snapshot(self, text: str):
+        """Atomically replace the snapshot file"""
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        _fsync_directory(self.path)
+
+    def close(self):
+        """Wait for background compaction, flush and release the lock file"""
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+        with self._lock:
+            while self._flushing:
+                self._flushed.wait()
+            try:
+                if self._pending:
+                    self._flush_pending_locked()
+            finally:
+                self._file_lock.close()
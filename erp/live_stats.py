@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sistema ERP - Contadores ao Vivo
+Avisa os interessados (barra de status e dashboard da GUI, painel da CLI,
+clientes SSE do servidor web) quando os contadores de ``dashboard_stats``
+mudam, enviando só os que mudaram
+
+Uma única thread por processo observa ``PRAGMA data_version`` em uma
+conexão própria: o valor muda quando qualquer outra conexão, deste ou de
+outro processo, confirma uma escrita, e consultá-lo não lê nenhuma página
+do banco. Só então os contadores (poucas linhas) são relidos, uma vez,
+e as diferenças repassadas a todos os inscritos. Escritas feitas pelo
+DatabaseManager do próprio processo acordam a thread na hora.
+
+Uso:
+    python -m erp.live_stats --db outro.db    # mostra as mudanças no terminal
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from . import DEFAULT_DATABASE
+
+# Intervalo entre verificações de data_version (escritas de outros processos)
+POLL_INTERVAL = float(os.environ.get('ERP_LIVE_POLL_MS', 250)) / 1000
+
+Changes = Dict[str, int]
+
+
+class CounterFeed:
+    """Contadores do dashboard com aviso de mudança para vários inscritos
+
+    ``subscribe(callback)`` devolve os valores atuais e, a cada mudança,
+    chama ``callback(mudanças)`` com ``{nome: valor novo}`` apenas dos
+    contadores alterados. Os callbacks rodam na thread do observador e
+    devem ser rápidos (a GUI só enfileira para a thread do Tk); um
+    callback que falha é descadastrado.
+    """
+
+    def __init__(self, db_path: str, db=None, interval: float = POLL_INTERVAL):
+        self.db_path = db_path
+        self.db = db
+        self.interval = interval
+        self.version = 0                   # mudanças publicadas desde a abertura
+        self._values: Changes = {}
+        self._data_version = None
+        self._subscribers: List[Callable[[Changes], None]] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+
+        self._conn = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+        self._conn.execute('PRAGMA query_only = ON')
+        self._conn.execute('PRAGMA busy_timeout = 5000')
+        self._check()
+        if db is not None:
+            db.add_write_listener(self._wake.set)
+        self._thread = threading.Thread(target=self._run, name='erp-live-stats', daemon=True)
+        self._thread.start()
+
+    def snapshot(self) -> Changes:
+        """Valores atuais de todos os contadores, sem consultar o banco"""
+        with self._lock:
+            return dict(self._values)
+
+    def get(self, name: str) -> int:
+        with self._lock:
+            return self._values.get(name, 0)
+
+    def subscribe(self, callback: Callable[[Changes], None]) -> Changes:
+        """Inscreve ``callback`` e devolve os valores atuais"""
+        with self._lock:
+            self._subscribers.append(callback)
+            return dict(self._values)
+
+    def unsubscribe(self, callback: Callable[[Changes], None]):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._closed:
+                return
+            try:
+                self._check()
+            except sqlite3.Error as e:
+                print(f"Erro ao ler contadores do dashboard: {e}")
+
+    def _check(self):
+        """Relê os contadores se o banco mudou e publica as diferenças"""
+        data_version = self._conn.execute('PRAGMA data_version').fetchone()[0]
+        if data_version == self._data_version:
+            return
+        self._data_version = data_version
+        values = dict(self._conn.execute('SELECT name, value FROM dashboard_stats'))
+        changes = {name: value for name, value in values.items() if self._values.get(name) != value}
+        if not changes:
+            return
+        with self._lock:
+            self._values = values
+            self.version += 1
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(changes)
+            except Exception as e:
+                print(f"Erro ao avisar mudança de contadores (inscrição cancelada): {e}")
+                self.unsubscribe(callback)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        if self.db is not None:
+            self.db.remove_write_listener(self._wake.set)
+        self._wake.set()
+        self._thread.join()
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Acompanha os contadores do dashboard do Sistema ERP")
+    parser.add_argument('--db', default=DEFAULT_DATABASE)
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.db):
+        print(f"❌ Banco não encontrado: {args.db}")
+        return 1
+
+    def show(changes: Changes):
+        values = ', '.join(f'{name}={value}' for name, value in sorted(changes.items()))
+        print(f"{time.strftime('%H:%M:%S')}  {values}")
+
+    with CounterFeed(args.db) as feed:
+        show(feed.subscribe(show))
+        print("⏳ Aguardando mudanças (Ctrl+C para sair)...")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sistema ERP - Manutenção Preventiva
+Abre as O.S. preventivas dos equipamentos conforme as datas programadas vencem
+
+Os vencimentos ficam em um heap em memória com apenas uma janela de datas
+(até ``HORIZON_DAYS`` dias à frente), carregada pelo índice de
+``equipment.next_maintenance``: nenhuma execução percorre a tabela inteira.
+Quando uma preventiva é concluída, um gatilho reprograma o equipamento e
+registra o código em ``maintenance_changes``; o agendador relê apenas
+esses equipamentos. Cada vencimento é reservado no banco antes de virar
+O.S., então várias sessões podem gerar preventivas no mesmo banco sem
+abrir ordens repetidas.
+
+Uso:
+    python -m erp.maintenance --db outro.db                 # próximas preventivas
+    python -m erp.maintenance --gerar                       # abre as O.S. que venceram
+    python -m erp.maintenance --gerar --a-cada 3600         # continua gerando a cada hora
+"""
+
+import argparse
+import heapq
+import os
+import sys
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import DEFAULT_DATABASE
+from .database import DatabaseManager
+from .storage.service_orders import FIRST_NUMBER
+
+# Dias à frente mantidos no heap (além da antecedência)
+HORIZON_DAYS = 60
+# A O.S. preventiva é aberta esta quantidade de dias antes da data programada
+LEAD_DAYS = int(os.environ.get('ERP_MAINTENANCE_LEAD_DAYS', 7))
+# O.S. abertas por transação
+BATCH_SIZE = 1000
+# Mudanças guardadas em maintenance_changes; acima de RELOAD_CHANGES pendentes
+# (ou se as que faltam já foram apagadas) o agendador recarrega a janela
+CHANGES_KEPT = 100000
+RELOAD_CHANGES = 20000
+PREVENTIVE_PRIORITY = 'Média'
+# Códigos por consulta ao reler equipamentos alterados
+_IN_CHUNK = 500
+
+
+class MaintenanceScheduler:
+    """Fila de vencimentos das preventivas de um banco
+
+    ``generate()`` abre, em lotes, uma O.S. preventiva para cada equipamento
+    cuja próxima manutenção cai em até ``lead_days`` dias e devolve os
+    números das ordens. Enquanto a ordem está aberta o equipamento fica sem
+    próxima data; ao concluí-la, o gatilho da migração 8 programa a seguinte
+    a partir da data de conclusão. Um agendador por sessão (não é seguro
+    entre threads).
+    """
+
+    def __init__(self, db: DatabaseManager, horizon_days: int = HORIZON_DAYS, lead_days: int = LEAD_DAYS):
+        self.db = db
+        self.horizon_days = horizon_days
+        self.lead_days = lead_days
+        self._heap: List[Tuple[str, str]] = []
+        self._due: Dict[str, str] = {}           # data em vigor de cada equipamento no heap
+        self._loaded_until: Optional[str] = None  # o heap tem todo vencimento anterior a esta data
+        self._seq = 0                             # última mudança lida de maintenance_changes
+
+    def __len__(self) -> int:
+        """Vencimentos na janela carregada"""
+        return len(self._due)
+
+    # ------------------------------------------------------------- fila
+
+    def _push(self, code: str, due: str):
+        self._due[code] = due
+        heapq.heappush(self._heap, (due, code))
+
+    def _reload(self, until: str):
+        """Descarta o heap e carrega todos os vencimentos anteriores a ``until``"""
+        # O seq vem antes das datas: uma mudança entre as duas consultas só é relida depois
+        self._seq = self.db.execute_query('SELECT COALESCE(MAX(seq), 0) FROM maintenance_changes')[0][0]
+        rows = self.db.execute_query(
+            'SELECT id, next_maintenance FROM equipment WHERE next_maintenance < ?', (until,))
+        self._due = dict(rows)
+        self._heap = [(due, code) for code, due in rows]
+        heapq.heapify(self._heap)
+        self._loaded_until = until
+
+    def _extend(self, until: str):
+        """Acrescenta os vencimentos entre o fim da janela e ``until``"""
+        for code, due in self.db.execute_query(
+                'SELECT id, next_maintenance FROM equipment WHERE next_maintenance >= ? AND next_maintenance < ?',
+                (self._loaded_until, until)):
+            self._push(code, due)
+        self._loaded_until = until
+
+    def _apply_changes(self):
+        """Relê só os equipamentos com mudanças desde a última leitura"""
+        changes = self.db.execute_query(
+            'SELECT seq, equipment_id FROM maintenance_changes WHERE seq > ? ORDER BY seq', (self._seq,))
+        if not changes:
+            return
+        if changes[0][0] != self._seq + 1 or len(changes) > RELOAD_CHANGES:
+            self._reload(self._loaded_until)
+            return
+
+        codes = list(dict.fromkeys(code for _, code in changes))
+        current: Dict[str, Optional[str]] = {}
+        for start in range(0, len(codes), _IN_CHUNK):
+            chunk = codes[start:start + _IN_CHUNK]
+            current.update(self.db.execute_query(
+                f"SELECT id, next_maintenance FROM equipment WHERE id IN ({', '.join('?' for _ in chunk)})",
+                tuple(chunk)))
+        for code in codes:
+            due = current.get(code)
+            if due is not None and due < self._loaded_until:
+                if self._due.get(code) != due:
+                    self._push(code, due)
+            else:
+                self._due.pop(code, None)
+        self._seq = changes[-1][0]
+
+        # Entradas vencidas pelas mudanças ficam no heap até sair; reconstrói se acumularem
+        if len(self._heap) > 2 * len(self._due) + 1000:
+            self._heap = [(due, code) for code, due in self._due.items()]
+            heapq.heapify(self._heap)
+
+    def refresh(self, today: Optional[str] = None):
+        """Atualiza a janela até ``today`` + antecedência + horizonte e aplica as mudanças"""
+        today = today or date.today().isoformat()
+        until = (date.fromisoformat(today) + timedelta(days=self.lead_days + self.horizon_days)).isoformat()
+        if self._loaded_until is None:
+            self._reload(until)
+            return
+        self._apply_changes()
+        if until > self._loaded_until:
+            self._extend(until)
+
+    # ------------------------------------------------------------- geração
+
+    def generate(self, today: Optional[str] = None, limit: Optional[int] = None) -> List[int]:
+        """Abre as O.S. preventivas vencidas até ``today`` + antecedência; devolve os números"""
+        today = today or date.today().isoformat()
+        self.refresh(today)
+        horizon = (date.fromisoformat(today) + timedelta(days=self.lead_days)).isoformat()
+        due = []
+        while self._heap and self._heap[0][0] <= horizon and (limit is None or len(due) < limit):
+            when, code = heapq.heappop(self._heap)
+            if self._due.get(code) == when:
+                del self._due[code]
+                due.append((code, when))
+
+        created: List[int] = []
+        for start in range(0, len(due), BATCH_SIZE):
+            created.extend(self._open_orders(due[start:start + BATCH_SIZE], today))
+        if created:
+            with self.db.transaction() as cursor:
+                cursor.execute('DELETE FROM maintenance_changes WHERE seq <= '
+                               '(SELECT MAX(seq) FROM maintenance_changes) - ?', (CHANGES_KEPT,))
+        return created
+
+    def _open_orders(self, batch: List[Tuple[str, str]], today: str) -> List[int]:
+        """Uma transação: reserva cada vencimento e abre a O.S. dos que ainda estavam de pé"""
+        numbers = []
+        with self.db.transaction() as cursor:
+            cursor.execute('SELECT MAX(number) FROM service_orders')
+            number = max((cursor.fetchone()[0] or 0) + 1, FIRST_NUMBER)
+            for code, when in batch:
+                # Outra sessão pode ter aberto esta O.S., ou a data mudou depois da leitura
+                cursor.execute('UPDATE equipment SET next_maintenance = NULL WHERE id = ? AND next_maintenance = ?',
+                               (code, when))
+                if not cursor.rowcount:
+                    continue
+                problem = f"Manutenção preventiva programada para {date.fromisoformat(when):%d/%m/%Y}"
+                # Códigos gravados por importações podem coincidir com "OS<número>"
+                while True:
+                    cursor.execute(
+                        'INSERT OR IGNORE INTO service_orders (number, id, employee_id, equipment_id, description, '
+                        'priority, status, created_date, due_date, client, technician, equipment_name, '
+                        'closed_date, preventive) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1)',
+                        (number, f'OS{number}', '', code, problem, PREVENTIVE_PRIORITY, 'Em Aberto', today,
+                         when, '', '', '', None)
+                    )
+                    if cursor.rowcount:
+                        break
+                    number += 1
+                numbers.append(number)
+                number += 1
+        return numbers
+
+    # ------------------------------------------------------------- consulta
+
+    def upcoming(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Próximas preventivas programadas, mais próximas primeiro (pelo índice)"""
+        rows = self.db.execute_query(
+            'SELECT id, name, next_maintenance, last_maintenance, maintenance_interval FROM equipment '
+            'WHERE next_maintenance IS NOT NULL ORDER BY next_maintenance LIMIT ?', (limit,))
+        return [dict(zip(('id', 'name', 'next_maintenance', 'last_maintenance', 'maintenance_interval'), row))
+                for row in rows]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Manutenção preventiva do Sistema ERP")
+    parser.add_argument('--db', default=DEFAULT_DATABASE)
+    parser.add_argument('--gerar', action='store_true', help="abre as O.S. preventivas vencidas")
+    parser.add_argument('--data', metavar='AAAA-MM-DD', help="data de referência (padrão: hoje)")
+    parser.add_argument('--a-cada', type=float, metavar='SEGUNDOS', help="repete a geração neste intervalo")
+    parser.add_argument('--linhas', type=int, default=20, help="próximas preventivas mostradas")
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.db):
+        print(f"❌ Banco não encontrado: {args.db}")
+        return 1
+    if args.data:
+        try:
+            date.fromisoformat(args.data)
+        except ValueError:
+            print("❌ Use a data no formato AAAA-MM-DD")
+            return 1
+
+    db = DatabaseManager(args.db)
+    try:
+        scheduler = MaintenanceScheduler(db)
+        if args.gerar:
+            while True:
+                started = time.perf_counter()
+                created = scheduler.generate(args.data)
+                print(f"{time.strftime('%H:%M:%S')}  ✅ {len(created)} O.S. preventivas abertas "
+                      f"em {time.perf_counter() - started:.2f}s ({len(scheduler)} vencimentos na janela)")
+                if not args.a_cada:
+                    break
+                try:
+                    time.sleep(args.a_cada)
+                except KeyboardInterrupt:
+                    break
+        for item in scheduler.upcoming(args.linhas):
+            print(f"{item['id']:<10} {item['name'][:35]:<35} {item['next_maintenance']}  "
+                  f"(a cada {item['maintenance_interval']} dias)")
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
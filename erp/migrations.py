@@ -0,0 +1,644 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sistema ERP - Migrações de Esquema
+Versões ordenadas do esquema SQLite e verificação dos planos de consulta
+"""
+
+import re
+import sys
+import sqlite3
+from datetime import datetime
+from typing import Iterator, List, Tuple
+
+# Migrações em ordem: (versão, descrição, script SQL)
+# Nunca altere uma migração já publicada; acrescente uma nova no final.
+MIGRATIONS: List[Tuple[int, str, str]] = [
+    (1, 'Tabelas principais', '''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            role TEXT NOT NULL,
+            created_date TEXT NOT NULL,
+            last_login TEXT,
+            active BOOLEAN DEFAULT 1
+        );
+
+        CREATE TABLE IF NOT EXISTS employees (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            position TEXT NOT NULL,
+            department TEXT NOT NULL,
+            hire_date TEXT NOT NULL,
+            salary REAL NOT NULL,
+            active BOOLEAN DEFAULT 1
+        );
+
+        CREATE TABLE IF NOT EXISTS equipment (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            type TEXT NOT NULL,
+            brand TEXT NOT NULL,
+            model TEXT NOT NULL,
+            serial_number TEXT NOT NULL,
+            purchase_date TEXT NOT NULL,
+            status TEXT DEFAULT 'Ativo'
+        );
+
+        CREATE TABLE IF NOT EXISTS service_orders (
+            id TEXT PRIMARY KEY,
+            employee_id TEXT NOT NULL,
+            equipment_id TEXT NOT NULL,
+            description TEXT NOT NULL,
+            priority TEXT NOT NULL,
+            status TEXT NOT NULL,
+            created_date TEXT NOT NULL,
+            due_date TEXT NOT NULL,
+            FOREIGN KEY (employee_id) REFERENCES employees (id),
+            FOREIGN KEY (equipment_id) REFERENCES equipment (id)
+        );
+    '''),
+
+    (2, 'Contadores agregados do dashboard', '''
+        CREATE TABLE IF NOT EXISTS dashboard_stats (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+
+        INSERT OR IGNORE INTO dashboard_stats (name, value)
+            SELECT 'employees_total', COUNT(*) FROM employees;
+        INSERT OR IGNORE INTO dashboard_stats (name, value)
+            SELECT 'employees_active', COUNT(*) FROM employees WHERE active = 1;
+        INSERT OR IGNORE INTO dashboard_stats (name, value)
+            SELECT 'equipment_total', COUNT(*) FROM equipment;
+        INSERT OR IGNORE INTO dashboard_stats (name, value)
+            SELECT 'service_orders_open', COUNT(*) FROM service_orders WHERE status != 'Concluída';
+
+        CREATE TRIGGER IF NOT EXISTS employees_stats_insert AFTER INSERT ON employees BEGIN
+            UPDATE dashboard_stats SET value = value + 1 WHERE name = 'employees_total';
+            UPDATE dashboard_stats SET value = value + (NEW.active IS 1) WHERE name = 'employees_active';
+        END;
+        CREATE TRIGGER IF NOT EXISTS employees_stats_delete AFTER DELETE ON employees BEGIN
+            UPDATE dashboard_stats SET value = value - 1 WHERE name = 'employees_total';
+            UPDATE dashboard_stats SET value = value - (OLD.active IS 1) WHERE name = 'employees_active';
+        END;
+        CREATE TRIGGER IF NOT EXISTS employees_stats_update AFTER UPDATE OF active ON employees BEGIN
+            UPDATE dashboard_stats SET value = value + (NEW.active IS 1) - (OLD.active IS 1)
+                WHERE name = 'employees_active';
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS equipment_stats_insert AFTER INSERT ON equipment BEGIN
+            UPDATE dashboard_stats SET value = value + 1 WHERE name = 'equipment_total';
+        END;
+        CREATE TRIGGER IF NOT EXISTS equipment_stats_delete AFTER DELETE ON equipment BEGIN
+            UPDATE dashboard_stats SET value = value - 1 WHERE name = 'equipment_total';
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS service_orders_stats_insert AFTER INSERT ON service_orders BEGIN
+            UPDATE dashboard_stats SET value = value + (NEW.status IS NOT 'Concluída')
+                WHERE name = 'service_orders_open';
+        END;
+        CREATE TRIGGER IF NOT EXISTS service_orders_stats_delete AFTER DELETE ON service_orders BEGIN
+            UPDATE dashboard_stats SET value = value - (OLD.status IS NOT 'Concluída')
+                WHERE name = 'service_orders_open';
+        END;
+        CREATE TRIGGER IF NOT EXISTS service_orders_stats_update AFTER UPDATE OF status ON service_orders BEGIN
+            UPDATE dashboard_stats
+                SET value = value + (NEW.status IS NOT 'Concluída') - (OLD.status IS NOT 'Concluída')
+                WHERE name = 'service_orders_open';
+        END;
+    '''),
+
+    (3, 'Índices para os filtros mais usados', '''
+        -- Login: cobre o filtro e as colunas retornadas
+        CREATE INDEX IF NOT EXISTS idx_users_login
+            ON users (username, password_hash, active, id, role);
+
+        -- Lista de funcionários ativos, em ordem de nome
+        CREATE INDEX IF NOT EXISTS idx_employees_active
+            ON employees (active, name);
+
+        -- Ordens por situação e pelas chaves estrangeiras
+        CREATE INDEX IF NOT EXISTS idx_service_orders_status
+            ON service_orders (status, created_date);
+        CREATE INDEX IF NOT EXISTS idx_service_orders_employee
+            ON service_orders (employee_id, status);
+        CREATE INDEX IF NOT EXISTS idx_service_orders_equipment
+            ON service_orders (equipment_id, status);
+    '''),
+
+    (4, 'Índices de paginação da lista de funcionários', '''
+        -- Paginação por chave na lista virtual, para cada coluna ordenável
+        CREATE INDEX IF NOT EXISTS idx_employees_active_id
+            ON employees (active, id);
+        CREATE INDEX IF NOT EXISTS idx_employees_active_name
+            ON employees (active, name, id);
+        CREATE INDEX IF NOT EXISTS idx_employees_active_position
+            ON employees (active, position, id);
+        CREATE INDEX IF NOT EXISTS idx_employees_active_department
+            ON employees (active, department, id);
+        CREATE INDEX IF NOT EXISTS idx_employees_active_hire_date
+            ON employees (active, hire_date, id);
+        CREATE INDEX IF NOT EXISTS idx_employees_active_salary
+            ON employees (active, salary, id);
+
+        -- Substituído por idx_employees_active_name
+        DROP INDEX IF EXISTS idx_employees_active;
+    '''),
+
+    (5, 'Busca textual (FTS5)', '''
+        -- Índices externos: o texto fica só nas tabelas de origem, ligado pelo rowid
+        CREATE VIRTUAL TABLE IF NOT EXISTS service_orders_fts USING fts5(
+            description,
+            content='service_orders', tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        );
+        CREATE VIRTUAL TABLE IF NOT EXISTS equipment_fts USING fts5(
+            name, brand, model,
+            content='equipment', tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        );
+        CREATE VIRTUAL TABLE IF NOT EXISTS employees_fts USING fts5(
+            name,
+            content='employees', tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        );
+
+        -- O nome do equipamento pesa mais que marca e modelo
+        INSERT INTO equipment_fts (equipment_fts, rank) VALUES ('rank', 'bm25(2.0, 1.0, 1.0)');
+
+        CREATE TRIGGER IF NOT EXISTS service_orders_fts_insert AFTER INSERT ON service_orders BEGIN
+            INSERT INTO service_orders_fts (rowid, description) VALUES (NEW.rowid, NEW.description);
+        END;
+        CREATE TRIGGER IF NOT EXISTS service_orders_fts_delete AFTER DELETE ON service_orders BEGIN
+            INSERT INTO service_orders_fts (service_orders_fts, rowid, description)
+                VALUES ('delete', OLD.rowid, OLD.description);
+        END;
+        CREATE TRIGGER IF NOT EXISTS service_orders_fts_update AFTER UPDATE OF description ON service_orders BEGIN
+            INSERT INTO service_orders_fts (service_orders_fts, rowid, description)
+                VALUES ('delete', OLD.rowid, OLD.description);
+            INSERT INTO service_orders_fts (rowid, description) VALUES (NEW.rowid, NEW.description);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS equipment_fts_insert AFTER INSERT ON equipment BEGIN
+            INSERT INTO equipment_fts (rowid, name, brand, model)
+                VALUES (NEW.rowid, NEW.name, NEW.brand, NEW.model);
+        END;
+        CREATE TRIGGER IF NOT EXISTS equipment_fts_delete AFTER DELETE ON equipment BEGIN
+            INSERT INTO equipment_fts (equipment_fts, rowid, name, brand, model)
+                VALUES ('delete', OLD.rowid, OLD.name, OLD.brand, OLD.model);
+        END;
+        CREATE TRIGGER IF NOT EXISTS equipment_fts_update AFTER UPDATE OF name, brand, model ON equipment BEGIN
+            INSERT INTO equipment_fts (equipment_fts, rowid, name, brand, model)
+                VALUES ('delete', OLD.rowid, OLD.name, OLD.brand, OLD.model);
+            INSERT INTO equipment_fts (rowid, name, brand, model)
+                VALUES (NEW.rowid, NEW.name, NEW.brand, NEW.model);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS employees_fts_insert AFTER INSERT ON employees BEGIN
+            INSERT INTO employees_fts (rowid, name) VALUES (NEW.rowid, NEW.name);
+        END;
+        CREATE TRIGGER IF NOT EXISTS employees_fts_delete AFTER DELETE ON employees BEGIN
+            INSERT INTO employees_fts (employees_fts, rowid, name) VALUES ('delete', OLD.rowid, OLD.name);
+        END;
+        CREATE TRIGGER IF NOT EXISTS employees_fts_update AFTER UPDATE OF name ON employees BEGIN
+            INSERT INTO employees_fts (employees_fts, rowid, name) VALUES ('delete', OLD.rowid, OLD.name);
+            INSERT INTO employees_fts (rowid, name) VALUES (NEW.rowid, NEW.name);
+        END;
+
+        -- Indexa o que já existe
+        INSERT INTO service_orders_fts (service_orders_fts) VALUES ('rebuild');
+        INSERT INTO equipment_fts (equipment_fts) VALUES ('rebuild');
+        INSERT INTO employees_fts (employees_fts) VALUES ('rebuild');
+    '''),
+
+    (6, 'Armazenamento comum da CLI e da GUI', '''
+        -- Ordens abertas pela CLI: cliente e nomes livres de técnico e equipamento.
+        -- O número da O.S. mostrado na CLI é o rowid da linha.
+        ALTER TABLE service_orders ADD COLUMN client TEXT NOT NULL DEFAULT '';
+        ALTER TABLE service_orders ADD COLUMN technician TEXT NOT NULL DEFAULT '';
+        ALTER TABLE service_orders ADD COLUMN equipment_name TEXT NOT NULL DEFAULT '';
+        ALTER TABLE service_orders ADD COLUMN closed_date TEXT;
+
+        -- Mais recentes primeiro por situação (a entrada do índice termina no rowid)
+        CREATE INDEX IF NOT EXISTS idx_service_orders_status_number
+            ON service_orders (status);
+        CREATE INDEX IF NOT EXISTS idx_service_orders_client
+            ON service_orders (client COLLATE NOCASE);
+        CREATE INDEX IF NOT EXISTS idx_service_orders_technician
+            ON service_orders (technician COLLATE NOCASE);
+        CREATE INDEX IF NOT EXISTS idx_service_orders_created
+            ON service_orders (created_date);
+
+        -- Ordens como a CLI as mostra: número, nomes livres ou resolvidos pelos cadastros
+        CREATE VIEW IF NOT EXISTS service_orders_view AS
+            SELECT so.rowid AS number, so.id, so.client,
+                   COALESCE(NULLIF(so.equipment_name, ''), eq.name, so.equipment_id) AS equipment,
+                   so.description AS problem,
+                   COALESCE(NULLIF(so.technician, ''), emp.name, so.employee_id) AS technician,
+                   so.priority, so.status, so.created_date, so.closed_date, so.due_date,
+                   so.employee_id, so.equipment_id
+            FROM service_orders so
+            LEFT JOIN employees emp ON emp.id = so.employee_id
+            LEFT JOIN equipment eq ON eq.id = so.equipment_id;
+
+        CREATE TABLE IF NOT EXISTS budgets (
+            id TEXT PRIMARY KEY,
+            client TEXT NOT NULL,
+            description TEXT NOT NULL,
+            value REAL NOT NULL,
+            status TEXT NOT NULL,
+            created_date TEXT NOT NULL,
+            valid_until TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_budgets_status
+            ON budgets (status, created_date);
+
+        INSERT OR IGNORE INTO dashboard_stats (name, value)
+            SELECT 'service_orders_total', COUNT(*) FROM service_orders;
+        INSERT OR IGNORE INTO dashboard_stats (name, value)
+            SELECT 'budgets_approved', COUNT(*) FROM budgets WHERE status = 'Aprovado';
+
+        CREATE TRIGGER IF NOT EXISTS service_orders_total_insert AFTER INSERT ON service_orders BEGIN
+            UPDATE dashboard_stats SET value = value + 1 WHERE name = 'service_orders_total';
+        END;
+        CREATE TRIGGER IF NOT EXISTS service_orders_total_delete AFTER DELETE ON service_orders BEGIN
+            UPDATE dashboard_stats SET value = value - 1 WHERE name = 'service_orders_total';
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS budgets_stats_insert AFTER INSERT ON budgets BEGIN
+            UPDATE dashboard_stats SET value = value + (NEW.status IS 'Aprovado')
+                WHERE name = 'budgets_approved';
+        END;
+        CREATE TRIGGER IF NOT EXISTS budgets_stats_delete AFTER DELETE ON budgets BEGIN
+            UPDATE dashboard_stats SET value = value - (OLD.status IS 'Aprovado')
+                WHERE name = 'budgets_approved';
+        END;
+        CREATE TRIGGER IF NOT EXISTS budgets_stats_update AFTER UPDATE OF status ON budgets BEGIN
+            UPDATE dashboard_stats
+                SET value = value + (NEW.status IS 'Aprovado') - (OLD.status IS 'Aprovado')
+                WHERE name = 'budgets_approved';
+        END;
+    '''),
+
+    (7, 'Contador de O.S. ainda não iniciadas', '''
+        -- Ordens na situação 'Em Aberto' (o painel da CLI as mostra à parte das pendentes)
+        INSERT OR IGNORE INTO dashboard_stats (name, value)
+            SELECT 'service_orders_new', COUNT(*) FROM service_orders WHERE status = 'Em Aberto';
+
+        CREATE TRIGGER IF NOT EXISTS service_orders_new_insert AFTER INSERT ON service_orders BEGIN
+            UPDATE dashboard_stats SET value = value + (NEW.status IS 'Em Aberto')
+                WHERE name = 'service_orders_new';
+        END;
+        CREATE TRIGGER IF NOT EXISTS service_orders_new_delete AFTER DELETE ON service_orders BEGIN
+            UPDATE dashboard_stats SET value = value - (OLD.status IS 'Em Aberto')
+                WHERE name = 'service_orders_new';
+        END;
+        CREATE TRIGGER IF NOT EXISTS service_orders_new_update AFTER UPDATE OF status ON service_orders BEGIN
+            UPDATE dashboard_stats
+                SET value = value + (NEW.status IS 'Em Aberto') - (OLD.status IS 'Em Aberto')
+                WHERE name = 'service_orders_new';
+        END;
+    '''),
+
+    (8, 'Manutenção preventiva', '''
+        -- Intervalo em dias entre preventivas (NULL: equipamento sem plano) e datas da
+        -- última e da próxima. Enquanto a O.S. preventiva está aberta, a próxima fica NULL.
+        ALTER TABLE equipment ADD COLUMN maintenance_interval INTEGER;
+        ALTER TABLE equipment ADD COLUMN last_maintenance TEXT;
+        ALTER TABLE equipment ADD COLUMN next_maintenance TEXT;
+        -- O.S. geradas pelo plano de manutenção (o MTBF conta só as corretivas)
+        ALTER TABLE service_orders ADD COLUMN preventive INTEGER NOT NULL DEFAULT 0;
+
+        -- A fila de vencimentos: o agendador lê só as datas de uma janela
+        CREATE INDEX IF NOT EXISTS idx_equipment_next_maintenance
+            ON equipment (next_maintenance) WHERE next_maintenance IS NOT NULL;
+
+        -- Equipamentos cuja próxima preventiva mudou, em ordem; cada agendador
+        -- guarda o último seq lido e relê só esses equipamentos
+        CREATE TABLE IF NOT EXISTS maintenance_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            equipment_id TEXT NOT NULL
+        );
+
+        CREATE TRIGGER IF NOT EXISTS equipment_schedule_insert AFTER INSERT ON equipment
+        WHEN NEW.next_maintenance IS NOT NULL BEGIN
+            INSERT INTO maintenance_changes (equipment_id) VALUES (NEW.id);
+        END;
+        CREATE TRIGGER IF NOT EXISTS equipment_schedule_update AFTER UPDATE OF next_maintenance ON equipment
+        WHEN NEW.next_maintenance IS NOT OLD.next_maintenance BEGIN
+            INSERT INTO maintenance_changes (equipment_id) VALUES (NEW.id);
+        END;
+
+        -- Concluir a preventiva reprograma o equipamento a partir da data de conclusão
+        CREATE TRIGGER IF NOT EXISTS preventive_orders_close AFTER UPDATE OF status ON service_orders
+        WHEN NEW.preventive AND NEW.status = 'Concluída' AND OLD.status IS NOT 'Concluída' BEGIN
+            UPDATE equipment
+                SET last_maintenance = COALESCE(NEW.closed_date, date('now', 'localtime')),
+                    next_maintenance = CASE WHEN maintenance_interval > 0 THEN
+                        date(COALESCE(NEW.closed_date, date('now', 'localtime')),
+                             '+' || maintenance_interval || ' days') END
+                WHERE id = NEW.equipment_id;
+        END;
+        -- Preventiva aberta apagada: o equipamento volta à fila com a data que tinha
+        CREATE TRIGGER IF NOT EXISTS preventive_orders_delete AFTER DELETE ON service_orders
+        WHEN OLD.preventive AND OLD.status IS NOT 'Concluída' BEGIN
+            UPDATE equipment SET next_maintenance = OLD.due_date
+                WHERE id = OLD.equipment_id AND next_maintenance IS NULL AND maintenance_interval > 0;
+        END;
+    '''),
+
+    (9, 'Número da O.S. em coluna própria', '''
+        -- O rowid de uma tabela com chave TEXT pode mudar num VACUUM; o número
+        -- mostrado ao usuário passa a ser uma coluna, preenchida com o rowid atual
+        ALTER TABLE service_orders ADD COLUMN number INTEGER;
+        UPDATE service_orders SET number = rowid;
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_service_orders_number
+            ON service_orders (number);
+
+        -- Ordem gravada sem número recebe o próximo (a partir de 1001, como na CLI)
+        CREATE TRIGGER IF NOT EXISTS service_orders_number_insert AFTER INSERT ON service_orders
+        WHEN NEW.number IS NULL BEGIN
+            UPDATE service_orders
+                SET number = MAX(COALESCE((SELECT MAX(number) FROM service_orders), 0) + 1, 1001)
+                WHERE rowid = NEW.rowid;
+        END;
+
+        -- Mais recentes primeiro por situação, cliente e técnico
+        DROP INDEX IF EXISTS idx_service_orders_status_number;
+        CREATE INDEX IF NOT EXISTS idx_service_orders_status_number
+            ON service_orders (status, number);
+        DROP INDEX IF EXISTS idx_service_orders_client;
+        CREATE INDEX IF NOT EXISTS idx_service_orders_client
+            ON service_orders (client COLLATE NOCASE, number);
+        DROP INDEX IF EXISTS idx_service_orders_technician;
+        CREATE INDEX IF NOT EXISTS idx_service_orders_technician
+            ON service_orders (technician COLLATE NOCASE, number);
+
+        DROP VIEW IF EXISTS service_orders_view;
+        CREATE VIEW service_orders_view AS
+            SELECT so.number, so.id, so.client,
+                   COALESCE(NULLIF(so.equipment_name, ''), eq.name, so.equipment_id) AS equipment,
+                   so.description AS problem,
+                   COALESCE(NULLIF(so.technician, ''), emp.name, so.employee_id) AS technician,
+                   so.priority, so.status, so.created_date, so.closed_date, so.due_date,
+                   so.employee_id, so.equipment_id
+            FROM service_orders so
+            LEFT JOIN employees emp ON emp.id = so.employee_id
+            LEFT JOIN equipment eq ON eq.id = so.equipment_id;
+    '''),
+
+    (10, 'Busca textual ligada a colunas estáveis', '''
+        -- Os índices FTS5 ligavam-se ao rowid implícito de tabelas com chave TEXT,
+        -- que um VACUUM pode renumerar. Passam a usar o número da O.S. e uma
+        -- coluna seq de funcionários e equipamentos, preenchida com o rowid atual.
+        ALTER TABLE employees ADD COLUMN seq INTEGER;
+        UPDATE employees SET seq = rowid;
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_employees_seq ON employees (seq);
+        ALTER TABLE equipment ADD COLUMN seq INTEGER;
+        UPDATE equipment SET seq = rowid;
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_equipment_seq ON equipment (seq);
+
+        DROP TRIGGER IF EXISTS service_orders_fts_insert;
+        DROP TRIGGER IF EXISTS service_orders_fts_delete;
+        DROP TRIGGER IF EXISTS service_orders_fts_update;
+        DROP TRIGGER IF EXISTS equipment_fts_insert;
+        DROP TRIGGER IF EXISTS equipment_fts_delete;
+        DROP TRIGGER IF EXISTS equipment_fts_update;
+        DROP TRIGGER IF EXISTS employees_fts_insert;
+        DROP TRIGGER IF EXISTS employees_fts_delete;
+        DROP TRIGGER IF EXISTS employees_fts_update;
+        -- A numeração passa para o gatilho de inserção do índice, que precisa dela antes
+        DROP TRIGGER IF EXISTS service_orders_number_insert;
+        DROP TABLE IF EXISTS service_orders_fts;
+        DROP TABLE IF EXISTS equipment_fts;
+        DROP TABLE IF EXISTS employees_fts;
+
+        CREATE VIRTUAL TABLE service_orders_fts USING fts5(
+            description,
+            content='service_orders', content_rowid='number',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        );
+        CREATE VIRTUAL TABLE equipment_fts USING fts5(
+            name, brand, model,
+            content='equipment', content_rowid='seq',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        );
+        CREATE VIRTUAL TABLE employees_fts USING fts5(
+            name,
+            content='employees', content_rowid='seq',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        );
+
+        -- O nome do equipamento pesa mais que marca e modelo
+        INSERT INTO equipment_fts (equipment_fts, rank) VALUES ('rank', 'bm25(2.0, 1.0, 1.0)');
+
+        -- Linhas gravadas sem número (ou seq) recebem o próximo antes de entrar no índice
+        CREATE TRIGGER service_orders_fts_insert AFTER INSERT ON service_orders BEGIN
+            UPDATE service_orders
+                SET number = MAX(COALESCE((SELECT MAX(number) FROM service_orders), 0) + 1, 1001)
+                WHERE rowid = NEW.rowid AND number IS NULL;
+            INSERT INTO service_orders_fts (rowid, description)
+                SELECT number, description FROM service_orders WHERE rowid = NEW.rowid;
+        END;
+        CREATE TRIGGER service_orders_fts_delete AFTER DELETE ON service_orders BEGIN
+            INSERT INTO service_orders_fts (service_orders_fts, rowid, description)
+                VALUES ('delete', OLD.number, OLD.description);
+        END;
+        -- (a numeração feita pelo gatilho de inserção tem OLD.number NULL e não passa por aqui)
+        CREATE TRIGGER service_orders_fts_update AFTER UPDATE OF description, number ON service_orders
+        WHEN OLD.number IS NOT NULL BEGIN
+            INSERT INTO service_orders_fts (service_orders_fts, rowid, description)
+                VALUES ('delete', OLD.number, OLD.description);
+            INSERT INTO service_orders_fts (rowid, description) VALUES (NEW.number, NEW.description);
+        END;
+
+        CREATE TRIGGER equipment_fts_insert AFTER INSERT ON equipment BEGIN
+            UPDATE equipment SET seq = COALESCE((SELECT MAX(seq) FROM equipment), 0) + 1
+                WHERE rowid = NEW.rowid AND seq IS NULL;
+            INSERT INTO equipment_fts (rowid, name, brand, model)
+                SELECT seq, name, brand, model FROM equipment WHERE rowid = NEW.rowid;
+        END;
+        CREATE TRIGGER equipment_fts_delete AFTER DELETE ON equipment BEGIN
+            INSERT INTO equipment_fts (equipment_fts, rowid, name, brand, model)
+                VALUES ('delete', OLD.seq, OLD.name, OLD.brand, OLD.model);
+        END;
+        CREATE TRIGGER equipment_fts_update AFTER UPDATE OF name, brand, model, seq ON equipment
+        WHEN OLD.seq IS NOT NULL BEGIN
+            INSERT INTO equipment_fts (equipment_fts, rowid, name, brand, model)
+                VALUES ('delete', OLD.seq, OLD.name, OLD.brand, OLD.model);
+            INSERT INTO equipment_fts (rowid, name, brand, model)
+                VALUES (NEW.seq, NEW.name, NEW.brand, NEW.model);
+        END;
+
+        CREATE TRIGGER employees_fts_insert AFTER INSERT ON employees BEGIN
+            UPDATE employees SET seq = COALESCE((SELECT MAX(seq) FROM employees), 0) + 1
+                WHERE rowid = NEW.rowid AND seq IS NULL;
+            INSERT INTO employees_fts (rowid, name)
+                SELECT seq, name FROM employees WHERE rowid = NEW.rowid;
+        END;
+        CREATE TRIGGER employees_fts_delete AFTER DELETE ON employees BEGIN
+            INSERT INTO employees_fts (employees_fts, rowid, name) VALUES ('delete', OLD.seq, OLD.name);
+        END;
+        CREATE TRIGGER employees_fts_update AFTER UPDATE OF name, seq ON employees
+        WHEN OLD.seq IS NOT NULL BEGIN
+            INSERT INTO employees_fts (employees_fts, rowid, name) VALUES ('delete', OLD.seq, OLD.name);
+            INSERT INTO employees_fts (rowid, name) VALUES (NEW.seq, NEW.name);
+        END;
+
+        -- Indexa o que já existe
+        INSERT INTO service_orders_fts (service_orders_fts) VALUES ('rebuild');
+        INSERT INTO equipment_fts (equipment_fts) VALUES ('rebuild');
+        INSERT INTO employees_fts (employees_fts) VALUES ('rebuild');
+    '''),
+]
+
+# Consultas conhecidas da aplicação que nunca devem varrer a tabela inteira
+KNOWN_QUERIES: List[Tuple[str, str, tuple]] = [
+    ('login',
+     'SELECT username, role, created_date, last_login, active, id, password_hash FROM users '
+     'WHERE username = ? AND active = 1',
+     ('admin',)),
+    ('funcionários ativos',
+     'SELECT * FROM employees WHERE active = 1',
+     ()),
+    ('página de funcionários por código',
+     'SELECT id, name FROM employees WHERE active = 1 AND id > ? ORDER BY id ASC LIMIT ?',
+     ('EMP0001', 100)),
+    ('página de funcionários por nome',
+     'SELECT id, name FROM employees WHERE active = 1 AND (name, id) > (?, ?) '
+     'ORDER BY name ASC, id ASC LIMIT ?',
+     ('Maria', 'EMP0001', 100)),
+    ('página de funcionários por salário (decrescente)',
+     'SELECT id, salary FROM employees WHERE active = 1 AND (salary, id) < (?, ?) '
+     'ORDER BY salary DESC, id DESC LIMIT ?',
+     (5000.0, 'EMP0001', 100)),
+    ('funcionário por código',
+     'SELECT * FROM employees WHERE id = ?',
+     ('EMP0001',)),
+    ('ordens por situação',
+     'SELECT * FROM service_orders WHERE status = ? ORDER BY created_date',
+     ('Aberta',)),
+    ('ordens por funcionário',
+     'SELECT * FROM service_orders WHERE employee_id = ?',
+     ('EMP0001',)),
+    ('ordens por equipamento',
+     'SELECT * FROM service_orders WHERE equipment_id = ?',
+     ('EQ0001',)),
+    ('ordens mais recentes por situação',
+     'SELECT number FROM service_orders WHERE status = ? ORDER BY number DESC LIMIT ?',
+     ('Em Aberto', 20)),
+    ('ordens por cliente',
+     'SELECT number FROM service_orders WHERE client = ? COLLATE NOCASE ORDER BY number DESC',
+     ('Metalúrgica XYZ Ltda',)),
+    ('ordens por técnico',
+     'SELECT number FROM service_orders WHERE technician = ? COLLATE NOCASE ORDER BY number DESC',
+     ('Maria Santos',)),
+    ('ordens por data de abertura',
+     'SELECT number FROM service_orders WHERE created_date BETWEEN ? AND ?',
+     ('2025-01-01', '2025-01-31')),
+    ('preventivas vencendo',
+     'SELECT id, next_maintenance FROM equipment '
+     'WHERE next_maintenance >= ? AND next_maintenance < ?',
+     ('2025-01-01', '2025-02-01')),
+    ('próximas preventivas',
+     'SELECT id FROM equipment WHERE next_maintenance IS NOT NULL ORDER BY next_maintenance LIMIT ?',
+     (20,)),
+    ('orçamentos por situação',
+     'SELECT * FROM budgets WHERE status = ? ORDER BY created_date',
+     ('Aprovado',)),
+    ('contador do dashboard',
+     'SELECT value FROM dashboard_stats WHERE name = ?',
+     ('employees_active',)),
+]
+
+_FULL_SCAN = re.compile(r'^SCAN (?!CONSTANT ROW)')
+
+
+def split_statements(script: str) -> Iterator[str]:
+    """Divide um script SQL em instruções completas (gatilhos inclusive)
+
+    Ao contrário de ``executescript``, permite executar o script dentro de
+    uma transação já aberta.
+    """
+    statement = ''
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            yield statement.strip()
+            statement = ''
+    if statement.strip():
+        yield statement.strip()
+
+
+def current_version(cursor: sqlite3.Cursor) -> int:
+    """Versão de esquema já aplicada ao banco"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_date TEXT NOT NULL
+        )
+    ''')
+    cursor.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version')
+    return cursor.fetchone()[0]
+
+
+def migrate(db) -> List[int]:
+    """Aplica, em ordem, as migrações ainda pendentes
+
+    Cada migração roda em sua própria transação junto com o registro em
+    ``schema_version``; ``BEGIN IMMEDIATE`` impede que dois processos
+    apliquem a mesma versão ao mesmo tempo. Retorna as versões aplicadas.
+    """
+    applied = []
+    for version, description, script in MIGRATIONS:
+        with db.transaction() as cursor:
+            if current_version(cursor) >= version:
+                continue
+            for statement in split_statements(script):
+                cursor.execute(statement)
+            cursor.execute(
+                'INSERT INTO schema_version (version, description, applied_date) VALUES (?, ?, ?)',
+                (version, description, datetime.now().isoformat())
+            )
+        applied.append(version)
+    return applied
+
+
+def check_query_plans(db) -> List[Tuple[str, str]]:
+    """Executa EXPLAIN QUERY PLAN nas consultas conhecidas
+
+    Retorna (consulta, etapa do plano) para cada consulta que varre uma
+    tabela inteira em vez de usar um índice. Lista vazia significa que
+    todas as consultas estão cobertas.
+    """
+    problems = []
+    for name, query, params in KNOWN_QUERIES:
+        for row in db.execute_query(f'EXPLAIN QUERY PLAN {query}', params):
+            detail = row[-1]
+            if _FULL_SCAN.match(detail):
+                problems.append((name, detail))
+    return problems
+
+
+def main(argv=None) -> int:
+    """Verifica os planos de consulta de um banco: python -m erp.migrations [arquivo.db]"""
+    from . import DEFAULT_DATABASE
+    from .database import DatabaseManager
+
+    argv = sys.argv[1:] if argv is None else argv
+    db = DatabaseManager(argv[0] if argv else DEFAULT_DATABASE)
+    try:
+        problems = check_query_plans(db)
+    finally:
+        db.close()
+
+    if problems:
+        for name, detail in problems:
+            print(f"❌ {name}: {detail}")
+        return 1
+    print(f"✅ {len(KNOWN_QUERIES)} consultas usam índices")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sistema ERP - Perfil de Sessão
+Profiler por amostragem de baixo custo, com as amostras marcadas pela tela ativa
+
+Uma thread lê as pilhas de todas as threads em intervalos fixos e acumula
+pilhas colapsadas (formato do flamegraph.pl / speedscope / inferno), cada
+uma começando pela tela em que o usuário estava, por exemplo:
+
+    [show_employees];gui_main.py:main;...;virtual_list.py:rows 42
+
+Uso:
+    python gui/gui_main.py --profile                 # grava erp_profile.folded ao sair
+    python cli/main.py --profile sessao.folded
+    python -m erp.profiler sessao.folded --top 15    # resumo por tela e por função
+    flamegraph.pl sessao.folded > sessao.svg
+"""
+
+import argparse
+import functools
+import os
+import statistics
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+
+# Intervalo entre amostras; ERP_PROFILE_INTERVAL_MS altera o padrão
+SAMPLE_INTERVAL_MS = float(os.environ.get('ERP_PROFILE_INTERVAL_MS', 5))
+DEFAULT_OUTPUT = 'erp_profile.folded'
+# Pilhas mais profundas que isto são cortadas na raiz
+MAX_DEPTH = 128
+ROOT_SCREEN = 'sessao'
+
+
+class SamplingProfiler:
+    """Amostra periodicamente as pilhas do processo, agrupadas pela tela ativa
+
+    A tela ativa é uma pilha de nomes: ``screen(nome)`` entra e sai de uma
+    tela (menus aninhados da CLI); ``set_screen(nome)`` troca a tela atual
+    sem empilhar (telas da GUI, que continuam ativas depois que o método
+    que as montou retornou). ``instrument`` aplica um dos dois aos métodos
+    de uma classe.
+    """
+
+    def __init__(self, interval_ms: float = SAMPLE_INTERVAL_MS):
+        self.interval = interval_ms / 1000
+        self.samples: Counter = Counter()
+        self.frame_times: Dict[str, List[float]] = defaultdict(list)
+        self._screens: List[str] = [ROOT_SCREEN]
+        self._labels: Dict[object, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.started = self.elapsed = 0.0
+
+    # ------------------------------------------------------------ tela ativa
+
+    @property
+    def current_screen(self) -> str:
+        return self._screens[-1]
+
+    def set_screen(self, name: str):
+        """Substitui a tela atual (a raiz da sessão nunca sai da pilha)"""
+        if len(self._screens) > 1:
+            self._screens[-1] = name
+        else:
+            self._screens.append(name)
+
+    @contextmanager
+    def screen(self, name: str):
+        """Marca as amostras com ``name`` enquanto o bloco estiver aberto"""
+        self._screens.append(name)
+        try:
+            yield
+        finally:
+            if len(self._screens) > 1:
+                self._screens.pop()
+
+    def instrument(self, cls, names: Iterable[str], persistent: bool = False):
+        """Faz os métodos ``names`` de ``cls`` marcarem a tela com o próprio nome
+
+        Com ``persistent`` a tela continua ativa depois do retorno do método.
+        """
+        for name in names:
+            method = getattr(cls, name, None)
+            if method is None or getattr(method, '__profiled__', False):
+                continue
+            setattr(cls, name, self._wrap(method, name, persistent))
+
+    def _wrap(self, method, name: str, persistent: bool):
+        if persistent:
+            def wrapper(*args, **kwargs):
+                self.set_screen(name)
+                return method(*args, **kwargs)
+        else:
+            def wrapper(*args, **kwargs):
+                with self.screen(name):
+                    return method(*args, **kwargs)
+
+        functools.update_wrapper(wrapper, method)
+        wrapper.__profiled__ = True
+        return wrapper
+
+    def record_frame(self, seconds: float):
+        """Registra o tempo de desenho de um quadro na tela atual"""
+        self.frame_times[self.current_screen].append(seconds)
+
+    # ------------------------------------------------------------ amostragem
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='erp-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.elapsed += time.perf_counter() - self.started
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = f'{os.path.basename(code.co_filename)}:{code.co_name}'.replace(';', ',')
+            self._labels[code] = label
+        return label
+
+    def _run(self):
+        own = threading.get_ident()
+        main = threading.main_thread().ident
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            screen = f'[{self.current_screen}]'
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_DEPTH:
+                    stack.append(self._label(frame.f_code))
+                    frame = frame.f_back
+                stack.reverse()
+                if ident != main:
+                    stack.insert(0, f'thread:{names.get(ident, ident)}')
+                stack.insert(0, screen)
+                self.samples[';'.join(stack)] += 1
+
+    # ------------------------------------------------------------ resultados
+
+    def write(self, path: str):
+        """Grava as pilhas colapsadas (uma por linha: ``quadro;quadro;... contagem``)"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in sorted(self.samples.items()):
+                f.write(f'{stack} {count}\n')
+
+    def summary(self, top: int = 10) -> str:
+        """Texto com amostras por tela, funções mais frequentes e tempo de desenho por quadro"""
+        lines = summarize(self.samples, top)
+        lines.insert(0, f"Sessão de {self.elapsed:.1f} s, amostras a cada {self.interval * 1000:g} ms")
+        if self.frame_times:
+            lines += ['', f"{'Quadros por tela':<32} {'qtd':>6} {'p50 ms':>8} {'p95 ms':>8} {'máx ms':>8}"]
+            for screen, times in sorted(self.frame_times.items(), key=lambda item: -sum(item[1])):
+                ordered = sorted(times)
+                p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+                lines.append(f"{screen:<32} {len(times):>6} {statistics.median(ordered) * 1000:>8.2f} "
+                             f"{p95 * 1000:>8.2f} {ordered[-1] * 1000:>8.2f}")
+        return '\n'.join(lines)
+
+
+def summarize(samples: Dict[str, int], top: int = 10) -> List[str]:
+    """Amostras por tela e as funções com mais amostras próprias (topo da pilha)"""
+    total = sum(samples.values()) or 1
+    screens: Counter = Counter()
+    leaves: Counter = Counter()
+    for stack, count in samples.items():
+        frames = stack.split(';')
+        screens[frames[0]] += count
+        leaves[frames[-1]] += count
+
+    lines = ['', f"{'Tela':<48} {'amostras':>9} {'%':>6}"]
+    for screen, count in screens.most_common():
+        lines.append(f"{screen:<48} {count:>9} {count / total:>6.1%}")
+    lines += ['', f"{'Função (amostras próprias)':<48} {'amostras':>9} {'%':>6}"]
+    for leaf, count in leaves.most_common(top):
+        lines.append(f"{leaf:<48} {count:>9} {count / total:>6.1%}")
+    return lines
+
+
+def read_folded(path: str) -> Counter:
+    """Lê um arquivo de pilhas colapsadas"""
+    samples: Counter = Counter()
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            stack, _, count = line.rstrip('\n').rpartition(' ')
+            if stack:
+                samples[stack] += int(count)
+    return samples
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Resumo de um perfil de sessão do Sistema ERP")
+    parser.add_argument('arquivo', help="pilhas colapsadas gravadas com --profile")
+    parser.add_argument('--tela', help="considera só as amostras desta tela")
+    parser.add_argument('--top', type=int, default=20, help="quantidade de funções listadas")
+    args = parser.parse_args(argv)
+
+    try:
+        samples = read_folded(args.arquivo)
+    except (OSError, ValueError) as e:
+        print(f"❌ Não foi possível ler {args.arquivo}: {e}")
+        return 1
+    if args.tela:
+        root = f'[{args.tela}]'
+        samples = Counter({stack: count for stack, count in samples.items()
+                           if stack.split(';', 1)[0] == root})
+    print(f"{sum(samples.values())} amostras em {args.arquivo}")
+    print('\n'.join(summarize(samples, args.top)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sistema ERP - Métricas de Consultas
+Histogramas de latência por instrução, espera por conexão e log de consultas lentas
+
+Uso:
+    python -m erp.query_metrics                    # métricas acumuladas do banco padrão
+    python -m erp.query_metrics --db outro.db --lentas 20
+    python -m erp.query_metrics --limpar
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+from . import DEFAULT_DATABASE
+
+# Instruções acima deste tempo (ms) vão para o log de consultas lentas;
+# ERP_SLOW_QUERY_MS altera o padrão, 0 desativa o log
+SLOW_QUERY_MS = float(os.environ.get('ERP_SLOW_QUERY_MS', 100))
+
+# Limites superiores (ms) das faixas do histograma; a última faixa é "acima de 10 s"
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_COMMENT = re.compile(r'--[^\n]*|/\*.*?\*/', re.DOTALL)
+_NUMBER = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])')
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_SPACES = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(sql: str) -> str:
+    """Forma canônica de uma instrução: literais viram ?, comentários saem, espaços são unificados
+
+    ``WHERE id = 'EMP0001'`` e ``WHERE id = 'EMP0002'`` contam como a mesma
+    instrução; listas ``IN (?, ?, ?)`` de qualquer tamanho também.
+    """
+    text = _STRING.sub('?', sql)
+    text = _COMMENT.sub(' ', text)
+    text = _NUMBER.sub('?', text)
+    text = _SPACES.sub(' ', text).strip()
+    return _IN_LIST.sub('(?, ...)', text)
+
+
+def metrics_paths(db_path: str) -> tuple:
+    """(arquivo de métricas acumuladas, log de consultas lentas) de um banco"""
+    base = os.path.splitext(db_path)[0]
+    return f'{base}_metrics.json', f'{base}_slow_queries.jsonl'
+
+
+class LatencyHistogram:
+    """Contagem, tempo total, máximo e histograma de latências"""
+
+    __slots__ = ('count', 'total', 'max', 'rows', 'errors', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.errors = 0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, elapsed_ms: float, rows: int = 0, error: bool = False):
+        self.count += 1
+        self.total += elapsed_ms
+        if elapsed_ms > self.max:
+            self.max = elapsed_ms
+        self.rows += rows
+        self.errors += error
+        self.buckets[bisect_left(BUCKETS_MS, elapsed_ms)] += 1
+
+    def percentile(self, fraction: float) -> float:
+        """Limite superior (ms) da faixa que contém o percentil pedido"""
+        if not self.count:
+            return 0.0
+        wanted = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= wanted:
+                return BUCKETS_MS[index] if index < len(BUCKETS_MS) else self.max
+        return self.max
+
+    def merge(self, other: 'LatencyHistogram'):
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        self.rows += other.rows
+        self.errors += other.errors
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+
+    def to_dict(self) -> Dict:
+        return {'count': self.count, 'total_ms': self.total, 'max_ms': self.max,
+                'rows': self.rows, 'errors': self.errors, 'buckets': self.buckets}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'LatencyHistogram':
+        histogram = cls()
+        histogram.count = data['count']
+        histogram.total = data['total_ms']
+        histogram.max = data['max_ms']
+        histogram.rows = data.get('rows', 0)
+        histogram.errors = data.get('errors', 0)
+        if len(data['buckets']) == len(histogram.buckets):
+            histogram.buckets = list(data['buckets'])
+        return histogram
+
+    def summary(self) -> Dict:
+        """Resumo legível: contagem, médias, percentis e linhas"""
+        return {
+            'count': self.count,
+            'total_ms': round(self.total, 3),
+            'mean_ms': round(self.total / self.count, 3) if self.count else 0.0,
+            'p50_ms': self.percentile(0.50),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': round(self.max, 3),
+            'rows': self.rows,
+            'errors': self.errors,
+        }
+
+
+class QueryMetrics:
+    """Métricas agregadas das instruções executadas por um DatabaseManager
+
+    Cada instrução, identificada pela sua forma normalizada, acumula um
+    histograma de latência, linhas retornadas/alteradas e erros; a espera
+    por uma conexão livre do pool tem um histograma próprio. Instruções
+    acima de ``slow_ms`` são gravadas em ``slow_log`` (JSON Lines) com o
+    plano de execução. O registro custa alguns microssegundos e é seguro
+    entre threads.
+    """
+
+    def __init__(self, slow_ms: float = SLOW_QUERY_MS, slow_log: Optional[str] = None):
+        self.slow_ms = slow_ms
+        self.slow_log = slow_log
+        self.started = datetime.now().isoformat(timespec='seconds')
+        self.statements: Dict[str, LatencyHistogram] = {}
+        self.waits = LatencyHistogram()
+        self._lock = threading.Lock()
+        self._log_lock = threading.Lock()
+
+    def record(self, sql: str, elapsed: float, rows: int = 0, error: bool = False) -> bool:
+        """Registra uma execução (``elapsed`` em segundos); True se foi lenta"""
+        elapsed_ms = elapsed * 1000
+        key = normalize_sql(sql)
+        with self._lock:
+            histogram = self.statements.get(key)
+            if histogram is None:
+                histogram = self.statements[key] = LatencyHistogram()
+            histogram.add(elapsed_ms, rows, error)
+        return bool(self.slow_ms) and elapsed_ms >= self.slow_ms
+
+    def record_wait(self, elapsed: float):
+        """Registra o tempo de espera por uma conexão do pool"""
+        with self._lock:
+            self.waits.add(elapsed * 1000)
+
+    def log_slow(self, sql: str, elapsed: float, rows: int, plan: Optional[List[str]] = None):
+        """Acrescenta uma instrução lenta ao log (os parâmetros nunca são gravados)"""
+        if not self.slow_log:
+            return
+        entry = {
+            'time': datetime.now().isoformat(timespec='milliseconds'),
+            'elapsed_ms': round(elapsed * 1000, 3),
+            'rows': rows,
+            'sql': normalize_sql(sql),
+            'plan': plan,
+            'thread': threading.current_thread().name,
+        }
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+        with self._log_lock:
+            try:
+                with open(self.slow_log, 'a', encoding='utf-8') as f:
+                    f.write(line)
+            except OSError as e:
+                print(f"Erro ao gravar log de consultas lentas: {e}")
+
+    def snapshot(self) -> Dict:
+        """Resumo das métricas, instruções ordenadas pelo tempo total"""
+        with self._lock:
+            statements = [dict(sql=sql, **h.summary()) for sql, h in self.statements.items()]
+            waits = self.waits.summary()
+        statements.sort(key=lambda s: s['total_ms'], reverse=True)
+        return {'since': self.started, 'connection_wait': waits, 'statements': statements}
+
+    def reset(self):
+        """Zera as métricas em memória"""
+        with self._lock:
+            self.statements.clear()
+            self.waits = LatencyHistogram()
+            self.started = datetime.now().isoformat(timespec='seconds')
+
+    def save(self, path: str):
+        """Soma as métricas desta sessão às já acumuladas em ``path``"""
+        total = QueryMetrics.load(path) if os.path.exists(path) else QueryMetrics(self.slow_ms)
+        with self._lock:
+            for sql, histogram in self.statements.items():
+                total.statements.setdefault(sql, LatencyHistogram()).merge(histogram)
+            total.waits.merge(self.waits)
+
+        data = {
+            'since': total.started,
+            'updated': datetime.now().isoformat(timespec='seconds'),
+            'connection_wait': total.waits.to_dict(),
+            'statements': {sql: h.to_dict() for sql, h in total.statements.items()},
+        }
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'QueryMetrics':
+        """Métricas acumuladas gravadas por ``save``"""
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        metrics = cls()
+        metrics.started = data.get('since', metrics.started)
+        metrics.waits = LatencyHistogram.from_dict(data['connection_wait'])
+        metrics.statements = {sql: LatencyHistogram.from_dict(h) for sql, h in data['statements'].items()}
+        return metrics
+
+
+def explain(conn: sqlite3.Connection, sql: str, params=()) -> Optional[List[str]]:
+    """Etapas do EXPLAIN QUERY PLAN de uma instrução, ou None se não se aplicar"""
+    try:
+        return [row[-1] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params)]
+    except (sqlite3.Error, ValueError):
+        return None
+
+
+class TimedCursor:
+    """Cursor que registra o tempo de cada execute/executemany
+
+    Usado pelas transações do DatabaseManager; os demais atributos do
+    cursor original continuam acessíveis. Em SELECTs, o tempo medido é o
+    da execução até a primeira linha, sem a leitura das seguintes.
+    """
+
+    def __init__(self, cursor: sqlite3.Cursor, metrics: QueryMetrics):
+        self._cursor = cursor
+        self._metrics = metrics
+
+    def execute(self, sql: str, params=()):
+        started = time.perf_counter()
+        try:
+            self._cursor.execute(sql, params)
+        except sqlite3.Error:
+            self._metrics.record(sql, time.perf_counter() - started, error=True)
+            raise
+        elapsed = time.perf_counter() - started
+        rows = max(self._cursor.rowcount, 0)
+        if self._metrics.record(sql, elapsed, rows):
+            self._metrics.log_slow(sql, elapsed, rows, explain(self._cursor.connection, sql, params))
+        return self
+
+    def executemany(self, sql: str, rows: Iterable):
+        started = time.perf_counter()
+        try:
+            self._cursor.executemany(sql, rows)
+        except sqlite3.Error:
+            self._metrics.record(sql, time.perf_counter() - started, error=True)
+            raise
+        elapsed = time.perf_counter() - started
+        changed = max(self._cursor.rowcount, 0)
+        if self._metrics.record(sql, elapsed, changed):
+            self._metrics.log_slow(sql, elapsed, changed)
+        return self
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+def read_slow_log(path: str, limit: int = 10) -> List[Dict]:
+    """As ``limit`` entradas mais recentes do log de consultas lentas"""
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        lines = f.readlines()[-limit:]
+    entries = []
+    for line in lines:
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            continue
+    return entries
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Métricas de consultas do Sistema ERP")
+    parser.add_argument('--db', default=DEFAULT_DATABASE, help="banco de dados SQLite")
+    parser.add_argument('--top', type=int, default=15, help="instruções exibidas")
+    parser.add_argument('--lentas', type=int, default=5, help="entradas do log de consultas lentas exibidas")
+    parser.add_argument('--json', action='store_true', help="imprime as métricas em JSON")
+    parser.add_argument('--limpar', action='store_true', help="apaga as métricas acumuladas e o log")
+    args = parser.parse_args(argv)
+
+    metrics_path, slow_path = metrics_paths(args.db)
+    if args.limpar:
+        for path in (metrics_path, slow_path):
+            if os.path.exists(path):
+                os.remove(path)
+        print("✅ Métricas apagadas")
+        return 0
+
+    if not os.path.exists(metrics_path):
+        print(f"❌ Nenhuma métrica registrada para {args.db} ({metrics_path})")
+        return 1
+
+    snapshot = QueryMetrics.load(metrics_path).snapshot()
+    slow = read_slow_log(slow_path, args.lentas)
+    if args.json:
+        print(json.dumps({**snapshot, 'slow_queries': slow}, indent=2, ensure_ascii=False))
+        return 0
+
+    print(f"Métricas desde {snapshot['since']}\n")
+    print(f"{'execuções':>10} {'total ms':>10} {'médio':>8} {'p95':>8} {'máx':>9} {'linhas':>9}  instrução")
+    for s in snapshot['statements'][:args.top]:
+        sql = s['sql'] if len(s['sql']) <= 70 else s['sql'][:67] + '...'
+        errors = f"  ({s['errors']} erro(s))" if s['errors'] else ''
+        print(f"{s['count']:>10} {s['total_ms']:>10.1f} {s['mean_ms']:>8.2f} {s['p95_ms']:>8g} "
+              f"{s['max_ms']:>9.1f} {s['rows']:>9}  {sql}{errors}")
+
+    wait = snapshot['connection_wait']
+    print(f"\nEspera por conexão: {wait['count']} retiradas, média {wait['mean_ms']:.3f} ms, "
+          f"p99 {wait['p99_ms']:g} ms, máx {wait['max_ms']:.1f} ms")
+
+    if slow:
+        print(f"\nConsultas lentas mais recentes ({slow_path}):")
+        for entry in slow:
+            print(f"  {entry['time']}  {entry['elapsed_ms']:.1f} ms  {entry['sql'][:90]}")
+            for step in entry.get('plan') or []:
+                print(f"      {step}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sistema ERP - Relatórios Gerenciais
+Relatórios calculados no próprio SQLite (agregações e funções de janela),
+lidos em fluxo e guardados em cache pela versão dos dados. O relatório de
+SLA, que calcula durações em horas úteis ordem a ordem, é dividido por mês
+(ou por faixa de números) entre vários processos.
+
+Uso:
+    python -m erp.reports                                   # lista os relatórios
+    python -m erp.reports tecnicos --de 2024-01 --ate 2024-12
+    python -m erp.reports backlog --db outro.db
+    python -m erp.reports mtbf --csv mtbf.csv
+    python -m erp.reports sla --processos 8 --dividir id
+"""
+
+import argparse
+import csv
+import functools
+import itertools
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime
+from multiprocessing import get_context
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from urllib.request import pathname2url
+
+from . import DEFAULT_DATABASE
+
+# Linhas buscadas por vez ao ler o resultado
+FETCH_SIZE = 1000
+# Relatórios prontos mantidos em memória, e o tamanho máximo de cada um
+CACHE_SIZE = 32
+CACHE_MAX_ROWS = 200000
+# Limites usados quando o período não é informado
+FIRST_DAY, LAST_DAY = '0000-01-01', '9999-12-31'
+# Jornada das durações em horas úteis: segunda a sexta, das 8h às 18h (sem feriados)
+WORKDAY_START, WORKDAY_END = 8 * 60, 18 * 60
+WORKDAY_MINUTES = WORKDAY_END - WORKDAY_START
+# Relatórios calculados em Python: processos, divisão do trabalho e o
+# mínimo de ordens para valer a pena abrir o pool
+WORKERS = os.cpu_count() or 1
+SPLITS = ('mes', 'id')
+PARALLEL_MIN_ORDERS = 100000
+PRIORITY_ORDER = {'Crítica': 0, 'Alta': 1, 'Média': 2, 'Baixa': 3}
+
+
+@dataclass(frozen=True)
+class Report:
+    """Um relatório: consulta SQL com parâmetros nomeados e o título de cada coluna
+
+    Relatórios com ``compute`` são calculados em Python por
+    ``compute(banco, parâmetros, processos, divisão)`` em vez da consulta.
+    """
+    name: str
+    title: str
+    columns: Tuple[str, ...]
+    sql: str = ''
+    # Parâmetros que a consulta usa (os demais não entram na chave do cache)
+    uses: Tuple[str, ...] = ()
+    compute: Optional[Callable[[str, Dict[str, str], int, str], Iterable[tuple]]] = None
+
+
+# ------------------------------------------------------- SLA em horas úteis
+
+@functools.lru_cache(maxsize=65536)
+def _business_minutes_until(text: str) -> int:
+    """Minutos úteis desde o início do calendário (1º de janeiro do ano 1, uma segunda-feira)
+
+    Guardado por texto: as datas se repetem muito entre as ordens.
+    """
+    moment = datetime.fromisoformat(text)
+    weeks, weekday = divmod(moment.toordinal() - 1, 7)
+    minutes = (weeks * 5 + min(weekday, 5)) * WORKDAY_MINUTES
+    if weekday < 5:
+        minute = moment.hour * 60 + moment.minute
+        minutes += min(max(minute, WORKDAY_START), WORKDAY_END) - WORKDAY_START
+    return minutes
+
+
+def business_minutes(start: str, end: str) -> int:
+    """Minutos úteis entre duas datas ISO (só a data conta como meia-noite); 0 se ``end`` não é posterior"""
+    return max(0, _business_minutes_until(end) - _business_minutes_until(start))
+
+
+def _open_readonly(db_path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(f'file:{pathname2url(os.path.abspath(db_path))}?mode=ro', uri=True)
+    conn.execute('PRAGMA busy_timeout = 5000')
+    return conn
+
+
+def sla_partition(db_path: str, where: str, params: tuple, today: str) -> Dict[Tuple[str, str], List[int]]:
+    """Totais parciais de uma fatia das ordens, por (mês, prioridade)
+
+    Roda em um processo do pool, com sua própria conexão somente leitura.
+    Os totais são inteiros (minutos, contagens), então somar as fatias dá
+    o mesmo resultado em qualquer divisão e em qualquer ordem.
+    Valores: [ordens, minutos úteis de prazo, concluídas, minutos úteis até concluir, fora do prazo]
+    """
+    totals: Dict[Tuple[str, str], List[int]] = {}
+    conn = _open_readonly(db_path)
+    try:
+        rows = conn.execute(
+            'SELECT substr(created_date, 1, 7), priority, created_date, due_date, closed_date '
+            f'FROM service_orders WHERE {where}', params)
+        for month, priority, created, due, closed in rows:
+            entry = totals.get((month, priority))
+            if entry is None:
+                entry = totals[(month, priority)] = [0, 0, 0, 0, 0]
+            entry[0] += 1
+            entry[1] += business_minutes(created, due)
+            if closed:
+                entry[2] += 1
+                entry[3] += business_minutes(created, closed)
+                entry[4] += closed[:10] > due[:10]
+            else:
+                entry[4] += today > due[:10]
+    finally:
+        conn.close()
+    return totals
+
+
+def sla_partitions(conn: sqlite3.Connection, start: str, end: str, split: str,
+                   chunks: int) -> List[Tuple[str, tuple]]:
+    """Fatias (condição, parâmetros) das ordens do período: uma por mês ou ``chunks`` faixas de número"""
+    if split == 'id':
+        low, high = conn.execute(
+            'SELECT MIN(rowid), MAX(rowid) FROM service_orders').fetchone()
+        if low is None:
+            return []
+        step = -(-(high - low + 1) // chunks)
+        return [('rowid >= ? AND rowid < ? AND created_date >= ? AND created_date < ?',
+                 (first, first + step, start, end)) for first in range(low, high + 1, step)]
+
+    first, last = conn.execute('SELECT MIN(created_date), MAX(created_date) FROM service_orders '
+                               'WHERE created_date >= ? AND created_date < ?', (start, end)).fetchone()
+    if first is None:
+        return []
+    year, month = int(first[:4]), int(first[5:7])
+    slices = []
+    while f'{year:04d}-{month:02d}' <= last[:7]:
+        month_start = f'{year:04d}-{month:02d}-01'
+        year, month = year + month // 12, month % 12 + 1
+        month_end = f'{year:04d}-{month:02d}-01'
+        slices.append(('created_date >= ? AND created_date < ?', (max(start, month_start), min(end, month_end))))
+    return slices
+
+
+def merge_partials(partials: Iterable[Dict[Tuple[str, str], List[int]]]) -> Dict[Tuple[str, str], List[int]]:
+    """Soma os totais parciais das fatias"""
+    totals: Dict[Tuple[str, str], List[int]] = {}
+    for partial in partials:
+        for key, values in partial.items():
+            current = totals.get(key)
+            if current is None:
+                totals[key] = list(values)
+            else:
+                for index, value in enumerate(values):
+                    current[index] += value
+    return totals
+
+
+def sla_rows(db_path: str, params: Dict[str, str], workers: int = WORKERS, split: str = 'mes',
+             min_orders: int = PARALLEL_MIN_ORDERS) -> Iterator[tuple]:
+    """Relatório de SLA: fatias calculadas em ``workers`` processos e somadas
+
+    Com menos de ``min_orders`` ordens ou um só processo, as fatias são
+    calculadas aqui mesmo, em sequência.
+    """
+    conn = _open_readonly(db_path)
+    try:
+        slices = sla_partitions(conn, params['start'], params['end'], split, max(1, workers) * 4)
+        total = conn.execute("SELECT value FROM dashboard_stats WHERE name = 'service_orders_total'").fetchone()
+    finally:
+        conn.close()
+    arguments = (itertools.repeat(db_path), [w for w, _ in slices], [p for _, p in slices],
+                 itertools.repeat(params['today']))
+
+    if workers > 1 and len(slices) > 1 and (total[0] if total else 0) >= min_orders:
+        # spawn: processos novos, sem herdar as threads e conexões deste
+        with ProcessPoolExecutor(max_workers=min(workers, len(slices)), mp_context=get_context('spawn')) as pool:
+            totals = merge_partials(pool.map(sla_partition, *arguments))
+    else:
+        totals = merge_partials(map(sla_partition, *arguments))
+
+    for (month, priority), (orders, allowed, closed, to_close, breached) in sorted(
+            totals.items(), key=lambda item: (item[0][0], PRIORITY_ORDER.get(item[0][1], 9), item[0][1])):
+        yield (month, priority, orders, closed, breached, round(100 * breached / orders, 1),
+               round(allowed / orders / 60, 1), round(to_close / closed / 60, 1) if closed else None)
+
+
+REPORTS: Dict[str, Report] = {report.name: report for report in (
+    Report(
+        'tecnicos', 'Ordens e lead time por técnico e mês',
+        ('Técnico', 'Mês', 'O.S.', 'Concluídas', 'Lead time médio (dias)', 'Lead time máximo (dias)',
+         'Acumulado', 'Posição no mês'),
+        # Agrega por código antes de resolver o nome: uma busca no cadastro por grupo, não por ordem
+        '''
+        WITH monthly AS (
+            SELECT NULLIF(technician, '') AS technician, employee_id,
+                   substr(created_date, 1, 7) AS month,
+                   COUNT(*) AS orders,
+                   COUNT(closed_date) AS closed,
+                   AVG(julianday(closed_date) - julianday(created_date)) AS lead_days,
+                   MAX(julianday(closed_date) - julianday(created_date)) AS max_lead_days
+            FROM service_orders
+            WHERE created_date >= :start AND created_date < :end
+            GROUP BY 1, 2, 3
+        )
+        SELECT COALESCE(m.technician, emp.name, m.employee_id) AS name, m.month, m.orders, m.closed,
+               ROUND(m.lead_days, 1), ROUND(m.max_lead_days, 1),
+               SUM(m.orders) OVER (PARTITION BY m.technician, m.employee_id ORDER BY m.month),
+               RANK() OVER (PARTITION BY m.month ORDER BY m.orders DESC) AS position
+        FROM monthly m
+        LEFT JOIN employees emp ON emp.id = m.employee_id
+        ORDER BY m.month, position, name
+        ''',
+        ('start', 'end'),
+    ),
+    Report(
+        'backlog', 'Backlog por prioridade',
+        ('Prioridade', 'O.S. abertas', '% do backlog', 'Em Aberto', 'Em Andamento', 'Aguardando Peças',
+         'Atrasadas', 'Idade média (dias)', 'Abertura mais antiga'),
+        '''
+        SELECT priority, COUNT(*),
+               ROUND(100.0 * COUNT(*) / SUM(COUNT(*)) OVER (), 1),
+               SUM(status = 'Em Aberto'), SUM(status = 'Em Andamento'), SUM(status = 'Aguardando Peças'),
+               SUM(due_date < :today),
+               ROUND(AVG(julianday(:today) - julianday(created_date)), 1),
+               MIN(created_date)
+        FROM service_orders
+        WHERE status != 'Concluída'
+        GROUP BY priority
+        ORDER BY CASE priority WHEN 'Crítica' THEN 0 WHEN 'Alta' THEN 1 WHEN 'Média' THEN 2
+                               WHEN 'Baixa' THEN 3 ELSE 4 END, priority
+        ''',
+        ('today',),
+    ),
+    Report(
+        'mtbf', 'MTBF por equipamento (tempo médio entre falhas)',
+        ('Equipamento', 'Nome', 'Falhas', 'MTBF (dias)', 'Menor intervalo (dias)', 'Última falha'),
+        # Cada ordem corretiva é uma falha; LAG dá o intervalo até a anterior do mesmo equipamento
+        '''
+        WITH failures AS (
+            SELECT COALESCE(NULLIF(equipment_id, ''), equipment_name) AS equipment, created_date,
+                   julianday(created_date) - julianday(LAG(created_date) OVER (
+                       PARTITION BY COALESCE(NULLIF(equipment_id, ''), equipment_name)
+                       ORDER BY created_date)) AS gap
+            FROM service_orders
+            WHERE created_date >= :start AND created_date < :end AND NOT preventive
+        ),
+        summary AS (
+            SELECT equipment, COUNT(*) AS failures, AVG(gap) AS mtbf, MIN(gap) AS shortest,
+                   MAX(created_date) AS last_failure
+            FROM failures
+            GROUP BY equipment
+            HAVING COUNT(*) > 1
+        )
+        SELECT s.equipment, COALESCE(eq.name, s.equipment), s.failures, ROUND(s.mtbf, 1),
+               ROUND(s.shortest, 1), s.last_failure
+        FROM summary s
+        LEFT JOIN equipment eq ON eq.id = s.equipment
+        ORDER BY s.mtbf, s.failures DESC, s.equipment
+        ''',
+        ('start', 'end'),
+    ),
+    Report(
+        'sla', 'SLA por mês e prioridade (horas úteis)',
+        ('Mês', 'Prioridade', 'O.S.', 'Concluídas', 'Fora do prazo', '% fora do prazo',
+         'Prazo médio (h úteis)', 'Tempo médio até concluir (h úteis)'),
+        uses=('start', 'end', 'today'),
+        compute=sla_rows,
+    ),
+)}
+
+
+def period(first_month: Optional[str] = None, last_month: Optional[str] = None) -> Dict[str, str]:
+    """Parâmetros ``start``/``end`` (fim exclusivo) para os meses ``AAAA-MM`` informados, inclusive"""
+    start, end = FIRST_DAY, LAST_DAY
+    if first_month:
+        start = date.fromisoformat(f'{first_month}-01').isoformat()
+    if last_month:
+        year, month = map(int, last_month.split('-'))
+        end = date(year + month // 12, month % 12 + 1, 1).isoformat()
+    return {'start': start, 'end': end}
+
+
+class ReportEngine:
+    """Executa os relatórios de ``REPORTS`` sobre um banco SQLite
+
+    Cada execução abre sua própria conexão somente leitura e entrega as
+    linhas em lotes de ``FETCH_SIZE`` conforme são consumidas; todo o
+    cálculo fica no SQLite. Relatórios calculados em Python (``compute``)
+    usam até ``workers`` processos, com as ordens divididas por ``split``
+    (``'mes'`` ou ``'id'``). Um relatório lido até o fim é guardado em
+    cache junto com o ``PRAGMA data_version`` de uma conexão dedicada, que
+    muda a cada escrita confirmada por qualquer outra conexão: enquanto
+    ninguém grava, repetir o relatório não toca no banco.
+    """
+
+    def __init__(self, db_path: str, cache_size: int = CACHE_SIZE, max_rows: int = CACHE_MAX_ROWS,
+                 workers: int = WORKERS, split: str = 'mes'):
+        if split not in SPLITS:
+            raise ValueError(f"Divisão desconhecida: {split}")
+        self.db_path = db_path
+        self.workers = workers
+        self.split = split
+        self.cache_size = cache_size
+        self.max_rows = max_rows
+        self.hits = self.misses = 0
+        self._cache: 'OrderedDict[tuple, Tuple[int, Tuple[tuple, ...]]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._version_conn = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        conn.execute('PRAGMA query_only = ON')
+        conn.execute('PRAGMA busy_timeout = 5000')
+        return conn
+
+    def data_version(self) -> int:
+        with self._lock:
+            return self._version_conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def rows(self, name: str, today: Optional[str] = None, **options) -> Iterator[tuple]:
+        """Linhas do relatório ``name``, em fluxo
+
+        ``options`` são os parâmetros da consulta (``start``/``end``, veja
+        ``period()``); ``today`` é a data de referência para atrasos e idade.
+        """
+        report = REPORTS[name]
+        params = {'today': today or date.today().isoformat(), **period(), **options}
+        key = (name,) + tuple((p, params[p]) for p in report.uses)
+        version = self.data_version()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] == version:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                rows = cached[1]
+            else:
+                rows = None
+                self.misses += 1
+        if rows is not None:
+            yield from rows
+            return
+
+        kept = []
+        for batch in self._batches(report, params):
+            if kept is not None:
+                kept.extend(batch)
+                if len(kept) > self.max_rows:
+                    kept = None
+            yield from batch
+        if kept is not None:
+            with self._lock:
+                self._cache[key] = (version, tuple(kept))
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+    def _batches(self, report: Report, params: Dict[str, str]) -> Iterator[Sequence[tuple]]:
+        if report.compute is not None:
+            rows = iter(report.compute(self.db_path, params, self.workers, self.split))
+            while True:
+                batch = list(itertools.islice(rows, FETCH_SIZE))
+                if not batch:
+                    return
+                yield batch
+        conn = self._connect()
+        try:
+            cursor = conn.execute(report.sql, params)
+            while True:
+                batch = cursor.fetchmany(FETCH_SIZE)
+                if not batch:
+                    return
+                yield batch
+        finally:
+            conn.close()
+
+    def close(self):
+        with self._lock:
+            self._cache.clear()
+            self._version_conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_csv(rows: Iterator[Sequence[Any]], columns: Sequence[str], path: str) -> int:
+    """Grava as linhas em CSV (separador ``;``, como o Excel em português espera); devolve quantas"""
+    count = 0
+    with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Relatórios gerenciais do Sistema ERP")
+    parser.add_argument('relatorio', nargs='?', choices=sorted(REPORTS))
+    parser.add_argument('--db', default=DEFAULT_DATABASE)
+    parser.add_argument('--de', metavar='AAAA-MM', help="primeiro mês do período")
+    parser.add_argument('--ate', metavar='AAAA-MM', help="último mês do período")
+    parser.add_argument('--csv', metavar='ARQUIVO', help="grava o relatório completo em CSV")
+    parser.add_argument('--linhas', type=int, default=50, help="linhas mostradas no terminal")
+    parser.add_argument('--processos', type=int, default=WORKERS,
+                        help="processos dos relatórios calculados em Python (padrão: um por núcleo)")
+    parser.add_argument('--dividir', choices=SPLITS, default='mes',
+                        help="divide as ordens entre os processos por mês ou por faixa de números")
+    args = parser.parse_args(argv)
+
+    if args.relatorio is None:
+        for report in REPORTS.values():
+            print(f"{report.name:<10} {report.title}")
+        return 0
+    if not os.path.exists(args.db):
+        print(f"❌ Banco não encontrado: {args.db}")
+        return 1
+    try:
+        options = period(args.de, args.ate)
+    except ValueError:
+        print("❌ Use meses no formato AAAA-MM")
+        return 1
+
+    report = REPORTS[args.relatorio]
+    started = time.perf_counter()
+    with ReportEngine(args.db, workers=max(1, args.processos), split=args.dividir) as engine:
+        rows = engine.rows(report.name, **options)
+        if args.csv:
+            count = write_csv(rows, report.columns, args.csv)
+            print(f"✅ {count} linhas gravadas em {args.csv} em {time.perf_counter() - started:.2f}s")
+            return 0
+        print(report.title)
+        print(' | '.join(report.columns))
+        count = 0
+        for row in rows:
+            count += 1
+            if count <= args.linhas:
+                print(' | '.join('' if value is None else str(value) for value in row))
+    if count > args.linhas:
+        print(f"... mais {count - args.linhas} linhas (use --csv para o relatório completo)")
+    print(f"⏳ {count} linhas em {time.perf_counter() - started:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
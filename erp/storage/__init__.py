@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sistema ERP - Camada de Armazenamento
+Repositórios de usuários, funcionários, equipamentos, ordens de serviço e
+orçamentos sobre o banco SQLite (pool de conexões do DatabaseManager),
+usados pela GUI, pela CLI e pelo servidor web para que todos vejam os
+mesmos dados.
+
+Uso:
+    from erp.storage import Storage
+
+    with Storage() as storage:
+        storage.users.verify('admin', 'mudar@123')
+        storage.service_orders.open_orders(limit=20)
+        with storage.batch():           # várias escritas, uma única transação
+            storage.employees.put('001', {...})
+            storage.budgets.save({...})
+
+A CLI usa este pacote no modo padrão (``ERP_STORAGE_MODE=sqlite``); ``exchange.py`` importa
+os arquivos JSON da CLI e exporta o banco no formato de ``demo_data.json``.
+"""
+
+from typing import Dict, Union
+
+from .. import DEFAULT_DATABASE
+from ..database import DatabaseManager
+from .base import Repository, CHUNK_SIZE, PAGE_SIZE
+from .users import UserRepository, ADMIN_ROLES, hash_password
+from .employees import EmployeeRepository, EquipmentRepository
+from .service_orders import ServiceOrderRepository, BudgetRepository, CLOSED_STATUS, APPROVED_STATUS
+
+
+class Storage:
+    """Os repositórios de um banco, compartilhando o mesmo DatabaseManager
+
+    Recebe um DatabaseManager já aberto (que continua sendo de quem o
+    criou) ou o caminho de um banco, aberto e fechado pelo próprio Storage.
+    """
+
+    def __init__(self, db: Union[DatabaseManager, str, None] = None, pool_size: int = 4):
+        self._owns_db = not isinstance(db, DatabaseManager)
+        self.db = DatabaseManager(db or DEFAULT_DATABASE, pool_size) if self._owns_db else db
+        self.users = UserRepository(self.db)
+        self.employees = EmployeeRepository(self.db)
+        self.equipment = EquipmentRepository(self.db)
+        self.service_orders = ServiceOrderRepository(self.db)
+        self.budgets = BudgetRepository(self.db)
+
+    def batch(self):
+        """Agrupa as escritas do bloco em uma única transação (um único fsync)"""
+        return self.db.transaction()
+
+    def counters(self) -> Dict[str, int]:
+        """Contadores agregados (funcionários, equipamentos, O.S. abertas, orçamentos aprovados...)"""
+        return dict(self.db.execute_query('SELECT name, value FROM dashboard_stats'))
+
+    def close(self):
+        if self._owns_db:
+            self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+__all__ = [
+    'Storage', 'DEFAULT_DATABASE', 'Repository', 'CHUNK_SIZE', 'PAGE_SIZE',
+    'UserRepository', 'ADMIN_ROLES', 'hash_password',
+    'EmployeeRepository', 'EquipmentRepository',
+    'ServiceOrderRepository', 'BudgetRepository', 'CLOSED_STATUS', 'APPROVED_STATUS',
+]
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sistema ERP - Armazenamento: Repositório Base
+Acesso por chave, iteração paginada e gravação em lote sobre o DatabaseManager
+"""
+
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from ..database import DatabaseManager
+
+# Linhas por transação nas gravações em lote
+CHUNK_SIZE = 10000
+# Linhas por consulta ao percorrer uma tabela inteira
+PAGE_SIZE = 1000
+
+
+class Repository(Mapping):
+    """Tabela vista como um dicionário somente leitura de registros
+
+    ``repo[chave]``, ``chave in repo``, ``len(repo)`` e ``repo.items()``
+    funcionam como nos arquivos JSON da CLI, mas cada acesso é uma consulta
+    indexada: nada é carregado inteiro em memória. A iteração percorre a
+    tabela em páginas de ``PAGE_SIZE`` linhas, por chave. As escritas passam
+    por métodos explícitos, cada uma em sua transação, ou todas de uma vez
+    dentro de ``Storage.batch()``.
+    """
+
+    table = ''
+    key = 'id'
+    columns: Sequence[str] = ()
+    # Colunas gravadas pelo repositório, mas nunca devolvidas nos registros
+    hidden_columns: Sequence[str] = ()
+    # Contador de dashboard_stats com o total de linhas, se existir
+    counter: Optional[str] = None
+
+    def __init__(self, db: DatabaseManager):
+        self.db = db
+        self._select = f"SELECT {', '.join(self.columns)} FROM {self.table}"
+
+    def record(self, row: Sequence[Any]) -> Dict[str, Any]:
+        """Registro (dicionário) de uma linha na ordem de ``columns``"""
+        return dict(zip(self.columns, row))
+
+    # ------------------------------------------------------------- leitura
+
+    def __getitem__(self, key):
+        rows = self.db.execute_query(f"{self._select} WHERE {self.key} = ?", (key,))
+        if not rows:
+            raise KeyError(key)
+        return self.record(rows[0])
+
+    def __contains__(self, key) -> bool:
+        return bool(self.db.execute_query(f"SELECT 1 FROM {self.table} WHERE {self.key} = ?", (key,)))
+
+    def __len__(self) -> int:
+        if self.counter is not None:
+            rows = self.db.execute_query('SELECT value FROM dashboard_stats WHERE name = ?', (self.counter,))
+            if rows:
+                return rows[0][0]
+        return self.db.execute_query(f"SELECT COUNT(*) FROM {self.table}")[0][0]
+
+    def __iter__(self) -> Iterator:
+        for row in self.scan(columns=(self.key,)):
+            yield row[0]
+
+    def items(self) -> Iterator[tuple]:
+        key_index = list(self.columns).index(self.key)
+        for row in self.scan():
+            yield row[key_index], self.record(row)
+
+    def values(self) -> Iterator[Dict[str, Any]]:
+        for row in self.scan():
+            yield self.record(row)
+
+    def scan(self, where: str = '', params: tuple = (), columns: Optional[Sequence[str]] = None,
+             page_size: int = PAGE_SIZE) -> Iterator[tuple]:
+        """Todas as linhas em ordem de chave, buscadas em páginas (paginação por chave)
+
+        A chave precisa estar entre as ``columns`` pedidas.
+        """
+        columns = list(columns or self.columns)
+        key_index = columns.index(self.key)
+        condition = f"({where}) AND " if where else ''
+        query = (f"SELECT {', '.join(columns)} FROM {self.table} "
+                 f"WHERE {condition}{self.key} > ? ORDER BY {self.key} LIMIT ?")
+        first = (f"SELECT {', '.join(columns)} FROM {self.table} "
+                 f"{'WHERE ' + where if where else ''} ORDER BY {self.key} LIMIT ?")
+        rows = self.db.execute_query(first, params + (page_size,))
+        while rows:
+            yield from rows
+            if len(rows) < page_size:
+                return
+            rows = self.db.execute_query(query, params + (rows[-1][key_index], page_size))
+
+    def page(self, after=None, limit: int = PAGE_SIZE, where: str = '', params: tuple = (),
+             descending: bool = False) -> List[Dict]:
+        """Uma página de registros em ordem de chave, começando depois da chave ``after``
+
+        Para a página seguinte, passe a chave do último registro: a consulta
+        vai direto a ela pelo índice, sem OFFSET, em qualquer ponto da tabela.
+        """
+        conditions = [f"({where})"] if where else []
+        if after is not None:
+            conditions.append(f"{self.key} {'<' if descending else '>'} ?")
+            params = params + (after,)
+        query = self._select
+        if conditions:
+            query += f" WHERE {' AND '.join(conditions)}"
+        query += f" ORDER BY {self.key}{' DESC' if descending else ''} LIMIT ?"
+        return [self.record(row) for row in self.db.execute_query(query, params + (limit,))]
+
+    def find(self, where: str, params: tuple = (), order_by: str = '', limit: Optional[int] = None) -> List[Dict]:
+        """Registros que atendem a uma condição SQL (nunca montada com texto do usuário)"""
+        query = f"{self._select} WHERE {where}"
+        if order_by:
+            query += f" ORDER BY {order_by}"
+        if limit is not None:
+            query += " LIMIT ?"
+            params = params + (limit,)
+        return [self.record(row) for row in self.db.execute_query(query, params)]
+
+    # ------------------------------------------------------------- escrita
+
+    def _insert_statement(self, columns: Sequence[str], update: bool) -> str:
+        placeholders = ', '.join('?' for _ in columns)
+        statement = f"INTO {self.table} ({', '.join(columns)}) VALUES ({placeholders})"
+        if not update:
+            return f"INSERT OR IGNORE {statement}"
+        assignments = ', '.join(f'{c} = excluded.{c}' for c in columns if c != self.key)
+        return f"INSERT {statement} ON CONFLICT({self.key}) DO UPDATE SET {assignments}"
+
+    def save(self, record: Dict[str, Any]):
+        """Grava um registro completo, substituindo o existente com a mesma chave"""
+        columns = [c for c in (*self.columns, *self.hidden_columns) if c in record]
+        with self.db.transaction() as cursor:
+            cursor.execute(self._insert_statement(columns, update=True), [record[c] for c in columns])
+
+    def add_many(self, records: Iterable[Dict[str, Any]], update: bool = False,
+                 chunk_size: int = CHUNK_SIZE) -> int:
+        """Grava vários registros em transações de ``chunk_size`` linhas
+
+        Sem ``update``, chaves já existentes são mantidas como estão.
+        Retorna a quantidade de linhas gravadas.
+        """
+        written = 0
+        batch: List[tuple] = []
+        columns = (*self.columns, *self.hidden_columns)
+        statement = self._insert_statement(columns, update)
+
+        def flush():
+            nonlocal written
+            with self.db.transaction() as cursor:
+                cursor.executemany(statement, batch)
+                written += cursor.rowcount
+            batch.clear()
+
+        for record in records:
+            batch.append(tuple(record.get(c) for c in columns))
+            if len(batch) >= chunk_size:
+                flush()
+        if batch:
+            flush()
+        return written
+
+    def update(self, key, **fields) -> bool:
+        """Altera campos de um registro; retorna False se a chave não existe"""
+        unknown = set(fields) - set(self.columns) - set(self.hidden_columns)
+        if unknown:
+            raise ValueError(f"Campos desconhecidos em {self.table}: {', '.join(sorted(unknown))}")
+        if not fields:
+            return key in self
+        assignments = ', '.join(f'{name} = ?' for name in fields)
+        with self.db.transaction() as cursor:
+            cursor.execute(f"UPDATE {self.table} SET {assignments} WHERE {self.key} = ?",
+                           (*fields.values(), key))
+            return cursor.rowcount > 0
+
+    def delete(self, key) -> bool:
+        """Remove um registro; retorna False se a chave não existe"""
+        with self.db.transaction() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE {self.key} = ?", (key,))
+            return cursor.rowcount > 0
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sistema ERP - Armazenamento: Funcionários e Equipamentos
+Cadastros simples, chaveados pelo código
+"""
+
+from datetime import date
+from typing import Any, Dict
+
+from ..importer import Converter, RowError
+from .base import Repository
+
+
+class EmployeeRepository(Repository):
+    """Funcionários por código
+
+    Registros trazem também ``status`` ("Ativo"/"Inativo"), o campo usado
+    pela CLI. ``save`` aceita registros no formato da CLI (salário como
+    texto, ``status`` em vez de ``active``), validados como na importação.
+    """
+
+    table = 'employees'
+    columns = ('id', 'name', 'position', 'department', 'hire_date', 'salary', 'active')
+    counter = 'employees_total'
+
+    def record(self, row) -> Dict[str, Any]:
+        employee = super().record(row)
+        employee['active'] = bool(employee['active'])
+        employee['status'] = 'Ativo' if employee['active'] else 'Inativo'
+        return employee
+
+    def save(self, record: Dict[str, Any]):
+        """Grava um funcionário; levanta ValueError se algum campo for inválido"""
+        record = dict(record)
+        record.setdefault('hire_date', date.today().isoformat())
+        try:
+            row = Converter(self.db).convert('employees', record)
+        except RowError as e:
+            raise ValueError(str(e)) from None
+        super().save(dict(zip(self.columns, row)))
+
+    def put(self, code: str, record: Dict[str, Any]):
+        """Mesmo que ``save``, com a assinatura do armazenamento JSON da CLI"""
+        self.save(dict(record, id=code))
+
+    def next_code(self, width: int = 3) -> str:
+        """Próximo código numérico sequencial, como '001'"""
+        rows = self.db.execute_query(
+            "SELECT MAX(CAST(id AS INTEGER)) FROM employees WHERE id GLOB '[0-9]*' AND id NOT GLOB '*[^0-9]*'")
+        return f"{(rows[0][0] or 0) + 1:0{width}d}"
+
+
+class EquipmentRepository(Repository):
+    """Equipamentos por código"""
+
+    table = 'equipment'
+    columns = ('id', 'name', 'type', 'brand', 'model', 'serial_number', 'purchase_date', 'status',
+               'maintenance_interval', 'last_maintenance', 'next_maintenance')
+    counter = 'equipment_total'
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sistema ERP - Armazenamento: Importação e Exportação JSON
+Leva os dados da CLI (users_data.json, employees_data.json, service_orders.json)
+para o banco e exporta o banco no formato de demo_data.json
+
+Uso:
+    python -m erp.storage.exchange --exportar dados.json
+    python -m erp.storage.exchange --importar dados.json --atualizar
+    python -m erp.storage.exchange --importar-cli cli
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import Any, Dict, Iterable, Mapping, Optional, TextIO
+
+from ..journal import JournaledStore
+from ..importer import ImportReport, TABLE_COLUMNS, import_file, iter_json_sections, parse_money, RowError
+from . import Storage, DEFAULT_DATABASE
+
+# Seções exportadas, na ordem em que a importação precisa delas
+EXPORT_SECTIONS = ('users', 'employees', 'equipment', 'service_orders', 'budgets')
+USER_COLUMNS = ('username', 'password_hash', 'role', 'created_date', 'last_login', 'active')
+# Arquivos da CLI (o journal de cada um é aplicado pelo JournaledStore)
+CLI_FILES = {
+    'users': 'users_data.json',
+    'employees': 'employees_data.json',
+    'orders': 'service_orders.json',
+}
+
+
+def _rows(storage: Storage, section: str) -> Iterable[Dict[str, Any]]:
+    """Linhas de uma tabela, em páginas por rowid, com as colunas da importação"""
+    columns = USER_COLUMNS if section == 'users' else TABLE_COLUMNS[section]
+    query = f"SELECT {', '.join(columns)}, rowid FROM {section} WHERE rowid > ? ORDER BY rowid LIMIT 1000"
+    last = 0
+    while True:
+        rows = storage.db.execute_query(query, (last,))
+        for row in rows:
+            yield dict(zip(columns, row))
+        if len(rows) < 1000:
+            return
+        last = rows[-1][-1]
+
+
+def export_json(storage: Storage, stream: TextIO) -> Dict[str, int]:
+    """Grava o banco como ``{"seção": [registro, ...]}``, registro a registro
+
+    O arquivo volta ao banco com ``import_json`` (ou ``erp.importer``, que
+    ignora a seção de usuários). Senhas saem apenas como hash.
+    """
+    counts = {}
+    stream.write('{')
+    for position, section in enumerate(EXPORT_SECTIONS):
+        stream.write(f'{"," if position else ""}\n  "{section}": [')
+        count = 0
+        for record in _rows(storage, section):
+            stream.write(f'{"," if count else ""}\n    {json.dumps(record, ensure_ascii=False)}')
+            count += 1
+        stream.write('\n  ]' if count else ']')
+        counts[section] = count
+    stream.write('\n}\n')
+    return counts
+
+
+def import_json(storage: Storage, path: str, update: bool = False,
+                rejects: Optional[TextIO] = None) -> ImportReport:
+    """Importa um arquivo de ``export_json`` (ou no formato demo_data.json)"""
+    report = import_file(storage.db, path, update=update, rejects=rejects)
+    with open(path, encoding='utf-8') as f:
+        users = (record for section, record in iter_json_sections(f)
+                 if section == 'users' and isinstance(record, dict))
+        written = storage.users.add_many(users, update=update)
+    if written:
+        report.imported['users'] = written
+    return report
+
+
+def import_cli_data(storage: Storage, users: Optional[Mapping] = None, employees: Optional[Mapping] = None,
+                    orders: Optional[Mapping] = None, update: bool = False) -> Dict[str, int]:
+    """Grava no banco os dicionários dos arquivos JSON da CLI
+
+    ``users`` é ``{usuário: {...}}`` com a senha em texto (gravada como
+    hash), ``employees`` é ``{código: {...}}`` e ``orders`` é
+    ``{número: {...}}``. Funcionários com salário ilegível entram com
+    salário zero; nada é descartado.
+    """
+    counts = {}
+    if users:
+        counts['users'] = storage.users.add_many(
+            (dict(user, username=username) for username, user in users.items()), update=update)
+    if employees:
+        def employee_rows():
+            for code, employee in employees.items():
+                try:
+                    salary = parse_money(employee.get('salary'))
+                except RowError:
+                    salary = 0.0
+                yield {
+                    'id': code,
+                    'name': employee.get('name', ''),
+                    'position': employee.get('position', ''),
+                    'department': employee.get('department', ''),
+                    'hire_date': employee.get('hire_date', ''),
+                    'salary': salary,
+                    'active': int(employee.get('status', 'Ativo') == 'Ativo'),
+                }
+        counts['employees'] = storage.employees.add_many(employee_rows(), update=update)
+    if orders:
+        counts['service_orders'] = storage.service_orders.add_many(orders.values(), update=update)
+    return counts
+
+
+def read_cli_files(directory: str) -> Dict[str, Mapping]:
+    """Dicionários dos arquivos da CLI em ``directory``, com os journals aplicados"""
+    data = {}
+    for section, name in CLI_FILES.items():
+        path = os.path.join(directory, name)
+        if os.path.exists(path) or os.path.exists(path + '.journal'):
+            store = JournaledStore(path, {})
+            try:
+                data[section] = dict(store)
+            finally:
+                store.close()
+    return data
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Importação e exportação JSON do banco do Sistema ERP")
+    parser.add_argument('--db', default=DEFAULT_DATABASE)
+    action = parser.add_mutually_exclusive_group(required=True)
+    action.add_argument('--exportar', metavar='ARQUIVO', help="grava o banco em JSON")
+    action.add_argument('--importar', metavar='ARQUIVO', help="importa um JSON exportado ou demo_data.json")
+    action.add_argument('--importar-cli', metavar='PASTA', help="importa os arquivos JSON da CLI")
+    parser.add_argument('--atualizar', action='store_true', help="substitui registros existentes")
+    args = parser.parse_args(argv)
+
+    with Storage(args.db) as storage:
+        try:
+            if args.exportar:
+                with open(args.exportar + '.tmp', 'w', encoding='utf-8') as f:
+                    counts = export_json(storage, f)
+                os.replace(args.exportar + '.tmp', args.exportar)
+                print(f"✅ Exportado para {args.exportar}: "
+                      + ', '.join(f"{name} {count}" for name, count in counts.items()))
+            elif args.importar:
+                report = import_json(storage, args.importar, update=args.atualizar)
+                print(f"✅ {report.total_imported} registros importados, {report.rejected} rejeitados")
+            else:
+                counts = import_cli_data(storage, **read_cli_files(args.importar_cli), update=args.atualizar)
+                print("✅ Importado da CLI: " + ', '.join(f"{name} {count}" for name, count in counts.items()))
+        except (OSError, ValueError) as e:
+            print(f"❌ {e}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
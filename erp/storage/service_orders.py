@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sistema ERP - Armazenamento: Ordens de Serviço e Orçamentos
+Ordens numeradas como na CLI, com as consultas das telas de O.S. e de orçamentos
+"""
+
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional
+
+from ..fulltext import search
+from .base import CHUNK_SIZE, Repository
+
+CLOSED_STATUS = 'Concluída'
+APPROVED_STATUS = 'Aprovado'
+# Números de O.S. começam aqui, como na CLI
+FIRST_NUMBER = 1001
+# Colunas de service_orders alteráveis por update()
+WRITABLE_COLUMNS = ('employee_id', 'equipment_id', 'description', 'priority', 'status', 'created_date',
+                    'due_date', 'client', 'technician', 'equipment_name', 'closed_date')
+
+
+class ServiceOrderRepository(Repository):
+    """Ordens de serviço pelo número (coluna ``number``)
+
+    Os registros vêm de ``service_orders_view``, no formato da CLI
+    (``number``, ``client``, ``equipment``, ``problem``, ``technician``...),
+    com técnico e equipamento resolvidos pelos cadastros quando a ordem foi
+    aberta na GUI. Os métodos de consulta são os do repositório JSON da CLI
+    (``open_orders``, ``by_client_name``...), todos respondidos por índices e
+    devolvendo as ordens mais recentes primeiro.
+    """
+
+    table = 'service_orders_view'
+    key = 'number'
+    columns = ('number', 'id', 'client', 'equipment', 'problem', 'technician', 'priority', 'status',
+               'created_date', 'closed_date', 'due_date', 'employee_id', 'equipment_id')
+    counter = 'service_orders_total'
+
+    def _numbers(self, where: str, params: tuple, limit: Optional[int]) -> List[Dict]:
+        """Ordens cujos números vêm de uma condição sobre a tabela, mais recentes primeiro"""
+        query = f"SELECT number FROM service_orders WHERE {where} ORDER BY number DESC"
+        if limit is not None:
+            query += f" LIMIT {int(limit)}"
+        return self.find(f"number IN ({query})", params, order_by='number DESC')
+
+    # ------------------------------------------------------------- escrita
+
+    def create(self, client: str, equipment: str, problem: str, technician: str,
+               priority: str = 'Média', status: str = 'Em Aberto',
+               employee_id: str = '', equipment_id: str = '', due_date: Optional[str] = None) -> Dict:
+        """Abre uma ordem com o próximo número e a devolve"""
+        today = date.today().isoformat()
+        with self.db.transaction() as cursor:
+            cursor.execute('SELECT MAX(number) FROM service_orders')
+            number = max((cursor.fetchone()[0] or 0) + 1, FIRST_NUMBER)
+            # Códigos gravados por importações podem coincidir com "OS<número>"
+            while True:
+                cursor.execute(
+                    'INSERT OR IGNORE INTO service_orders (number, id, employee_id, equipment_id, description, '
+                    'priority, status, created_date, due_date, client, technician, equipment_name, closed_date) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (number, f'OS{number}', employee_id, equipment_id, problem, priority, status, today,
+                     due_date or today, client, technician, equipment,
+                     today if status == CLOSED_STATUS else None)
+                )
+                if cursor.rowcount:
+                    break
+                number += 1
+        return self[number]
+
+    def set_status(self, number: int, status: str) -> Dict:
+        """Muda a situação de uma ordem, registrando a data de conclusão"""
+        with self.db.transaction() as cursor:
+            cursor.execute(
+                'UPDATE service_orders SET status = ?, '
+                'closed_date = CASE WHEN ? = ? THEN ? WHEN status = ? THEN NULL ELSE closed_date END '
+                'WHERE number = ?',
+                (status, status, CLOSED_STATUS, date.today().isoformat(), CLOSED_STATUS, number)
+            )
+            if not cursor.rowcount:
+                raise KeyError(number)
+        return self[number]
+
+    def update(self, number: int, **fields) -> bool:
+        """Altera colunas de ``service_orders`` de uma ordem; retorna False se ela não existe"""
+        if not fields:
+            return number in self
+        unknown = set(fields) - set(WRITABLE_COLUMNS)
+        if unknown:
+            raise ValueError(f"Campos desconhecidos em service_orders: {', '.join(sorted(unknown))}")
+        assignments = ', '.join(f'{name} = ?' for name in fields)
+        with self.db.transaction() as cursor:
+            cursor.execute(f"UPDATE service_orders SET {assignments} WHERE number = ?", (*fields.values(), number))
+            return cursor.rowcount > 0
+
+    def delete(self, number: int) -> bool:
+        """Remove uma ordem; retorna False se ela não existe"""
+        with self.db.transaction() as cursor:
+            cursor.execute('DELETE FROM service_orders WHERE number = ?', (number,))
+            return cursor.rowcount > 0
+
+    def add_many(self, records: Iterable[Dict[str, Any]], update: bool = False,
+                 chunk_size: int = CHUNK_SIZE) -> int:
+        """Grava ordens no formato da CLI, mantendo o número de cada uma
+
+        Sem ``update``, números já existentes são mantidos como estão.
+        """
+        verb = 'INSERT OR REPLACE' if update else 'INSERT OR IGNORE'
+        statement = (f'{verb} INTO service_orders (number, id, employee_id, equipment_id, description, priority, '
+                     'status, created_date, due_date, client, technician, equipment_name, closed_date) '
+                     'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)')
+        written = 0
+        batch: List[tuple] = []
+
+        def flush():
+            nonlocal written
+            with self.db.transaction() as cursor:
+                cursor.executemany(statement, batch)
+                written += cursor.rowcount
+            batch.clear()
+
+        for o in records:
+            number = int(o['number'])
+            batch.append((number, o.get('id') or f'OS{number}', o.get('employee_id') or '',
+                          o.get('equipment_id') or '', o['problem'], o['priority'], o['status'],
+                          o['created_date'], o.get('due_date') or o['created_date'], o.get('client') or '',
+                          o.get('technician') or '', o.get('equipment') or '', o.get('closed_date')))
+            if len(batch) >= chunk_size:
+                flush()
+        if batch:
+            flush()
+        return written
+
+    # ------------------------------------------------------------- consultas
+
+    def recent(self, limit: int = 100) -> List[Dict]:
+        """Ordens mais recentes"""
+        return self.find('1', order_by='number DESC', limit=limit)
+
+    def with_status(self, *statuses: str, limit: Optional[int] = None) -> List[Dict]:
+        """Ordens em qualquer uma das situações"""
+        if not statuses:
+            return []
+        placeholders = ', '.join('?' for _ in statuses)
+        return self._numbers(f"status IN ({placeholders})", statuses, limit)
+
+    def open_orders(self, limit: Optional[int] = None) -> List[Dict]:
+        """Ordens ainda não concluídas"""
+        return self._numbers('status != ?', (CLOSED_STATUS,), limit)
+
+    def closed_orders(self, limit: Optional[int] = None) -> List[Dict]:
+        """Ordens concluídas"""
+        return self.with_status(CLOSED_STATUS, limit=limit)
+
+    def count(self, *statuses: str) -> int:
+        """Quantidade de ordens nas situações indicadas"""
+        if not statuses:
+            return 0
+        placeholders = ', '.join('?' for _ in statuses)
+        return self.db.execute_query(
+            f"SELECT COUNT(*) FROM service_orders WHERE status IN ({placeholders})", statuses)[0][0]
+
+    def count_open(self) -> int:
+        """Quantidade de ordens não concluídas (contador mantido por gatilhos)"""
+        rows = self.db.execute_query("SELECT value FROM dashboard_stats WHERE name = 'service_orders_open'")
+        return rows[0][0] if rows else 0
+
+    def by_technician_name(self, name: str, limit: Optional[int] = None) -> List[Dict]:
+        """Ordens de um técnico (nome exato, sem diferenciar maiúsculas)"""
+        return self._numbers('technician = ? COLLATE NOCASE', (' '.join(name.split()),), limit)
+
+    def by_client_name(self, name: str, limit: Optional[int] = None) -> List[Dict]:
+        """Ordens de um cliente (nome exato, sem diferenciar maiúsculas)"""
+        return self._numbers('client = ? COLLATE NOCASE', (' '.join(name.split()),), limit)
+
+    def created_between(self, start: str, end: str, limit: Optional[int] = None) -> List[Dict]:
+        """Ordens abertas entre duas datas ISO, inclusive"""
+        return self._numbers('created_date BETWEEN ? AND ?', (start, end + '\uffff'), limit)
+
+    def search_text(self, text: str, limit: int = 20, marks=('[', ']')) -> List[tuple]:
+        """(ordem, trecho destacado) das ordens cuja descrição contém todas as palavras, melhores primeiro"""
+        hits = search(self.db, text, 'service_orders', limit, marks)
+        if not hits:
+            return []
+        placeholders = ', '.join('?' for _ in hits)
+        orders = {order['id']: order for order in self.find(f"id IN ({placeholders})", tuple(h.id for h in hits))}
+        return [(orders[hit.id], hit.snippet) for hit in hits if hit.id in orders]
+
+
+class BudgetRepository(Repository):
+    """Orçamentos por código"""
+
+    table = 'budgets'
+    columns = ('id', 'client', 'description', 'value', 'status', 'created_date', 'valid_until')
+
+    def with_status(self, status: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Orçamentos em uma situação, mais recentes primeiro"""
+        return self.find('status = ?', (status,), order_by='created_date DESC', limit=limit)
+
+    def count_approved(self) -> int:
+        """Quantidade de orçamentos aprovados (contador mantido por gatilhos)"""
+        rows = self.db.execute_query("SELECT value FROM dashboard_stats WHERE name = 'budgets_approved'")
+        return rows[0][0] if rows else 0
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sistema ERP - Armazenamento: Usuários
+Contas de acesso compartilhadas pela CLI e pela GUI
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from ..auth import hash_password, legacy_hash, needs_rehash, reject_unknown, verify_password
+from .base import CHUNK_SIZE, Repository
+
+# A CLI cria administradores como "Administrador", a GUI como "Admin"
+ADMIN_ROLES = ('Admin', 'Administrador')
+
+
+class UserRepository(Repository):
+    """Usuários por nome; a senha só entra e sai como hash
+
+    Registros têm ``username``, ``role``, ``created_date``, ``last_login`` e
+    ``active`` (bool), como em ``users_data.json``, mas sem a senha.
+    """
+
+    table = 'users'
+    key = 'username'
+    columns = ('username', 'role', 'created_date', 'last_login', 'active')
+    hidden_columns = ('password_hash',)
+
+    def record(self, row) -> Dict[str, Any]:
+        user = super().record(row)
+        user['active'] = bool(user['active'])
+        return user
+
+    def verify(self, username: str, password: str) -> Optional[Dict[str, Any]]:
+        """Registro do usuário se ele estiver ativo e a senha conferir
+
+        Roda o KDF: chamar fora da thread da interface. Hashes antigos ou
+        mais baratos que o custo atual são regravados aqui.
+        """
+        rows = self.db.execute_query(
+            f"SELECT {', '.join(self.columns)}, id, password_hash FROM users WHERE username = ? AND active = 1",
+            (username,)
+        )
+        if not rows:
+            reject_unknown(password)
+            return None
+        stored = rows[0][-1]
+        if not verify_password(password, stored):
+            return None
+        if needs_rehash(stored):
+            super().update(username, password_hash=hash_password(password))
+        user = self.record(rows[0][:len(self.columns)])
+        user['id'] = rows[0][-2]
+        return user
+
+    def create(self, username: str, password: str, role: str, created_date: Optional[str] = None,
+               last_login: Optional[str] = None, active: bool = True) -> bool:
+        """Cadastra um usuário; retorna False se o nome já existe"""
+        with self.db.transaction() as cursor:
+            cursor.execute(
+                'INSERT OR IGNORE INTO users (username, password_hash, role, created_date, last_login, active) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (username, hash_password(password), role, created_date or datetime.now().isoformat(),
+                 last_login, int(active))
+            )
+            return cursor.rowcount > 0
+
+    def update(self, username: str, **fields) -> bool:
+        """Altera campos de um usuário; ``password`` é gravada como hash"""
+        if 'password' in fields:
+            fields['password_hash'] = hash_password(fields.pop('password'))
+        if 'active' in fields:
+            fields['active'] = int(fields['active'])
+        return super().update(username, **fields)
+
+    def add_many(self, records, update: bool = False, chunk_size: int = CHUNK_SIZE) -> int:
+        """Grava usuários com ``password_hash`` (ou ``password``, que é convertida)
+
+        Senhas em texto entram como SHA-256, rápido o bastante para
+        importações grandes, e passam ao KDF no primeiro login de cada um.
+        """
+        def with_hash():
+            for record in records:
+                if 'password_hash' not in record:
+                    record = dict(record, password_hash=legacy_hash(record['password']))
+                if 'active' in record:
+                    record = dict(record, active=int(record['active']))
+                yield record
+
+        return super().add_many(with_hash(), update, chunk_size)
+
+    def touch_login(self, username: str, when: Optional[str] = None):
+        """Registra o último acesso"""
+        super().update(username, last_login=when or datetime.now().isoformat())
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sistema ERP - Executor de Consultas
+Executa o acesso ao banco fora da thread do Tk e devolve os resultados via root.after
+"""
+
+import queue
+import threading
+import traceback
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+
+# Intervalo (ms) de verificação de resultados enquanto há tarefas pendentes
+POLL_INTERVAL = 15
+# Intervalo (ms) da verificação permanente, que entrega os call_in_ui feitos sem tarefas pendentes
+IDLE_POLL_INTERVAL = 100
+
+
+class Task:
+    """Uma chamada submetida ao executor"""
+
+    def __init__(self, key: Optional[Hashable], pool=None):
+        self.key = key
+        self.cancelled = False
+        self.future = None
+        self.on_success: Optional[Callable[[Any], None]] = None
+        self.on_error: Optional[Callable[[BaseException], None]] = None
+        self._pool = pool
+        self._thread_id = None
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        """Descarta o resultado; interrompe a consulta SQLite se já estiver rodando"""
+        with self._lock:
+            self.cancelled = True
+            if self._thread_id is not None and self._pool is not None:
+                self._pool.interrupt(self._thread_id)
+
+
+class QueryExecutor:
+    """Pool de threads de trabalho para as consultas da interface
+
+    O código da interface submete funções (normalmente chamadas ao
+    DatabaseManager) e recebe o resultado em ``on_success`` ou
+    ``on_error``, sempre na thread do Tk: os trabalhadores apenas
+    enfileiram o resultado, e a fila é esvaziada por ``root.after`` a cada
+    ``POLL_INTERVAL`` ms enquanto houver tarefas pendentes e a cada
+    ``IDLE_POLL_INTERVAL`` ms quando ocioso. Cada trabalhador usa sua
+    própria conexão do pool do DatabaseManager.
+
+    Tarefas submetidas com a mesma ``key`` se substituem: a anterior é
+    cancelada (e sua consulta interrompida), então trocas rápidas de tela
+    nunca exibem resultados antigos.
+    """
+
+    def __init__(self, root: tk.Misc, db=None, max_workers: int = 4):
+        self.root = root
+        self.pool = db.pool if db is not None else None
+        self._workers = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='erp-db')
+        self._results: "queue.Queue" = queue.Queue()
+        self._by_key: Dict[Hashable, Task] = {}
+        self._pending = 0
+        self._poll_id = None
+        self._poll_delay = None
+        self._ui_thread = threading.current_thread()
+        self._closed = False
+        self._schedule(IDLE_POLL_INTERVAL)
+
+    def submit(self, fn: Callable, *args,
+               on_success: Optional[Callable[[Any], None]] = None,
+               on_error: Optional[Callable[[BaseException], None]] = None,
+               key: Optional[Hashable] = None) -> Task:
+        """Executa ``fn(*args)`` em segundo plano (chamar na thread do Tk)"""
+        if key is not None:
+            self.cancel(key)
+
+        task = Task(key, self.pool)
+        task.on_success = on_success
+        task.on_error = on_error
+        if key is not None:
+            self._by_key[key] = task
+
+        task.future = self._workers.submit(self._run, task, fn, args)
+        self._pending += 1
+        self._schedule(POLL_INTERVAL)
+        return task
+
+    def cancel(self, key: Hashable):
+        """Cancela a tarefa pendente associada a ``key``, se houver"""
+        task = self._by_key.pop(key, None)
+        if task is not None:
+            task.cancel()
+
+    def call_in_ui(self, fn: Callable, *args):
+        """Agenda ``fn(*args)`` na thread do Tk (pode ser chamado de qualquer thread)
+
+        Entregue na próxima verificação da fila: em até ``POLL_INTERVAL`` ms
+        quando chamado da thread do Tk ou com tarefas pendentes, e em até
+        ``IDLE_POLL_INTERVAL`` ms pela verificação permanente nos demais casos.
+        """
+        self._results.put((None, fn, args))
+        if threading.current_thread() is self._ui_thread:
+            self._schedule(POLL_INTERVAL)
+
+    def _run(self, task: Task, fn: Callable, args: tuple):
+        """Corpo executado na thread de trabalho"""
+        with task._lock:
+            if task.cancelled:
+                self._results.put((task, False, None))
+                return
+            task._thread_id = threading.get_ident()
+        try:
+            outcome = (task, True, fn(*args))
+        except BaseException as e:
+            outcome = (task, False, e)
+        finally:
+            with task._lock:
+                task._thread_id = None
+        self._results.put(outcome)
+
+    def _schedule(self, delay: int):
+        """Garante que a fila de resultados será verificada em até ``delay`` ms (thread do Tk)"""
+        if self._closed or (self._poll_id is not None and self._poll_delay <= delay):
+            return
+        if self._poll_id is not None:
+            self.root.after_cancel(self._poll_id)
+        self._poll_id = self.root.after(delay, self._drain)
+        self._poll_delay = delay
+
+    def _drain(self):
+        """Entrega os resultados prontos aos callbacks (thread do Tk)"""
+        self._poll_id = None
+        try:
+            while True:
+                try:
+                    task, ok, value = self._results.get_nowait()
+                except queue.Empty:
+                    break
+
+                if task is None:
+                    self._deliver(ok, *value)   # call_in_ui: (None, função, argumentos)
+                    continue
+
+                self._pending -= 1
+                if self._by_key.get(task.key) is task:
+                    del self._by_key[task.key]
+                if task.cancelled or self._closed:
+                    continue
+                if ok:
+                    if task.on_success is not None:
+                        self._deliver(task.on_success, value)
+                elif task.on_error is not None:
+                    self._deliver(task.on_error, value)
+                else:
+                    print(f"Erro em consulta em segundo plano: {value}")
+        finally:
+            # Mesmo que algo acima falhe, a verificação permanente continua agendada
+            try:
+                self._schedule(POLL_INTERVAL if self._pending > 0 else IDLE_POLL_INTERVAL)
+            except tk.TclError:
+                pass  # janela já destruída
+
+    @staticmethod
+    def _deliver(fn: Callable, *args):
+        """Chama um callback; um erro nele é registrado sem interromper a entrega dos demais"""
+        try:
+            fn(*args)
+        except Exception:
+            print("Erro em callback da interface:")
+            traceback.print_exc()
+
+    def shutdown(self):
+        """Cancela o que estiver pendente e encerra os trabalhadores"""
+        self._closed = True
+        for key in list(self._by_key):
+            self.cancel(key)
+        if self._poll_id is not None:
+            try:
+                self.root.after_cancel(self._poll_id)
+            except tk.TclError:
+                pass
+            self._poll_id = None
+        self._workers.shutdown(wait=True, cancel_futures=True)
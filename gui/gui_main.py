@@ -7,15 +7,36 @@ Autor: Sistema ERP
 Data: 2025
 """
 
+import argparse
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
+from tkinter import ttk, messagebox, simpledialog, filedialog
 import json
 import os
-import hashlib
+import sys
+import threading
+import time
 from datetime import datetime
 from dataclasses import dataclass, asdict
 from typing import Dict, List, Optional, Any
-import sqlite3
+
+# O núcleo compartilhado com a CLI e o servidor web (pacote erp) fica na raiz do repositório
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from erp.database import DatabaseManager, DashboardStats
+from erp.importer import import_file, SECTION_TABLES
+from erp.backup import create_backup
+from erp.fulltext import search, KIND_LABELS
+from erp.profiler import SamplingProfiler, DEFAULT_OUTPUT
+from erp.storage import Storage, ADMIN_ROLES, DEFAULT_DATABASE
+from erp.auth import Authenticator
+from erp.live_stats import CounterFeed
+from virtual_list import KeysetPager, VirtualTreeview
+from executor import QueryExecutor
+
+# Intervalo (ms) em que a tela aplica as mudanças de contadores já recebidas
+LIVE_REFRESH_MS = 250
 
 @dataclass
 class Employee:
@@ -52,113 +73,10 @@ class ServiceOrder:
     created_date: str
     due_date: str
 
-class DatabaseManager:
-    """Gerenciador de banco de dados SQLite"""
-    
-    def __init__(self, db_path: str = "erp_database.db"):
-        self.db_path = db_path
-        self.init_database()
-    
-    def init_database(self):
-        """Inicializa o banco de dados com as tabelas necessárias"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Tabela de usuários
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password_hash TEXT NOT NULL,
-                role TEXT NOT NULL,
-                created_date TEXT NOT NULL,
-                last_login TEXT,
-                active BOOLEAN DEFAULT 1
-            )
-        ''')
-        
-        # Tabela de funcionários
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS employees (
-                id TEXT PRIMARY KEY,
-                name TEXT NOT NULL,
-                position TEXT NOT NULL,
-                department TEXT NOT NULL,
-                hire_date TEXT NOT NULL,
-                salary REAL NOT NULL,
-                active BOOLEAN DEFAULT 1
-            )
-        ''')
-        
-        # Tabela de equipamentos
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS equipment (
-                id TEXT PRIMARY KEY,
-                name TEXT NOT NULL,
-                type TEXT NOT NULL,
-                brand TEXT NOT NULL,
-                model TEXT NOT NULL,
-                serial_number TEXT NOT NULL,
-                purchase_date TEXT NOT NULL,
-                status TEXT DEFAULT 'Ativo'
-            )
-        ''')
-        
-        # Tabela de ordens de serviço
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS service_orders (
-                id TEXT PRIMARY KEY,
-                employee_id TEXT NOT NULL,
-                equipment_id TEXT NOT NULL,
-                description TEXT NOT NULL,
-                priority TEXT NOT NULL,
-                status TEXT NOT NULL,
-                created_date TEXT NOT NULL,
-                due_date TEXT NOT NULL,
-                FOREIGN KEY (employee_id) REFERENCES employees (id),
-                FOREIGN KEY (equipment_id) REFERENCES equipment (id)
-            )
-        ''')
-        
-        # Criar usuário admin padrão se não existir
-        cursor.execute('SELECT COUNT(*) FROM users WHERE username = ?', ('admin',))
-        if cursor.fetchone()[0] == 0:
-            password_hash = hashlib.sha256('mudar@123'.encode()).hexdigest()
-            cursor.execute('''
-                INSERT INTO users (username, password_hash, role, created_date)
-                VALUES (?, ?, ?, ?)
-            ''', ('admin', password_hash, 'Admin', datetime.now().isoformat()))
-        
-        conn.commit()
-        conn.close()
-    
-    def execute_query(self, query: str, params: tuple = ()) -> List[tuple]:
-        """Executa uma query e retorna os resultados"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute(query, params)
-        results = cursor.fetchall()
-        conn.commit()
-        conn.close()
-        return results
-    
-    def execute_insert(self, query: str, params: tuple = ()) -> bool:
-        """Executa uma query de inserção"""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute(query, params)
-            conn.commit()
-            conn.close()
-            return True
-        except Exception as e:
-            print(f"Erro ao executar inserção: {e}")
-            return False
-
 class LoginWindow:
     """Janela de login do sistema"""
     
-    def __init__(self):
+    def __init__(self, db: Optional[DatabaseManager] = None):
         self.root = tk.Tk()
         self.root.title("Sistema ERP - Login")
         self.root.geometry("400x300")
@@ -167,7 +85,10 @@ class LoginWindow:
         # Centralizar janela
         self.center_window()
         
-        self.db = DatabaseManager()
+        self.db = db or DatabaseManager()
+        self.storage = Storage(self.db)
+        self.auth = Authenticator(self.check_credentials)
+        self.executor = QueryExecutor(self.root, self.db, max_workers=1)
         self.authenticated_user = None
         
         self.create_widgets()
@@ -217,8 +138,8 @@ class LoginWindow:
         button_frame.grid(row=2, column=0, columnspan=2, pady=20)
         
         # Botão de login
-        login_btn = ttk.Button(button_frame, text="🔐 Entrar", command=self.login)
-        login_btn.pack(side=tk.LEFT, padx=10)
+        self.login_btn = ttk.Button(button_frame, text="🔐 Entrar", command=self.login)
+        self.login_btn.pack(side=tk.LEFT, padx=10)
         
         # Botão de sair
         exit_btn = ttk.Button(button_frame, text="❌ Sair", command=self.root.quit)
@@ -266,80 +187,86 @@ class LoginWindow:
             self.password_entry.focus()
             return
         
-        # Desabilitar botão durante login
-        login_btn = None
-        for widget in self.root.winfo_children():
-            if hasattr(widget, 'winfo_children'):
-                for child in widget.winfo_children():
-                    if isinstance(child, ttk.LabelFrame):
-                        for btn in child.winfo_children():
-                            if isinstance(btn, ttk.Frame):
-                                for button in btn.winfo_children():
-                                    if isinstance(button, ttk.Button) and "Entrar" in button['text']:
-                                        login_btn = button
-                                        break
-        
-        if login_btn:
-            login_btn.configure(text="🔄 Conectando...", state="disabled")
-            self.root.update()
-        
-        try:
-            # Verificar credenciais
-            password_hash = hashlib.sha256(password.encode()).hexdigest()
-            result = self.db.execute_query(
-                'SELECT id, username, role FROM users WHERE username = ? AND password_hash = ? AND active = 1',
-                (username, password_hash)
-            )
-            
-            if result:
-                user_id, username, role = result[0]
-                self.authenticated_user = {
-                    'id': user_id,
-                    'username': username,
-                    'role': role
-                }
-                
-                # Atualizar último login
-                self.db.execute_insert(
-                    'UPDATE users SET last_login = ? WHERE id = ?',
-                    (datetime.now().isoformat(), user_id)
-                )
-                
-                # Sucesso - mostrar mensagem e fechar
-                messagebox.showinfo("Login", f"Bem-vindo(a), {username}!\n\nAcessando o sistema...")
-                self.root.destroy()
-                
-            else:
-                # Falha no login
-                messagebox.showerror("Erro de Login", 
-                                   "❌ Usuário ou senha inválidos!\n\n" +
-                                   "💡 Verifique:\n" +
-                                   "• Usuário: admin\n" +
-                                   "• Senha: mudar@123")
-                self.password_var.set("")
-                self.password_entry.focus()
-                
-        except Exception as e:
-            messagebox.showerror("Erro do Sistema", f"Erro ao conectar com o banco de dados:\n{str(e)}")
+        # Desabilitar botão durante login (consulta e KDF rodam em segundo plano)
+        self.login_btn.configure(text="🔄 Conectando...", state="disabled")
+        self.executor.submit(self.auth.login, username, password,
+                             on_success=self.finish_login, on_error=self.login_failed,
+                             key='login')
+    
+    def check_credentials(self, username, password):
+        """Valida o usuário e registra o acesso (roda fora da thread do Tk)"""
+        user = self.storage.users.verify(username, password)
+        if not user:
+            return None
+        
+        # Atualizar último login
+        self.storage.users.touch_login(username)
+        return {
+            'id': user['id'],
+            'username': user['username'],
+            'role': user['role']
+        }
+    
+    def finish_login(self, result):
+        """Conclui o login com o resultado da verificação"""
+        # Reabilitar botão
+        self.login_btn.configure(text="🔐 Entrar", state="normal")
+        user = result.user
+        
+        if result.retry_after:
+            # Muitas tentativas: recusada sem verificar a senha
+            messagebox.showerror("Erro de Login",
+                               "⏳ Muitas tentativas de login!\n\n" +
+                               f"Aguarde {result.retry_after:.0f} segundos e tente novamente.")
+            self.password_var.set("")
+            self.password_entry.focus()
+        elif user:
+            self.authenticated_user = user
             
-        finally:
-            # Reabilitar botão
-            if login_btn:
-                login_btn.configure(text="🔐 Entrar", state="normal")
+            # Sucesso - mostrar mensagem e fechar
+            messagebox.showinfo("Login", f"Bem-vindo(a), {user['username']}!\n\nAcessando o sistema...")
+            self.root.destroy()
+        else:
+            # Falha no login
+            messagebox.showerror("Erro de Login", 
+                               "❌ Usuário ou senha inválidos!\n\n" +
+                               "💡 Verifique:\n" +
+                               "• Usuário: admin\n" +
+                               "• Senha: mudar@123")
+            self.password_var.set("")
+            self.password_entry.focus()
+    
+    def login_failed(self, error):
+        """Erro inesperado durante a verificação"""
+        self.login_btn.configure(text="🔐 Entrar", state="normal")
+        messagebox.showerror("Erro do Sistema", f"Erro ao conectar com o banco de dados:\n{str(error)}")
     
     def run(self):
         """Executa a janela de login"""
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            self.executor.shutdown()
+            self.auth.shutdown()
         return self.authenticated_user
 
 class MainWindow:
     """Janela principal do sistema ERP"""
     
-    def __init__(self, user_info):
+    def __init__(self, user_info, db: Optional[DatabaseManager] = None):
         self.user_info = user_info
-        self.db = DatabaseManager()
+        self.db = db or DatabaseManager()
+        self.storage = Storage(self.db)
+        # Contadores empurrados a cada escrita (desta ou de outra sessão), sem consultas repetidas
+        self.live = CounterFeed(self.db.db_path, self.db)
+        self.stats = DashboardStats(self.db, self.live)
+        self.live_labels: Dict[str, ttk.Label] = {}
+        self._live_changes: Dict[str, int] = {}
+        self._live_lock = threading.Lock()
+        self._status_minute = None
         
         self.root = tk.Tk()
+        self.executor = QueryExecutor(self.root, self.db, max_workers=self.db.pool.size)
         self.root.title(f"Sistema ERP - {user_info['username']} ({user_info['role']})")
         self.root.geometry("1200x800")
         self.root.state('zoomed')  # Maximizar no Windows
@@ -360,6 +287,7 @@ class MainWindow:
         file_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Arquivo", menu=file_menu)
         file_menu.add_command(label="Dashboard", command=self.show_dashboard)
+        file_menu.add_command(label="Importar Dados...", command=self.import_data)
         file_menu.add_separator()
         file_menu.add_command(label="Sair", command=self.root.quit)
         
@@ -382,11 +310,12 @@ class MainWindow:
         os_menu.add_command(label="Consultar", command=self.show_service_orders)
         
         # Menu Administração
-        if self.user_info['role'] == 'Admin':
+        if self.user_info['role'] in ADMIN_ROLES:
             admin_menu = tk.Menu(menubar, tearoff=0)
             menubar.add_cascade(label="Administração", menu=admin_menu)
             admin_menu.add_command(label="Gerenciar Usuários", command=self.show_user_management)
             admin_menu.add_command(label="Backup", command=self.backup_database)
+            admin_menu.add_command(label="Desempenho do Banco", command=self.show_query_metrics)
         
         # Menu Ajuda
         help_menu = tk.Menu(menubar, tearoff=0)
@@ -419,21 +348,51 @@ class MainWindow:
         status_frame.pack(fill=tk.X, side=tk.BOTTOM)
         
         self.status_var = tk.StringVar()
-        self.status_var.set(f"Usuário: {self.user_info['username']} | {datetime.now().strftime('%d/%m/%Y %H:%M')}")
-        
         status_label = ttk.Label(status_frame, textvariable=self.status_var)
         status_label.pack(side=tk.LEFT, padx=10, pady=5)
         
-        # Atualizar hora a cada minuto
+        self.counters = self.live.subscribe(self.on_counters)
         self.update_status()
+        self.pump_counters()
     
     def update_status(self):
         """Atualiza a barra de status"""
-        self.status_var.set(f"Usuário: {self.user_info['username']} | {datetime.now().strftime('%d/%m/%Y %H:%M')}")
-        self.root.after(60000, self.update_status)  # Atualizar a cada minuto
+        self.status_var.set(
+            f"Usuário: {self.user_info['username']} | "
+            f"O.S. pendentes: {self.counters.get('service_orders_open', 0)} | "
+            f"Em aberto: {self.counters.get('service_orders_new', 0)} | "
+            f"Orçamentos aprovados: {self.counters.get('budgets_approved', 0)} | "
+            f"{datetime.now().strftime('%d/%m/%Y %H:%M')}")
+    
+    def on_counters(self, changes):
+        """Recebe as mudanças de contadores (thread do CounterFeed)"""
+        with self._live_lock:
+            self._live_changes.update(changes)
+    
+    def pump_counters(self):
+        """Aplica na tela as mudanças recebidas desde a última passagem (thread do Tk)
+        
+        Só lê o que o CounterFeed já entregou em memória; rajadas de escritas
+        viram uma única atualização da tela.
+        """
+        with self._live_lock:
+            changes, self._live_changes = self._live_changes, {}
+        if changes:
+            self.counters.update(changes)
+            for name, value in changes.items():
+                label = self.live_labels.get(name)
+                if label is not None:
+                    label.configure(text=str(value))
+        minute = datetime.now().strftime('%H:%M')
+        if changes or minute != self._status_minute:
+            self._status_minute = minute
+            self.update_status()
+        self.root.after(LIVE_REFRESH_MS, self.pump_counters)
     
     def clear_content(self):
         """Limpa o frame de conteúdo"""
+        # Resultados pendentes da tela anterior não devem ser exibidos
+        self.executor.cancel('view')
         for widget in self.content_frame.winfo_children():
             widget.destroy()
     
@@ -450,15 +409,17 @@ class MainWindow:
         stats_frame = ttk.Frame(self.content_frame)
         stats_frame.pack(fill=tk.X, padx=20, pady=10)
         
-        # Obter estatísticas
-        emp_count = len(self.db.execute_query('SELECT id FROM employees WHERE active = 1'))
-        eq_count = len(self.db.execute_query('SELECT id FROM equipment'))
-        os_open = len(self.db.execute_query("SELECT id FROM service_orders WHERE status != 'Concluída'"))
-        
-        # Cards de estatísticas
-        self.create_stat_card(stats_frame, "👥 Funcionários", str(emp_count), 0, 0)
-        self.create_stat_card(stats_frame, "🔧 Equipamentos", str(eq_count), 0, 1)
-        self.create_stat_card(stats_frame, "📋 O.S. Abertas", str(os_open), 0, 2)
+        # Cards de estatísticas, atualizados a cada mudança dos contadores
+        cards = (
+            ('employees_active', "👥 Funcionários"),
+            ('equipment_total', "🔧 Equipamentos"),
+            ('service_orders_open', "📋 O.S. Abertas"),
+            ('budgets_approved', "💰 Orçamentos Aprovados"),
+        )
+        for col, (name, title) in enumerate(cards):
+            self.live_labels[name] = self.create_stat_card(
+                stats_frame, title, str(self.counters.get(name, 0)), 0, col)
+        stats_frame.bind('<Destroy>', lambda e: self.live_labels.clear(), add='+')
         
         # Frame de ações rápidas
         actions_frame = ttk.LabelFrame(self.content_frame, text="Ações Rápidas", padding="20")
@@ -481,6 +442,7 @@ class MainWindow:
         
         # Configurar grid weights
         parent.grid_columnconfigure(col, weight=1)
+        return value_label
     
     def show_employees(self):
         """Mostra a lista de funcionários"""
@@ -495,27 +457,22 @@ class MainWindow:
         ttk.Button(header_frame, text="+ Novo Funcionário", 
                   command=self.show_employee_form).pack(side=tk.RIGHT)
         
-        # Treeview para funcionários
+        # Lista virtual: só as linhas visíveis são carregadas, página a página
+        pager = KeysetPager(
+            self.db, 'employees',
+            ('id', 'name', 'position', 'department', 'hire_date', 'salary'),
+            count=lambda: self.stats.get('employees_active'),
+            where='active = 1',
+        )
         columns = ('ID', 'Nome', 'Cargo', 'Departamento', 'Data Admissão', 'Salário')
-        tree = ttk.Treeview(self.content_frame, columns=columns, show='headings', height=15)
-        
-        # Configurar colunas
-        for col in columns:
-            tree.heading(col, text=col)
-            tree.column(col, width=150)
-        
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(self.content_frame, orient=tk.VERTICAL, command=tree.yview)
-        tree.configure(yscrollcommand=scrollbar.set)
-        
-        # Pack treeview e scrollbar
-        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=20)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        
-        # Carregar dados
-        employees = self.db.execute_query('SELECT * FROM employees WHERE active = 1')
-        for emp in employees:
-            tree.insert('', tk.END, values=emp)
+        employee_list = VirtualTreeview(self.content_frame, pager, columns, executor=self.executor)
+        employee_list.pack(fill=tk.BOTH, expand=True, padx=20)
+        
+        # Recarregar quando o banco for alterado (a escrita pode vir de outra thread)
+        def on_write():
+            self.executor.call_in_ui(employee_list.reload)
+        self.db.add_write_listener(on_write)
+        employee_list.bind('<Destroy>', lambda e: self.db.remove_write_listener(on_write), add='+')
     
     def show_employee_form(self):
         """Mostra o formulário de cadastro de funcionário"""
@@ -557,10 +514,14 @@ class MainWindow:
             entries[field] = entry
         
         # Gerar ID automático
-        emp_count = len(self.db.execute_query('SELECT id FROM employees'))
-        entries['id'].insert(0, f"EMP{emp_count + 1:04d}")
         entries['hire_date'].insert(0, datetime.now().strftime('%Y-%m-%d'))
         
+        def fill_id(emp_count):
+            if form_window.winfo_exists() and not entries['id'].get():
+                entries['id'].insert(0, f"EMP{emp_count + 1:04d}")
+        
+        self.executor.submit(self.stats.get, 'employees_total', on_success=fill_id)
+        
         # Botões
         button_frame = ttk.Frame(main_frame)
         button_frame.pack(pady=20)
@@ -572,24 +533,26 @@ class MainWindow:
                 messagebox.showerror("Erro", "Todos os campos são obrigatórios!")
                 return
             
-            try:
-                salary = float(data['salary'])
-                success = self.db.execute_insert('''
-                    INSERT INTO employees (id, name, position, department, hire_date, salary, active)
-                    VALUES (?, ?, ?, ?, ?, ?, 1)
-                ''', (data['id'], data['name'], data['position'], data['department'], 
-                     data['hire_date'], salary))
-                
-                if success:
-                    messagebox.showinfo("Sucesso", "Funcionário cadastrado com sucesso!")
-                    form_window.destroy()
-                    self.show_employees()
-                else:
-                    messagebox.showerror("Erro", "Erro ao cadastrar funcionário!")
-            except ValueError:
-                messagebox.showerror("Erro", "Salário deve ser um número válido!")
-        
-        ttk.Button(button_frame, text="Salvar", command=save_employee).pack(side=tk.LEFT, padx=10)
+            def insert():
+                # Validação (salário, data) e gravação pelo mesmo repositório da CLI
+                if data['id'] in self.storage.employees:
+                    raise ValueError(f"Já existe um funcionário com o código {data['id']}")
+                self.storage.employees.save(dict(data, active=True))
+            
+            def saved(_):
+                messagebox.showinfo("Sucesso", "Funcionário cadastrado com sucesso!")
+                form_window.destroy()
+                self.show_employees()
+            
+            def failed(error):
+                save_button.configure(state="normal")
+                messagebox.showerror("Erro", f"Erro ao cadastrar funcionário!\n{error}")
+            
+            save_button.configure(state="disabled")
+            self.executor.submit(insert, on_success=saved, on_error=failed)
+        
+        save_button = ttk.Button(button_frame, text="Salvar", command=save_employee)
+        save_button.pack(side=tk.LEFT, padx=10)
         ttk.Button(button_frame, text="Cancelar", command=form_window.destroy).pack(side=tk.LEFT)
     
     def show_equipment(self):
@@ -609,14 +572,91 @@ class MainWindow:
         messagebox.showinfo("Em desenvolvimento", "Funcionalidade em desenvolvimento!")
     
     def show_service_orders(self):
-        """Mostra a lista de ordens de serviço"""
+        """Mostra as ordens de serviço, com busca textual"""
         self.clear_content()
         
-        ttk.Label(self.content_frame, text="Ordens de Serviço", 
-                 font=("Arial", 14, "bold")).pack(pady=20)
+        # Título e botão de nova O.S.
+        header_frame = ttk.Frame(self.content_frame)
+        header_frame.pack(fill=tk.X, padx=20, pady=10)
         
-        ttk.Button(self.content_frame, text="Em desenvolvimento...", 
-                  state=tk.DISABLED).pack()
+        ttk.Label(header_frame, text="Ordens de Serviço", 
+                 font=("Arial", 14, "bold")).pack(side=tk.LEFT)
+        ttk.Button(header_frame, text="+ Nova O.S.", 
+                  command=self.show_service_order_form).pack(side=tk.RIGHT)
+        
+        # Busca: palavras da descrição, do equipamento ou do funcionário
+        search_frame = ttk.Frame(self.content_frame)
+        search_frame.pack(fill=tk.X, padx=20, pady=(0, 10))
+        
+        ttk.Label(search_frame, text="Buscar:").pack(side=tk.LEFT)
+        search_entry = ttk.Entry(search_frame, width=40)
+        search_entry.pack(side=tk.LEFT, padx=(10, 10), fill=tk.X, expand=True)
+        kinds = {label: kind for kind, label in KIND_LABELS.items()}
+        kind_combo = ttk.Combobox(search_frame, values=list(kinds), state="readonly", width=18)
+        kind_combo.set(KIND_LABELS['service_orders'])
+        kind_combo.pack(side=tk.LEFT)
+        
+        # Lista de resultados
+        list_frame = ttk.Frame(self.content_frame)
+        list_frame.pack(fill=tk.BOTH, expand=True, padx=20)
+        
+        columns = ('Código', 'Situação', 'Descrição')
+        results = ttk.Treeview(list_frame, columns=columns, show='headings', height=15)
+        results.heading('Código', text='Código')
+        results.heading('Situação', text='Situação')
+        results.heading('Descrição', text='Descrição')
+        results.column('Código', width=120, stretch=False)
+        results.column('Situação', width=140, stretch=False)
+        results.column('Descrição', width=600)
+        
+        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=results.yview)
+        results.configure(yscrollcommand=scrollbar.set)
+        results.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        info_label = ttk.Label(self.content_frame, text="")
+        info_label.pack(anchor=tk.W, padx=20, pady=5)
+        
+        def show_rows(result):
+            rows, elapsed, searching = result
+            results.delete(*results.get_children())
+            for row in rows:
+                results.insert('', tk.END, values=row)
+            if searching:
+                info_label.configure(text=f"{len(rows)} resultado(s) em {elapsed * 1000:.0f} ms")
+            else:
+                info_label.configure(text=f"{len(rows)} ordens mais recentes")
+        
+        def fetch(text, kind):
+            started = time.perf_counter()
+            if not text.strip():
+                rows = [(order['id'], order['status'], order['problem'])
+                        for order in self.storage.service_orders.recent(100)]
+                return rows, time.perf_counter() - started, False
+            hits = search(self.db, text, kind, limit=200, marks=('«', '»'))
+            rows = [(hit.id, hit.detail, hit.snippet) for hit in hits]
+            return rows, time.perf_counter() - started, True
+        
+        # Busca enquanto digita: espera uma pausa curta e substitui a busca anterior
+        pending = None
+        
+        def run_search(event=None):
+            nonlocal pending
+            if pending is not None:
+                self.root.after_cancel(pending)
+            pending = self.root.after(
+                150, lambda: self.executor.submit(fetch, search_entry.get(), kinds[kind_combo.get()],
+                                                  on_success=show_rows, key='view'))
+        
+        def cancel_pending(event):
+            if pending is not None:
+                self.root.after_cancel(pending)
+        
+        search_entry.bind('<KeyRelease>', run_search)
+        kind_combo.bind('<<ComboboxSelected>>', run_search)
+        search_entry.bind('<Destroy>', cancel_pending)
+        search_entry.focus()
+        self.executor.submit(fetch, '', 'service_orders', on_success=show_rows, key='view')
     
     def show_service_order_form(self):
         """Mostra o formulário de nova ordem de serviço"""
@@ -626,9 +666,122 @@ class MainWindow:
         """Mostra o gerenciamento de usuários"""
         messagebox.showinfo("Administração", "Gerenciamento de usuários em desenvolvimento!")
     
+    def import_data(self):
+        """Importa funcionários, equipamentos e O.S. de um arquivo CSV ou JSON"""
+        path = filedialog.askopenfilename(
+            title="Importar Dados",
+            filetypes=[("CSV ou JSON", "*.csv *.json *.jsonl"), ("Todos os arquivos", "*.*")]
+        )
+        if not path:
+            return
+        
+        table = None
+        if not path.lower().endswith('.json'):
+            answer = simpledialog.askstring(
+                "Importar Dados", "Tabela de destino (funcionarios, equipamentos ou ordens):",
+                parent=self.root
+            )
+            if not answer:
+                return
+            table = SECTION_TABLES.get(answer.strip().lower())
+            if table is None:
+                messagebox.showerror("Erro", f"Tabela desconhecida: {answer}")
+                return
+        
+        def progress(report):
+            text = f"Importando... {report.total_imported} registros, {report.rejected} rejeitados"
+            self.executor.call_in_ui(self.status_var.set, text)
+        
+        def done(report):
+            self.update_status()
+            messagebox.showinfo(
+                "Importar Dados",
+                f"{report.total_imported} registros importados em {report.elapsed:.1f}s\n"
+                f"{sum(report.skipped.values())} já existiam\n"
+                f"{report.rejected} rejeitados"
+            )
+        
+        def failed(error):
+            self.update_status()
+            messagebox.showerror("Erro", f"Erro na importação:\n{error}")
+        
+        self.status_var.set("Importando...")
+        self.executor.submit(import_file, self.db, path, table, progress=progress,
+                             on_success=done, on_error=failed)
+    
     def backup_database(self):
-        """Realiza backup do banco de dados"""
-        messagebox.showinfo("Backup", "Funcionalidade de backup em desenvolvimento!")
+        """Realiza backup do banco de dados (online, em segundo plano)"""
+        def progress(done, total):
+            percent = done * 100 // total if total else 100
+            self.executor.call_in_ui(self.status_var.set, f"Backup em andamento... {percent}%")
+        
+        def done(result):
+            self.update_status()
+            removed = f"\n{len(result.removed)} backup(s) antigo(s) removido(s)" if result.removed else ""
+            messagebox.showinfo(
+                "Backup",
+                f"✅ Backup criado e verificado!\n\n{result.path}\n"
+                f"{result.size / 1024:.0f} KB em {result.elapsed:.1f}s{removed}"
+            )
+        
+        def failed(error):
+            self.update_status()
+            messagebox.showerror("Backup", f"❌ Falha no backup:\n{error}")
+        
+        self.status_var.set("Backup em andamento...")
+        self.executor.submit(create_backup, self.db.db_path, progress=progress,
+                             on_success=done, on_error=failed, key='backup')
+    
+    def show_query_metrics(self):
+        """Mostra as métricas de consultas da sessão atual"""
+        self.clear_content()
+        
+        header_frame = ttk.Frame(self.content_frame)
+        header_frame.pack(fill=tk.X, padx=20, pady=10)
+        
+        ttk.Label(header_frame, text="Desempenho do Banco", 
+                 font=("Arial", 14, "bold")).pack(side=tk.LEFT)
+        
+        columns = ('Execuções', 'Total (ms)', 'Médio (ms)', 'p95 (ms)', 'Máx (ms)', 'Linhas', 'Instrução')
+        list_frame = ttk.Frame(self.content_frame)
+        list_frame.pack(fill=tk.BOTH, expand=True, padx=20)
+        
+        tree = ttk.Treeview(list_frame, columns=columns, show='headings', height=15)
+        for col in columns:
+            tree.heading(col, text=col)
+            tree.column(col, width=90, anchor=tk.E, stretch=False)
+        tree.column('Instrução', width=600, anchor=tk.W, stretch=True)
+        
+        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        info_label = ttk.Label(self.content_frame, text="")
+        info_label.pack(anchor=tk.W, padx=20, pady=5)
+        
+        def refresh():
+            snapshot = self.db.metrics.snapshot()
+            tree.delete(*tree.get_children())
+            for stat in snapshot['statements']:
+                tree.insert('', tk.END, values=(
+                    stat['count'], f"{stat['total_ms']:.1f}", f"{stat['mean_ms']:.2f}",
+                    f"{stat['p95_ms']:g}", f"{stat['max_ms']:.1f}", stat['rows'], stat['sql']
+                ))
+            wait = snapshot['connection_wait']
+            info_label.configure(
+                text=f"Desde {snapshot['since']} | Espera por conexão: média {wait['mean_ms']:.3f} ms, "
+                     f"máx {wait['max_ms']:.1f} ms | Consultas acima de {self.db.metrics.slow_ms:g} ms "
+                     f"em {self.db.metrics.slow_log}"
+            )
+        
+        def reset():
+            self.db.metrics.reset()
+            refresh()
+        
+        ttk.Button(header_frame, text="Zerar", command=reset).pack(side=tk.RIGHT)
+        ttk.Button(header_frame, text="Atualizar", command=refresh).pack(side=tk.RIGHT, padx=5)
+        refresh()
     
     def show_about(self):
         """Mostra informações sobre o sistema"""
@@ -646,18 +799,47 @@ Base de dados SQLite
     
     def run(self):
         """Executa a janela principal"""
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            self.executor.shutdown()
+            self.live.close()
 
-def main():
+def main(argv=None):
     """Função principal da aplicação"""
-    # Tela de login
-    login = LoginWindow()
-    user_info = login.run()
+    parser = argparse.ArgumentParser(description="Sistema ERP - GUI")
+    parser.add_argument('--profile', nargs='?', const=DEFAULT_OUTPUT, metavar='ARQUIVO',
+                        help="amostra a sessão e grava pilhas colapsadas (flamegraph) ao sair")
+    args = parser.parse_args(argv)
+
+    session = None
+    if args.profile:
+        session = SamplingProfiler()
+        # Cada tela continua ativa até a próxima ser aberta
+        session.instrument(MainWindow, [name for name in vars(MainWindow) if name.startswith('show_')],
+                           persistent=True)
+        session.set_screen('login')
+        session.start()
+
+    # Um único gerenciador (e pool de conexões) para toda a sessão
+    db = DatabaseManager(DEFAULT_DATABASE)
     
-    if user_info:
-        # Se login foi bem-sucedido, abrir janela principal
-        main_app = MainWindow(user_info)
-        main_app.run()
+    try:
+        # Tela de login
+        login = LoginWindow(db)
+        user_info = login.run()
+        
+        if user_info:
+            # Se login foi bem-sucedido, abrir janela principal
+            main_app = MainWindow(user_info, db)
+            main_app.run()
+    finally:
+        db.close()
+        if session is not None:
+            session.stop()
+            session.write(args.profile)
+            print(session.summary())
+            print(f"\n✅ Perfil gravado em {args.profile}")
 
 if __name__ == "__main__":
     main()
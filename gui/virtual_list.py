@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sistema ERP - Listas Virtuais
+Treeview que materializa apenas as linhas visíveis, com paginação por chave
+"""
+
+import threading
+import tkinter as tk
+from tkinter import ttk
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+
+class KeysetPager:
+    """Acesso por posição a uma consulta ordenada, em páginas
+
+    Cada página é buscada com paginação por chave
+    (``WHERE (coluna, id) > (?, ?) ORDER BY coluna, id LIMIT ?``), usando a
+    última linha da página anterior como âncora, de modo que o custo não
+    cresce com a posição na lista. Um salto para uma página cuja âncora
+    ainda não é conhecida parte da âncora conhecida mais próxima. Apenas
+    ``max_pages`` páginas ficam em memória (as menos usadas são descartadas).
+
+    A coluna de ordenação precisa ser uma das ``columns``; o nome nunca vem
+    do usuário diretamente.
+    """
+
+    def __init__(self, db, table: str, columns: Sequence[str], count: Callable[[], int],
+                 key: str = 'id', where: str = '', page_size: int = 100, max_pages: int = 8):
+        self.db = db
+        self.table = table
+        self.columns = list(columns)
+        self.count = count
+        self.key = key
+        self.where = where
+        self.page_size = page_size
+        self.max_pages = max_pages
+
+        self.sort_column = key
+        self.descending = False
+        self._pages: "OrderedDict[int, List[tuple]]" = OrderedDict()
+        self._anchors: Dict[int, Optional[tuple]] = {0: None}
+        self._total: Optional[int] = None
+        self.lock = threading.RLock()       # uma thread por vez lê ou altera o pager
+
+    def sort_by(self, column: str, descending: bool = False):
+        """Passa a ordenar pela coluna indicada (ordenação feita no banco)"""
+        if column not in self.columns:
+            raise ValueError(f"Coluna inválida para ordenação: {column}")
+        self.sort_column = column
+        self.descending = descending
+        self.reset()
+
+    def reset(self):
+        """Descarta páginas e âncoras (após escrita ou nova ordenação)"""
+        self._pages.clear()
+        self._anchors = {0: None}
+        self._total = None
+
+    def __len__(self):
+        if self._total is None:
+            self._total = self.count()
+        return self._total
+
+    def row(self, index: int) -> Optional[tuple]:
+        """Linha na posição ``index`` da ordenação atual"""
+        if not 0 <= index < len(self):
+            return None
+        page = self._page(index // self.page_size)
+        offset = index % self.page_size
+        return page[offset] if offset < len(page) else None
+
+    def rows(self, start: int, stop: int) -> List[tuple]:
+        """Linhas de ``start`` até ``stop`` (exclusivo)"""
+        rows = []
+        for index in range(max(start, 0), min(stop, len(self))):
+            row = self.row(index)
+            if row is None:
+                break
+            rows.append(row)
+        return rows
+
+    def _order(self) -> Tuple[str, str]:
+        """Cláusulas de comparação e de ordenação da ordenação atual"""
+        direction = 'DESC' if self.descending else 'ASC'
+        order = f'{self.sort_column} {direction}'
+        if self.sort_column != self.key:
+            order += f', {self.key} {direction}'
+        return ('<' if self.descending else '>'), order
+
+    def _after(self, anchor: Optional[tuple]) -> Tuple[str, tuple]:
+        """Condição WHERE das linhas posteriores à âncora"""
+        conditions = [self.where] if self.where else []
+        params: tuple = ()
+        if anchor is not None:
+            comparison, _ = self._order()
+            if self.sort_column == self.key:
+                conditions.append(f'{self.key} {comparison} ?')
+                params = anchor[1:]
+            else:
+                conditions.append(f'({self.sort_column}, {self.key}) {comparison} (?, ?)')
+                params = anchor
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        return where, params
+
+    def _anchor(self, number: int) -> Optional[tuple]:
+        """(valor de ordenação, chave) da última linha antes da página ``number``"""
+        if number in self._anchors:
+            return self._anchors[number]
+
+        known = max(n for n in self._anchors if n < number)
+        where, params = self._after(self._anchors[known])
+        _, order = self._order()
+        rows = self.db.execute_query(
+            f'SELECT {self.sort_column}, {self.key} FROM {self.table} {where} '
+            f'ORDER BY {order} LIMIT 1 OFFSET ?',
+            params + ((number - known) * self.page_size - 1,)
+        )
+        anchor = tuple(rows[0]) if rows else None
+        self._anchors[number] = anchor
+        return anchor
+
+    def _page(self, number: int) -> List[tuple]:
+        """Página ``number``, da memória ou do banco"""
+        page = self._pages.get(number)
+        if page is not None:
+            self._pages.move_to_end(number)
+            return page
+
+        anchor = self._anchor(number)
+        if number and anchor is None:
+            page = []
+        else:
+            where, params = self._after(anchor)
+            _, order = self._order()
+            page = self.db.execute_query(
+                f"SELECT {', '.join(self.columns)} FROM {self.table} {where} ORDER BY {order} LIMIT ?",
+                params + (self.page_size,)
+            )
+
+        if len(page) == self.page_size:
+            last = page[-1]
+            self._anchors[number + 1] = (last[self.columns.index(self.sort_column)],
+                                         last[self.columns.index(self.key)])
+
+        self._pages[number] = page
+        while len(self._pages) > self.max_pages:
+            self._pages.popitem(last=False)
+        return page
+
+
+class VirtualTreeview(ttk.Frame):
+    """Treeview em modo lista virtual
+
+    Mantém apenas um item do Treeview por linha visível; rolar a lista
+    reaproveita esses itens com os valores da nova posição, buscados no
+    ``KeysetPager``. A barra de rolagem representa a lista inteira.
+    Clicar no cabeçalho ordena pela coluna no banco (clicar de novo
+    inverte a ordem).
+
+    Com um ``executor`` (QueryExecutor), as páginas são buscadas em
+    segundo plano e cada nova posição substitui a busca anterior.
+    """
+
+    def __init__(self, parent, pager: KeysetPager, headings: Sequence[str], executor=None, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.pager = pager
+        self.headings = list(headings)
+        self.executor = executor
+        self.top = 0
+        self.total = 0
+        self.slots: List[str] = []
+
+        self.tree = ttk.Treeview(self, columns=self.headings, show='headings',
+                                 height=15, selectmode='browse')
+        for heading, column in zip(self.headings, self.pager.columns):
+            self.tree.heading(heading, text=heading, command=lambda c=column: self.sort(c))
+            self.tree.column(heading, width=150)
+
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.tree.bind('<Configure>', self._on_resize)
+        self.tree.bind('<MouseWheel>', self._on_mousewheel)
+        self.tree.bind('<Button-4>', lambda e: self.scroll(-3))
+        self.tree.bind('<Button-5>', lambda e: self.scroll(3))
+        self.tree.bind('<Up>', lambda e: self._on_arrow(-1))
+        self.tree.bind('<Down>', lambda e: self._on_arrow(1))
+        self.tree.bind('<Prior>', lambda e: self.scroll(-len(self.slots)) or 'break')
+        self.tree.bind('<Next>', lambda e: self.scroll(len(self.slots)) or 'break')
+        self.tree.bind('<Home>', lambda e: self.scroll_to(0) or 'break')
+        self.tree.bind('<End>', lambda e: self.scroll_to(self.total) or 'break')
+        if executor is not None:
+            self.bind('<Destroy>', lambda e: executor.cancel(self), add='+')
+
+        self._resize_slots(15)
+
+    # -------------------------------------------------------------- rolagem
+
+    def yview(self, *args):
+        """Comando da barra de rolagem: 'moveto' fração ou 'scroll' n unidade"""
+        if args[0] == 'moveto':
+            self.scroll_to(int(float(args[1]) * self.total))
+        elif args[0] == 'scroll':
+            amount = int(args[1])
+            if args[2] == 'pages':
+                amount *= max(len(self.slots) - 1, 1)
+            self.scroll(amount)
+
+    def scroll(self, amount: int):
+        """Rola ``amount`` linhas (negativo sobe)"""
+        self.scroll_to(self.top + amount)
+
+    def scroll_to(self, index: int):
+        """Posiciona a linha ``index`` no topo da área visível"""
+        top = max(0, min(index, self.total - len(self.slots)))
+        if top != self.top:
+            self.top = top
+            self.refresh()
+
+    def _on_mousewheel(self, event):
+        self.scroll(-3 if event.delta > 0 else 3)
+
+    def _on_arrow(self, step: int):
+        """Seta no primeiro/último item visível rola a lista em vez de parar"""
+        selection = self.tree.selection()
+        if not selection or selection[0] not in self.slots:
+            return None
+        position = self.slots.index(selection[0]) + step
+        if 0 <= position < len(self.slots) and self.tree.item(self.slots[position], 'values'):
+            return None
+        self.scroll(step)
+        return 'break'
+
+    # ----------------------------------------------------------- renderização
+
+    def _on_resize(self, event):
+        rowheight = int(ttk.Style().lookup('Treeview', 'rowheight') or 20)
+        heading_height = rowheight + 5
+        self._resize_slots(max(1, (event.height - heading_height) // rowheight))
+
+    def _resize_slots(self, count: int):
+        """Ajusta a quantidade de itens do Treeview às linhas que cabem na tela"""
+        if count == len(self.slots):
+            return
+        while len(self.slots) < count:
+            self.slots.append(self.tree.insert('', tk.END, values=()))
+        while len(self.slots) > count:
+            self.tree.delete(self.slots.pop())
+        self.refresh()
+
+    def refresh(self):
+        """Preenche os itens visíveis a partir da posição atual"""
+        if self.executor is None:
+            self._show(self._fetch(self.top, len(self.slots)))
+        else:
+            self.executor.submit(self._fetch, self.top, len(self.slots),
+                                 on_success=self._show, key=self)
+
+    def _fetch(self, top: int, count: int) -> Tuple[int, int, List[tuple]]:
+        """Total, posição ajustada e linhas visíveis (roda fora da thread do Tk)"""
+        with self.pager.lock:
+            total = len(self.pager)
+            top = max(0, min(top, total - count))
+            return total, top, self.pager.rows(top, top + count)
+
+    def _show(self, result: Tuple[int, int, List[tuple]]):
+        """Exibe o resultado de ``_fetch`` nos itens visíveis"""
+        self.total, self.top, rows = result
+        for index, slot in enumerate(self.slots):
+            values = rows[index] if index < len(rows) else ()
+            self.tree.item(slot, values=values)
+
+        if self.total:
+            self.scrollbar.set(self.top / self.total, min(1.0, (self.top + len(self.slots)) / self.total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _change_pager(self, change: Callable[[], None]):
+        """Altera o pager sem concorrer com uma busca em andamento"""
+        if self.executor is not None:
+            self.executor.cancel(self)
+        with self.pager.lock:
+            change()
+
+    def reload(self):
+        """Recarrega os dados do banco mantendo a posição"""
+        self._change_pager(self.pager.reset)
+        self.refresh()
+
+    # -------------------------------------------------------------- ordenação
+
+    def sort(self, column: str):
+        """Ordena pela coluna no banco; repetir inverte a ordem"""
+        descending = self.pager.sort_column == column and not self.pager.descending
+        self._change_pager(lambda: self.pager.sort_by(column, descending))
+        for heading, name in zip(self.headings, self.pager.columns):
+            arrow = (' ▼' if descending else ' ▲') if name == column else ''
+            self.tree.heading(heading, text=heading + arrow)
+        self.top = 0
+        self.refresh()